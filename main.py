@@ -4,11 +4,14 @@ Squirrel - 跨平台视频下载工具
 应用入口，初始化 pywebview 窗口
 """
 
+import logging
 import sys
 import webview
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
 
 from src.api import SquirrelAPI
+from src.cache import get_metadata_cache
 from src.config import get_config
 from src.downloader import get_download_manager
 
@@ -35,8 +38,27 @@ def get_icon_path() -> Path:
     return icon_path
 
 
+def setup_logging() -> None:
+    """配置日志：输出到控制台，并写入用户目录下的日志文件（记录并发调整等运行决策）"""
+    handlers = [logging.StreamHandler()]
+    log_path = get_config().log_path
+    try:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        handlers.append(
+            RotatingFileHandler(log_path, maxBytes=1048576, backupCount=3, encoding='utf-8')
+        )
+    except OSError:
+        pass
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s %(levelname)s %(name)s: %(message)s',
+        handlers=handlers,
+    )
+
+
 def main():
     """应用主入口"""
+    setup_logging()
     config = get_config()
     api = SquirrelAPI()
 
@@ -76,6 +98,7 @@ def main():
     def handle_closing():
         manager = get_download_manager()
         manager.save_state()
+        get_metadata_cache().flush()
 
     window.events.closing += handle_closing
 
@@ -6,13 +6,17 @@ JavaScript Bridge API 模块
 
 import json
 import shutil
+import threading
+import time
+import uuid
 import webview
 from pathlib import Path
 from typing import Optional
 
+from src.cache import get_metadata_cache
 from src.config import get_config
 from src.strings import Messages
-from src.parser import get_parser
+from src.parser import Platform, get_parser
 from src.downloader import get_download_manager
 from src.utils import open_folder as util_open_folder, open_file as util_open_file
 from src.history import get_history_store
@@ -31,6 +35,7 @@ class SquirrelAPI:
         self._parser = get_parser()
         self._downloader = get_download_manager()
         self._history = get_history_store()
+        self._expansions = {}
 
         # 设置下载进度回调
         self._downloader.set_progress_callback(self._on_progress_update)
@@ -39,25 +44,29 @@ class SquirrelAPI:
         """设置 webview 窗口引用"""
         self._window = window
 
-    def _on_progress_update(self, task_data: dict):
-        """下载进度更新回调"""
+    def _push(self, handler: str, payload: dict):
+        """通过 evaluate_js 调用前端的 window 回调"""
         if self._window:
-            # 通过 evaluate_js 推送进度到前端
-            payload = json.dumps(task_data, ensure_ascii=False)
-            js_code = f"window.onDownloadProgress && window.onDownloadProgress({payload})"
+            data = json.dumps(payload, ensure_ascii=False)
+            js_code = f"window.{handler} && window.{handler}({data})"
             try:
                 self._window.evaluate_js(js_code)
             except Exception:
                 pass  # 忽略窗口已关闭的情况
 
+    def _on_progress_update(self, frame: dict):
+        """下载进度更新回调（每个节拍一帧，包含所有变化任务的增量）"""
+        self._push('onDownloadProgressBatch', frame)
+
     # ==================== URL 解析 ====================
 
-    def parse_url(self, url: str) -> dict:
+    def parse_url(self, url: str, force_refresh: bool = False) -> dict:
         """
         解析视频 URL
 
         Args:
             url: 视频 URL
+            force_refresh: 忽略缓存，重新解析
 
         Returns:
             视频信息字典，包含标题、缩略图、格式列表等
@@ -66,7 +75,136 @@ class SquirrelAPI:
         if not url or not url.strip():
             return {'error': Messages.INVALID_URL}
 
-        return self._parser.extract_info(url.strip())
+        return self._parser.extract_info(url.strip(), force_refresh=bool(force_refresh))
+
+    def parse_urls(self, urls: list, force_refresh: bool = False) -> dict:
+        """
+        批量解析视频 URL
+
+        立即返回去重结果，解析在后台并行进行。每个结果完成后通过
+        window.onParseResult({batch_id, index, url, result}) 推送，
+        全部完成后调用 window.onParseBatchDone({batch_id, total, succeeded, failed})。
+
+        Args:
+            urls: URL 列表
+            force_refresh: 忽略缓存，重新解析
+
+        Returns:
+            {'success': True, 'batch_id': str, 'total': int, 'unique': int,
+             'duplicates': {重复项序号: 首次出现的序号}}
+        """
+        urls = [str(url).strip() for url in (urls or []) if url and str(url).strip()]
+        if not urls:
+            return {'success': False, 'error': Messages.INVALID_URL}
+
+        unique, duplicates = self._parser.dedupe_urls(urls)
+        batch_id = uuid.uuid4().hex[:8]
+        counts = {'succeeded': 0, 'failed': 0}
+        lock = threading.Lock()
+
+        def on_result(index: int, url: str, result: dict):
+            with lock:
+                counts['failed' if 'error' in result else 'succeeded'] += 1
+            self._push('onParseResult', {
+                'batch_id': batch_id,
+                'index': index,
+                'url': url,
+                'result': result,
+            })
+
+        def run():
+            self._parser.extract_many(
+                unique,
+                on_result,
+                max_workers=self._config.get('parse_concurrency', 4),
+                force_refresh=bool(force_refresh),
+            )
+            self._push('onParseBatchDone', {
+                'batch_id': batch_id,
+                'total': len(unique),
+                **counts,
+            })
+
+        threading.Thread(target=run, name=f'parse-batch-{batch_id}', daemon=True).start()
+        return {
+            'success': True,
+            'batch_id': batch_id,
+            'total': len(urls),
+            'unique': len(unique),
+            'duplicates': duplicates,
+        }
+
+    def expand_url(self, url: str) -> dict:
+        """
+        展开播放列表、频道或多 P 视频
+
+        立即返回，条目在后台以平铺模式逐条获取，按批通过
+        window.onPlaylistEntries({expansion_id, entries, done, count, error}) 推送。
+
+        Args:
+            url: 合集 URL
+
+        Returns:
+            {'success': True, 'expansion_id': str} 或 {'success': False, 'error': str}
+        """
+        if not url or not url.strip():
+            return {'success': False, 'error': Messages.INVALID_URL}
+
+        url = url.strip()
+        expansion_id = uuid.uuid4().hex[:8]
+        stop_event = threading.Event()
+        self._expansions[expansion_id] = stop_event
+
+        def run():
+            batch = []
+            count = 0
+            error = None
+            pushed_at = time.monotonic()
+            try:
+                for entry in self._parser.iter_entries(url):
+                    if stop_event.is_set():
+                        break
+                    batch.append(entry)
+                    count += 1
+                    # 按批推送，避免每个条目一次 evaluate_js
+                    if len(batch) >= 50 or time.monotonic() - pushed_at >= 0.5:
+                        self._push('onPlaylistEntries', {
+                            'expansion_id': expansion_id,
+                            'entries': batch,
+                            'done': False,
+                            'count': count,
+                        })
+                        batch = []
+                        pushed_at = time.monotonic()
+            except Exception as e:
+                error = Messages.INFO_FETCH_FAILED.format(error=str(e))
+            finally:
+                self._expansions.pop(expansion_id, None)
+            self._push('onPlaylistEntries', {
+                'expansion_id': expansion_id,
+                'entries': batch,
+                'done': True,
+                'count': count,
+                'error': error,
+            })
+
+        threading.Thread(target=run, name=f'expand-{expansion_id}', daemon=True).start()
+        return {'success': True, 'expansion_id': expansion_id}
+
+    def cancel_expansion(self, expansion_id: str) -> dict:
+        """
+        停止展开合集
+
+        Args:
+            expansion_id: expand_url 返回的 ID
+
+        Returns:
+            {'success': bool}
+        """
+        stop_event = self._expansions.get(expansion_id)
+        if stop_event:
+            stop_event.set()
+        return {'success': stop_event is not None}
 
     def validate_url(self, url: str) -> dict:
         """
@@ -83,6 +221,8 @@ class SquirrelAPI:
 
         is_valid = self._parser.validate_url(url.strip())
         platform, _ = self._parser.identify_platform(url.strip())
+        if platform == Platform.UNKNOWN:
+            platform, _ = self._parser.identify_collection(url.strip())
 
         return {
             'valid': is_valid,
@@ -106,6 +246,7 @@ class SquirrelAPI:
         has_video: bool = True,
         format_ext: str = "",
         history_id: Optional[int] = None,
+        priority: int = 0,
     ) -> dict:
         """
         开始下载任务
@@ -120,6 +261,7 @@ class SquirrelAPI:
             has_audio: 选中格式是否包含音频
             has_video: 选中格式是否包含视频
             format_ext: 选中格式的扩展名
+            priority: 调度优先级，数值越大越先开始
 
         Returns:
             {'success': bool, 'task_id': str} 或 {'error': str}
@@ -139,6 +281,7 @@ class SquirrelAPI:
                 has_video=has_video,
                 format_ext=format_ext,
                 history_id=history_id,
+                priority=priority,
             )
             return {'success': True, 'task_id': task_id}
         except Exception as e:
@@ -183,6 +326,66 @@ class SquirrelAPI:
         success = self._downloader.cancel_task(task_id)
         return {'success': success}
 
+    def set_task_priority(self, task_id: str, priority: int) -> dict:
+        """
+        设置任务优先级
+
+        Args:
+            task_id: 任务 ID
+            priority: 优先级，数值越大越先开始
+
+        Returns:
+            {'success': bool}
+        """
+        try:
+            success = self._downloader.set_task_priority(task_id, int(priority))
+        except (TypeError, ValueError):
+            success = False
+        return {'success': success}
+
+    def set_task_rate_limit(self, task_id: str, rate_limit: int) -> dict:
+        """
+        设置单任务限速
+
+        Args:
+            task_id: 任务 ID
+            rate_limit: 限速（字节/秒），0 表示使用全局默认
+
+        Returns:
+            {'success': bool}
+        """
+        try:
+            success = self._downloader.set_task_rate_limit(task_id, int(rate_limit))
+        except (TypeError, ValueError):
+            success = False
+        return {'success': success}
+
+    def move_task_to_top(self, task_id: str) -> dict:
+        """
+        将等待中的任务移到队首
+
+        Args:
+            task_id: 任务 ID
+
+        Returns:
+            {'success': bool}
+        """
+        success = self._downloader.move_task_to_top(task_id)
+        return {'success': success}
+
+    def reorder_tasks(self, task_ids: list) -> dict:
+        """
+        按给定顺序重排等待中的任务
+
+        Args:
+            task_ids: 任务 ID 列表，靠前的先开始（同优先级内生效）
+
+        Returns:
+            {'count': int} 参与重排的任务数
+        """
+        count = self._downloader.reorder_tasks(task_ids)
+        return {'count': count}
+
     def remove_task(self, task_id: str) -> dict:
         """
         移除已完成/取消/失败的任务
@@ -220,6 +423,28 @@ class SquirrelAPI:
         """
         return self._downloader.get_all_tasks()
 
+    def get_changes_since(self, version: int = 0, epoch: str = '') -> dict:
+        """
+        获取指定版本之后变化的任务（拉取模式，用于重连后增量同步）
+
+        Args:
+            version: 上次同步得到的版本号，0 表示全量
+            epoch: 上次同步得到的纪元，后端重启后不一致，返回全量
+
+        Returns:
+            {'version': int, 'epoch': str, 'tasks': list, 'removed': list, 'reset': bool}
+        """
+        return self._downloader.get_changes_since(version, epoch or '')
+
+    def get_queue_stats(self) -> dict:
+        """
+        获取下载队列状态
+
+        Returns:
+            {'max_workers': int, 'active': int, 'pending': int, ...}
+        """
+        return self._downloader.get_queue_stats()
+
     def clear_completed(self) -> dict:
         """
         清除所有已完成的任务
@@ -299,10 +524,19 @@ class SquirrelAPI:
         try:
             self._config.update(settings)
             success = self._config.save()
+            self._apply_config()
             return {'success': success}
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+    def _apply_config(self) -> None:
+        """将保存后的设置应用到下载管理器与解析结果缓存"""
+        self._downloader.apply_config()
+        get_metadata_cache().configure(
+            self._config.get('metadata_cache_ttl', 21600),
+            self._config.get('metadata_cache_size', 200),
+        )
+
     def get_setting(self, key: str) -> dict:
         """
         获取单个设置项
@@ -330,6 +564,7 @@ class SquirrelAPI:
         try:
             self._config.set(key, value)
             success = self._config.save()
+            self._apply_config()
             return {'success': success}
         except Exception as e:
             return {'success': False, 'error': str(e)}
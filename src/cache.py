@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+"""
+元数据缓存模块
+按 (平台, 视频 ID) 缓存解析结果，带过期时间与 LRU 淘汰，并持久化到磁盘；
+同时保留解析时的 yt-dlp 提取结果，供下载直接使用
+"""
+
+import copy
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from src.config import get_config
+
+
+class MetadataCache:
+    """
+    视频元数据缓存
+
+    条目按最近使用顺序保存，超过容量时淘汰最久未用的条目；
+    过期条目在读取时丢弃。修改后由后台线程延迟 SAVE_DELAY 秒整体落盘，
+    连续的修改合并为一次写入，序列化与写文件不占用锁；重启后继续可用。
+    """
+
+    # 修改后延迟落盘的时间（秒）
+    SAVE_DELAY = 2.0
+
+    def __init__(self, path: Path, ttl: int = 21600, max_entries: int = 200):
+        """
+        初始化缓存
+
+        Args:
+            path: 缓存文件路径
+            ttl: 条目有效期（秒），0 表示不缓存
+            max_entries: 最大条目数
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, dict]' = OrderedDict()
+        self._ttl = 0
+        self._max_entries = 1
+        self._hits = 0
+        self._misses = 0
+        self._dirty = False
+        # 保证同一时间只有一个线程写文件
+        self._save_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.configure(ttl, max_entries)
+        self._load()
+
+    @staticmethod
+    def make_key(platform, video_id: str) -> str:
+        """生成缓存键"""
+        value = getattr(platform, 'value', platform)
+        return f'{value}:{video_id}'
+
+    def configure(self, ttl: int, max_entries: int) -> None:
+        """调整有效期与容量"""
+        with self._lock:
+            self._ttl = max(int(ttl or 0), 0)
+            self._max_entries = max(int(max_entries or 0), 1)
+            self._evict()
+
+    def _load(self) -> None:
+        """从磁盘加载缓存"""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if not isinstance(data, list):
+            return
+        with self._lock:
+            for item in data:
+                if isinstance(item, dict) and 'key' in item and 'data' in item:
+                    self._entries[item['key']] = item
+            self._evict()
+
+    def _mark_dirty(self) -> None:
+        """标记需要落盘并唤醒保存线程（需持有锁）"""
+        self._dirty = True
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run,
+                name='metadata-cache-saver',
+                daemon=True,
+            )
+            self._thread.start()
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            # 等待一段时间，把这期间的修改合并为一次写入
+            time.sleep(self.SAVE_DELAY)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """立即保存尚未落盘的修改（退出前调用）"""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._dirty = False
+                entries = list(self._entries.values())
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = self.path.with_name(self.path.name + '.tmp')
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entries, f, ensure_ascii=False)
+                temp_path.replace(self.path)
+            except (OSError, TypeError, ValueError):
+                pass
+
+    def _evict(self) -> bool:
+        """淘汰过期及超出容量的条目（需持有锁），返回是否有变化"""
+        changed = False
+        now = time.time()
+        for key in [key for key, item in self._entries.items() if self._expired(item, now)]:
+            del self._entries[key]
+            changed = True
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            changed = True
+        return changed
+
+    def _expired(self, item: dict, now: float) -> bool:
+        return now - item.get('saved_at', 0) > self._ttl
+
+    def get(self, platform, video_id: str) -> Optional[dict]:
+        """
+        读取缓存
+
+        Args:
+            platform: 平台
+            video_id: 视频 ID
+
+        Returns:
+            缓存的解析结果，不存在或已过期时返回 None
+        """
+        key = self.make_key(platform, video_id)
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or self._expired(item, time.time()):
+                if item is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return json.loads(json.dumps(item['data']))
+
+    def put(self, platform, video_id: str, data: dict) -> None:
+        """
+        写入缓存
+
+        Args:
+            platform: 平台
+            video_id: 视频 ID
+            data: 解析结果
+        """
+        if not self._ttl:
+            return
+        key = self.make_key(platform, video_id)
+        with self._lock:
+            self._entries[key] = {'key': key, 'saved_at': time.time(), 'data': data}
+            self._entries.move_to_end(key)
+            self._evict()
+            self._mark_dirty()
+
+    def invalidate(self, platform, video_id: str) -> None:
+        """删除单个条目"""
+        with self._lock:
+            if self._entries.pop(self.make_key(platform, video_id), None) is not None:
+                self._mark_dirty()
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._mark_dirty()
+
+    def get_stats(self) -> dict:
+        """获取缓存统计"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self._max_entries,
+                'ttl': self._ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+            }
+
+
+def info_expires_at(info: dict) -> Optional[float]:
+    """
+    从流地址中读取过期时间
+
+    YouTube 直链带 expire 参数，Bilibili 带 deadline 参数，取所有地址中最早的一个。
+
+    Args:
+        info: yt-dlp 提取结果
+
+    Returns:
+        过期时间戳，地址中没有过期参数时返回 None
+    """
+    urls = []
+    for fmt in [info] + list(info.get('formats') or []):
+        for key in ('url', 'manifest_url', 'fragment_base_url'):
+            value = fmt.get(key)
+            if isinstance(value, str) and value.startswith('http'):
+                urls.append(value)
+
+    expires = []
+    for url in urls:
+        parsed = urlparse(url)
+        query = parse_qs(parsed.query)
+        for name in ('expire', 'deadline'):
+            for value in query.get(name, []):
+                if value.isdigit():
+                    expires.append(float(value))
+        # 部分清单地址把参数写在路径里：/expire/1700000000/
+        match = re.search(r'/expire/(\d+)', parsed.path)
+        if match:
+            expires.append(float(match.group(1)))
+    return min(expires) if expires else None
+
+
+class InfoStore:
+    """
+    解析结果（info_dict）暂存
+
+    解析时的完整提取结果先保存在内存，同时写入精简后的 JSON 文件，
+    下载开始时直接交给 yt-dlp 处理，省去再次请求网页、播放器脚本和签名解算。
+    流地址即将过期的结果不会被返回。
+    """
+
+    # 体积大且下载用不到的字段
+    HEAVY_KEYS = ('automatic_captions', 'subtitles', 'heatmap', 'thumbnails')
+    # 距离过期不足该时间（秒）的结果视为失效
+    EXPIRY_MARGIN = 600
+    # 内存中保留的条目数
+    MEMORY_ENTRIES = 16
+
+    def __init__(self, directory: Path, max_age: int = 1800):
+        """
+        初始化暂存
+
+        Args:
+            directory: 信息文件目录
+            max_age: 地址中没有过期参数时，结果的最长使用时间（秒）
+        """
+        self.directory = Path(directory)
+        self.max_age = max(int(max_age or 0), 0)
+        self._lock = threading.Lock()
+        self._memory: 'OrderedDict[str, dict]' = OrderedDict()
+        self._prune()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / (re.sub(r'[^\w.-]', '_', key) + '.json')
+
+    def _fresh(self, entry: dict, now: float) -> bool:
+        expires_at = entry.get('expires_at')
+        if expires_at:
+            return expires_at - now > self.EXPIRY_MARGIN
+        return now - entry.get('saved_at', 0) < self.max_age
+
+    def _prune(self) -> None:
+        """删除已失效的信息文件"""
+        if not self.directory.exists():
+            return
+        now = time.time()
+        for path in self.directory.glob('*.json'):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+                if self._fresh(entry, now):
+                    continue
+            except (OSError, json.JSONDecodeError, AttributeError):
+                pass
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def put(self, platform, video_id: str, info: dict) -> None:
+        """
+        保存提取结果
+
+        Args:
+            platform: 平台
+            video_id: 视频 ID
+            info: yt-dlp 提取结果（需已经过 sanitize_info 处理，可 JSON 序列化）
+        """
+        if not info or not video_id:
+            return
+        key = MetadataCache.make_key(platform, video_id)
+        compact = {k: v for k, v in info.items() if k not in self.HEAVY_KEYS}
+        entry = {
+            'key': key,
+            'saved_at': time.time(),
+            'expires_at': info_expires_at(compact),
+            'info': compact,
+        }
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                path = self._path(key)
+                temp_path = path.with_name(path.name + '.tmp')
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f, ensure_ascii=False, separators=(',', ':'))
+                temp_path.replace(path)
+            except (OSError, TypeError, ValueError):
+                pass
+
+    def get(self, platform, video_id: str) -> Optional[dict]:
+        """
+        读取仍然有效的提取结果
+
+        Args:
+            platform: 平台
+            video_id: 视频 ID
+
+        Returns:
+            提取结果副本，不存在或流地址已过期时返回 None
+        """
+        if not video_id:
+            return None
+        key = MetadataCache.make_key(platform, video_id)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                try:
+                    with open(self._path(key), 'r', encoding='utf-8') as f:
+                        entry = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    return None
+                self._memory[key] = entry
+            self._memory.move_to_end(key)
+            if not self._fresh(entry, now):
+                self._discard(key)
+                return None
+            return copy.deepcopy(entry['info'])
+
+    def _discard(self, key: str) -> None:
+        """删除条目（需持有锁）"""
+        self._memory.pop(key, None)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def discard(self, platform, video_id: str) -> None:
+        """删除条目（流地址已失效时调用）"""
+        if not video_id:
+            return
+        with self._lock:
+            self._discard(MetadataCache.make_key(platform, video_id))
+
+
+# 全局缓存实例
+_cache_instance: Optional[MetadataCache] = None
+_info_store_instance: Optional[InfoStore] = None
+
+
+def get_metadata_cache() -> MetadataCache:
+    """获取全局元数据缓存实例"""
+    global _cache_instance
+    if _cache_instance is None:
+        config = get_config()
+        _cache_instance = MetadataCache(
+            config.metadata_cache_path,
+            ttl=config.get('metadata_cache_ttl', 21600),
+            max_entries=config.get('metadata_cache_size', 200),
+        )
+    return _cache_instance
+
+
+def get_info_store() -> InfoStore:
+    """获取全局解析结果暂存实例"""
+    global _info_store_instance
+    if _info_store_instance is None:
+        config = get_config()
+        _info_store_instance = InfoStore(
+            config.info_cache_dir,
+            max_age=config.get('info_reuse_max_age', 1800),
+        )
+    return _info_store_instance
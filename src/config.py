@@ -21,6 +21,50 @@ class Config:
         'audio_extract_format': 'm4a',    # m4a, mp3, flac
         'language': 'zh-Hans',            # zh-Hans, zh-Hant, en
         'max_concurrent_downloads': 3,
+        'adaptive_concurrency': False,    # 根据实测吞吐自动调整并发数
+        'adaptive_min_concurrent': 1,
+        'adaptive_max_concurrent': 8,
+        'parallel_stream_download': False,  # 并行下载音视频流后再合并
+        # DASH/HLS 分片并发数与 HTTP 分块大小（字节，0 表示不分块）
+        'concurrent_fragments': {
+            'youtube': 4,
+            'twitter': 1,
+            'bilibili': 4,
+        },
+        'concurrent_fragments_auto': False,  # 根据实测分片耗时自动选择并发
+        'http_chunk_size': {
+            'youtube': 10485760,
+            'twitter': 0,
+            'bilibili': 0,
+        },
+        # 渐进式单文件的多连接分段下载
+        'segmented_download': False,
+        'segmented_connections': 4,
+        'segmented_min_size': 33554432,
+        # 带宽限制（字节/秒，0 表示不限速），修改后立即生效
+        'global_rate_limit': 0,
+        'per_task_rate_limit': 0,
+        # 各平台独立的并发上限（0 表示只受全局上限约束）
+        'platform_concurrency': {
+            'youtube': 3,
+            'twitter': 2,
+            'bilibili': 2,
+        },
+        # 平台间加权轮转出队的权重
+        'platform_weights': {
+            'youtube': 1,
+            'twitter': 1,
+            'bilibili': 1,
+        },
+        # 解析结果缓存：有效期（秒，0 表示不缓存）与最大条目数
+        'metadata_cache_ttl': 21600,
+        'metadata_cache_size': 200,
+        'parse_concurrency': 4,           # 批量解析的并行数
+        # 下载时复用解析阶段的提取结果，流地址无过期参数时的最长复用时间（秒）
+        'reuse_extracted_info': True,
+        'info_reuse_max_age': 1800,
+        'stall_timeout': 60,              # 传输无进展超过该时间（秒）后自动重连，0 表示关闭
+        'throttle_detection': True,       # 持续远低于正常速度时重新获取流地址
         'launch_at_startup': False,
         'desktop_notifications': True,
         'dark_mode': False,
@@ -98,6 +142,26 @@ class Config:
         """获取历史记录数据库路径"""
         return self.config_path.parent / 'history.db'
 
+    @property
+    def metadata_cache_path(self) -> Path:
+        """获取解析结果缓存路径"""
+        return self.config_path.parent / 'metadata_cache.json'
+
+    @property
+    def info_cache_dir(self) -> Path:
+        """获取提取结果暂存目录"""
+        return self.config_path.parent / 'info'
+
+    @property
+    def cookies_dir(self) -> Path:
+        """获取导出的浏览器 cookies 目录"""
+        return self.config_path.parent / 'cookies'
+
+    @property
+    def log_path(self) -> Path:
+        """获取运行日志路径"""
+        return self.config_path.parent / 'grabfrom.log'
+
 
 # 全局配置实例
 _config_instance: Optional[Config] = None
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+Cookies 提供模块
+一次性读取浏览器 cookies，按平台记住可用来源，供解析与下载共用
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import yt_dlp
+
+from src.config import get_config
+
+logger = logging.getLogger(__name__)
+
+
+class CookieProvider:
+    """
+    浏览器 cookies 提供者
+
+    浏览器按需逐个读取，找到包含所需平台 cookies 的浏览器即停止。
+    只保留支持平台域名下的 cookies，导出为 Netscape 格式文件（仅当前用户可读），
+    yt-dlp 通过 cookiefile 加载，不必每次创建实例都重新解密浏览器数据库。
+    每个平台记住上次成功的来源并优先使用，因此一次失败只需要一次带 cookies
+    的重试。已读取的浏览器在后台定期刷新。
+    """
+
+    BROWSERS = ('chrome', 'edge', 'brave', 'firefox', 'safari')
+    # 各平台 cookies 所在的域名
+    PLATFORM_DOMAINS = {
+        'youtube': ('youtube.com', 'google.com'),
+        'twitter': ('x.com', 'twitter.com'),
+        'bilibili': ('bilibili.com',),
+    }
+    # 后台刷新间隔（秒）
+    REFRESH_INTERVAL = 1800
+
+    def __init__(self, directory: Path):
+        """
+        初始化提供者
+
+        Args:
+            directory: 导出的 cookies 文件与来源记录所在目录
+        """
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # 已尝试读取过的浏览器（无论是否成功）
+        self._attempted = set()
+        # 浏览器 -> 各平台是否有 cookies
+        self._coverage: Dict[str, Dict[str, bool]] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._preferred: Dict[str, str] = {}
+        self._failures: Dict[str, Dict[str, int]] = {}
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._load_preferred()
+        self._remove_exports()
+
+    def _remove_exports(self) -> None:
+        """删除上次运行导出的 cookies 文件，本次按需重新读取"""
+        if not self.directory.exists():
+            return
+        for path in self.directory.glob('*.txt'):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    @property
+    def _sources_path(self) -> Path:
+        return self.directory / 'sources.json'
+
+    def _jar_path(self, browser: str) -> Path:
+        return self.directory / f'{browser}.txt'
+
+    def _load_preferred(self) -> None:
+        try:
+            with open(self._sources_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if isinstance(data, dict):
+            self._preferred = {
+                str(platform): str(browser)
+                for platform, browser in data.items()
+                if browser in self.BROWSERS
+            }
+
+    def _save_preferred(self) -> None:
+        """保存各平台可用来源（需持有锁）"""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self._sources_path, 'w', encoding='utf-8') as f:
+                json.dump(self._preferred, f)
+        except OSError:
+            pass
+
+    @classmethod
+    def _cookie_platform(cls, domain: str) -> Optional[str]:
+        """cookie 域名所属的平台，不属于支持的平台时返回 None"""
+        domain = domain.lstrip('.').lower()
+        for platform, suffixes in cls.PLATFORM_DOMAINS.items():
+            if any(domain == suffix or domain.endswith('.' + suffix) for suffix in suffixes):
+                return platform
+        return None
+
+    def _read_browser(self, browser: str) -> Optional[Dict[str, bool]]:
+        """读取单个浏览器的 cookies 并导出，返回各平台是否有 cookies"""
+        try:
+            jar = yt_dlp.cookies.extract_cookies_from_browser(browser)
+        except Exception as e:
+            logger.debug('reading %s cookies failed: %s', browser, e)
+            return None
+
+        # 只导出支持平台的 cookies，其他站点的登录状态不落盘
+        filtered = yt_dlp.cookies.YoutubeDLCookieJar()
+        coverage = {platform: False for platform in self.PLATFORM_DOMAINS}
+        for cookie in jar:
+            platform = self._cookie_platform(cookie.domain)
+            if platform:
+                filtered.set_cookie(cookie)
+                coverage[platform] = True
+        del jar
+        if not len(filtered):
+            return None
+
+        path = self._jar_path(browser)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(path.name + '.tmp')
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            os.close(fd)
+            filtered.save(str(temp_path), ignore_discard=True, ignore_expires=True)
+            temp_path.replace(path)
+        except OSError as e:
+            logger.debug('saving %s cookies failed: %s', browser, e)
+            return None
+        return coverage
+
+    def _refresh(self, browsers) -> None:
+        for browser in browsers:
+            coverage = self._read_browser(browser)
+            with self._lock:
+                self._attempted.add(browser)
+                if coverage is None:
+                    self._coverage.pop(browser, None)
+                    self._loaded_at.pop(browser, None)
+                else:
+                    self._coverage[browser] = coverage
+                    self._loaded_at[browser] = time.time()
+
+    def _load(self, browser: str) -> None:
+        """首次需要时读取单个浏览器（只读一次），并启动后台刷新"""
+        with self._load_lock:
+            if browser in self._attempted:
+                return
+            self._refresh([browser])
+            if self._refresh_thread is None:
+                self._refresh_thread = threading.Thread(
+                    target=self._refresh_loop,
+                    name='cookie-refresh',
+                    daemon=True,
+                )
+                self._refresh_thread.start()
+
+    def _refresh_loop(self) -> None:
+        while True:
+            time.sleep(self.REFRESH_INTERVAL)
+            with self._lock:
+                browsers = list(self._loaded_at)
+            with self._load_lock:
+                self._refresh(browsers)
+
+    def _pick(self, platform: str) -> Optional[str]:
+        """在已读取的浏览器中选择来源（需持有锁）"""
+        preferred = self._preferred.get(platform)
+        if preferred and self._coverage.get(preferred, {}).get(platform):
+            return preferred
+        failures = self._failures.get(platform, {})
+        candidates = [
+            browser for browser in self.BROWSERS
+            if self._coverage.get(browser, {}).get(platform)
+        ]
+        if not candidates:
+            return None
+        # 失败次数少的来源优先，次数相同时按浏览器顺序
+        return min(candidates, key=lambda browser: failures.get(browser, 0))
+
+    def best_source(self, platform: str) -> Optional[str]:
+        """
+        选择平台的 cookies 来源
+
+        Args:
+            platform: 平台
+
+        Returns:
+            浏览器名称，没有可用 cookies 时返回 None
+        """
+        preferred = self._preferred.get(platform)
+        if preferred:
+            self._load(preferred)
+        # 逐个读取尚未读取的浏览器，直到有一个包含该平台的 cookies 且没有失败记录；
+        # 只有失败过的来源时，读完所有浏览器后再退回失败次数最少的来源
+        fallback = None
+        for browser in (None,) + self.BROWSERS:
+            if browser is not None:
+                if browser in self._attempted:
+                    continue
+                self._load(browser)
+            with self._lock:
+                source = self._pick(platform)
+                failed = source is not None and self._failures.get(platform, {}).get(source, 0) > 0
+            if source and not failed:
+                return source
+            fallback = source or fallback
+        return fallback
+
+    def ydl_options(self, source: Optional[str]) -> dict:
+        """
+        生成使用指定来源 cookies 的 yt-dlp 选项
+
+        Args:
+            source: 浏览器名称
+
+        Returns:
+            需要合并到 yt-dlp 选项中的字典
+        """
+        if not source:
+            return {}
+        path = self._jar_path(source)
+        if path.exists():
+            return {'cookiefile': str(path)}
+        return {'cookiesfrombrowser': (source, None, None, None)}
+
+    def mark_success(self, platform: str, source: str) -> None:
+        """记录来源对平台可用"""
+        with self._lock:
+            self._failures.get(platform, {}).pop(source, None)
+            if self._preferred.get(platform) != source:
+                self._preferred[platform] = source
+                self._save_preferred()
+
+    def mark_failure(self, platform: str, source: str) -> None:
+        """记录来源对平台失败，下次优先尝试其他来源"""
+        with self._lock:
+            failures = self._failures.setdefault(platform, {})
+            failures[source] = failures.get(source, 0) + 1
+            if self._preferred.get(platform) == source:
+                del self._preferred[platform]
+                self._save_preferred()
+
+    def get_stats(self) -> dict:
+        """获取来源统计"""
+        with self._lock:
+            return {
+                'loaded': sorted(self._loaded_at),
+                'preferred': dict(self._preferred),
+                'failures': {key: dict(value) for key, value in self._failures.items()},
+            }
+
+
+# 全局 cookies 提供者
+_provider_instance: Optional[CookieProvider] = None
+
+
+def get_cookie_provider() -> CookieProvider:
+    """获取全局 cookies 提供者"""
+    global _provider_instance
+    if _provider_instance is None:
+        _provider_instance = CookieProvider(get_config().cookies_dir)
+    return _provider_instance
@@ -4,12 +4,15 @@
 实现下载任务管理、队列控制、进度追踪
 """
 
+import copy
+import logging
 import uuid
 import threading
 import time
 import shutil
 import subprocess
 import json
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional, Callable, Dict
 from dataclasses import dataclass, field
@@ -21,6 +24,27 @@ from src.config import get_config
 from src.strings import Messages
 from src.utils import sanitize_filename, get_unique_filepath, format_size, format_speed, format_eta
 from src.history import get_history_store
+from src.parser import Platform, get_parser
+from src.scheduler import DownloadScheduler, AdaptiveConcurrencyController
+from src.ratelimit import TokenBucket
+from src.tuning import FragmentTuner
+from src.segmented import SegmentedDownloader, RangeNotSupported
+from src.progress import ProgressDispatcher
+from src.cache import get_info_store
+from src.ydlpool import get_ydl_pool
+from src.cookies import get_cookie_provider
+from src.strategy import (
+    ERROR_FORBIDDEN,
+    STRATEGY_COOKIES,
+    STRATEGY_FALLBACK_FORMAT,
+    STRATEGY_REFRESH,
+    get_recovery_strategies,
+)
+from src.events import EventBus, EventType, TaskEvent
+from src.metrics import MetricsSink
+from src.watchdog import TransferWatchdog
+
+logger = logging.getLogger(__name__)
 
 
 class TaskStatus(Enum):
@@ -75,6 +99,8 @@ class DownloadTask:
     has_video: bool = True
     format_ext: str = ""
     history_id: Optional[int] = None
+    priority: int = 0  # 数值越大越先调度
+    rate_limit: int = 0  # 单任务限速（字节/秒），0 表示使用全局默认
     audio_path: Optional[Path] = None
     output_path: Optional[Path] = None
     status: TaskStatus = TaskStatus.PENDING
@@ -83,10 +109,14 @@ class DownloadTask:
     error_message: str = ""
     created_at: float = field(default_factory=time.time)
     completed_at: Optional[float] = None
+    stall_count: int = 0  # 传输停滞后自动重连的次数
+    throttle_count: int = 0  # 传输被限速后重新获取流地址的次数
+    version: int = 0  # 最近一次变更的全局版本号
 
     def to_dict(self) -> dict:
         return {
             'task_id': self.task_id,
+            'version': self.version,
             'history_id': self.history_id,
             'url': self.url,
             'title': self.title,
@@ -100,6 +130,8 @@ class DownloadTask:
             'has_audio': self.has_audio,
             'has_video': self.has_video,
             'format_ext': self.format_ext,
+            'priority': self.priority,
+            'rate_limit': self.rate_limit,
             'audio_path': str(self.audio_path) if self.audio_path else None,
             'output_path': str(self.output_path) if self.output_path else None,
             'status': self.status.value,
@@ -108,12 +140,26 @@ class DownloadTask:
             'error_message': self.error_message,
             'created_at': self.created_at,
             'completed_at': self.completed_at,
+            'stall_count': self.stall_count,
+            'throttle_count': self.throttle_count,
         }
 
 
 class DownloadManager:
     """下载管理器"""
 
+    # 变更查询保留的已移除任务记录数
+    MAX_TOMBSTONES = 1000
+    # 被限速后依次换用的 YouTube 播放器客户端
+    PLAYER_CLIENTS = (
+        ['android', 'web'],
+        ['ios', 'web'],
+        ['tv', 'web'],
+        ['web_safari'],
+    )
+    # 单个任务因限速重新获取流地址的次数上限
+    MAX_THROTTLE_RESTARTS = 3
+
     def __init__(self, max_concurrent: int = 3):
         """
         初始化下载管理器
@@ -122,17 +168,51 @@ class DownloadManager:
             max_concurrent: 最大并发下载数
         """
         self._tasks: Dict[str, DownloadTask] = {}
-        self._threads: Dict[str, threading.Thread] = {}
         self._pause_events: Dict[str, threading.Event] = {}
         self._cancel_flags: Dict[str, bool] = {}
-        self._semaphore = threading.Semaphore(max_concurrent)
+        self._output_files: Dict[str, Path] = {}
+        # 任务 -> {(format_id, 内容长度): .part 文件路径}，供重试时复用
+        self._partials: Dict[str, Dict[tuple, str]] = {}
+        self._scheduler = DownloadScheduler(self._download_worker, max_workers=max_concurrent)
+        self._adaptive = AdaptiveConcurrencyController(self._scheduler, self._sample_speeds)
+        self._global_bucket = TokenBucket()
+        self._task_buckets: Dict[str, TokenBucket] = {}
+        self._default_task_rate = 0
+        self._fragment_tuner = FragmentTuner()
+        self._recovery = get_recovery_strategies()
+        # 停滞或限速的传输：任务 ID -> 中止原因，进度钩子据此中止传输后重新排队续传
+        self._restart_requests: Dict[str, str] = {}
+        # 已中止、等待重新开始的传输：任务 ID -> 中止原因
+        self._resume_reasons: Dict[str, str] = {}
+        self._watchdog = TransferWatchdog(self._on_stall, self._on_throttle)
         self._lock = threading.Lock()
+        self._version = 0
+        # 版本号只在本进程内有效，重启后版本号从 0 重新计数，调用方凭纪元识别
+        self._epoch = uuid.uuid4().hex
+        # 已移除任务的墓碑：task_id -> 移除时的版本号，只保留最近一部分
+        self._tombstones: 'OrderedDict[str, int]' = OrderedDict()
+        self._tombstone_floor = 0
         self._progress_callback: Optional[Callable] = None
+        self._dispatcher = ProgressDispatcher(self.get_task, self._deliver_progress)
         self._history = get_history_store()
+        self._notified_stages: Dict[str, str] = {}
+        self._metrics = MetricsSink()
+        # 历史记录、指标与前端推送各自在订阅线程中消费事件，不占用下载线程
+        self._events = EventBus()
+        self._events.subscribe(
+            'history',
+            self._record_history,
+            (EventType.QUEUED, EventType.FINISHED, EventType.FAILED),
+        )
+        self._events.subscribe('metrics', self._metrics.handle, MetricsSink.EVENT_TYPES)
+        self._events.subscribe('ui', self._forward_progress)
 
     def _register_task(self, task: DownloadTask) -> None:
         """注册任务到管理器内部"""
         with self._lock:
+            self._version += 1
+            task.version = self._version
+            self._tombstones.pop(task.task_id, None)
             self._tasks[task.task_id] = task
             pause_event = self._pause_events.get(task.task_id)
             if not pause_event:
@@ -144,18 +224,270 @@ class DownloadManager:
                 pause_event.set()
             self._cancel_flags.setdefault(task.task_id, False)
 
+    @staticmethod
+    def _platform_key(task: DownloadTask) -> str:
+        """任务所属的调度分组（平台）"""
+        try:
+            return Platform(task.platform).value
+        except ValueError:
+            platform, _ = get_parser().identify_platform(task.url)
+            return platform.value
+
+    def _enqueue_task(self, task: DownloadTask) -> None:
+        """将任务提交到对应平台的等待队列"""
+        self._scheduler.submit(task.task_id, self._platform_key(task), task.priority)
+
+    @staticmethod
+    def _platform_setting(key: str, platform: str, default: int) -> int:
+        """读取按平台区分的整数配置（也接受对所有平台生效的单个值）"""
+        value = get_config().get(key, default)
+        if isinstance(value, dict):
+            value = value.get(platform, default)
+        try:
+            return int(value or 0)
+        except (TypeError, ValueError):
+            return default
+
+    def _fragment_concurrency(self, platform: str) -> int:
+        """DASH/HLS 分片并发数"""
+        configured = max(self._platform_setting('concurrent_fragments', platform, 1), 1)
+        if get_config().get('concurrent_fragments_auto', False):
+            return self._fragment_tuner.recommend(platform, configured)
+        return configured
+
+    def set_max_concurrent(self, max_concurrent: int) -> None:
+        """运行时调整最大并发下载数"""
+        self._scheduler.set_max_workers(max_concurrent)
+
+    def _sample_speeds(self) -> list:
+        """采样所有下载中任务的当前速度"""
+        with self._lock:
+            return [
+                task.progress.speed
+                for task in self._tasks.values()
+                if task.status == TaskStatus.DOWNLOADING
+            ]
+
+    def _task_bucket(self, task: DownloadTask) -> TokenBucket:
+        """获取任务的限速桶"""
+        rate = task.rate_limit or self._default_task_rate
+        bucket = self._task_buckets.get(task.task_id)
+        if bucket is None:
+            bucket = TokenBucket(rate)
+            self._task_buckets[task.task_id] = bucket
+        elif bucket.rate != rate:
+            bucket.set_rate(rate)
+        return bucket
+
+    def _throttle(self, task: DownloadTask, amount: int) -> None:
+        """按单任务与全局带宽预算限速（在进度钩子中阻塞下载线程）"""
+        if amount <= 0:
+            return
+
+        def should_abort() -> bool:
+            return (
+                self._transfer_interrupted(task.task_id)
+                or self._cancel_flags.get(task.task_id, False)
+            )
+
+        self._task_bucket(task).consume(amount, should_abort)
+        self._global_bucket.consume(amount, should_abort)
+
+    def set_task_rate_limit(self, task_id: str, rate_limit: int) -> bool:
+        """设置单任务限速（字节/秒），0 表示使用全局默认"""
+        task = self._tasks.get(task_id)
+        if not task:
+            return False
+        task.rate_limit = max(int(rate_limit or 0), 0)
+        self._task_bucket(task)
+        self._notify_progress(task_id)
+        return True
+
+    def apply_config(self) -> None:
+        """将当前配置应用到运行中的下载管理器"""
+        config = get_config()
+        try:
+            max_concurrent = int(config.get('max_concurrent_downloads', 3) or 3)
+        except (TypeError, ValueError):
+            max_concurrent = 3
+
+        try:
+            self._global_bucket.set_rate(int(config.get('global_rate_limit', 0) or 0))
+            self._default_task_rate = max(int(config.get('per_task_rate_limit', 0) or 0), 0)
+        except (TypeError, ValueError):
+            pass
+        for task_id, task in list(self._tasks.items()):
+            if task_id in self._task_buckets:
+                self._task_bucket(task)
+
+        try:
+            self._scheduler.set_group_limits(config.get('platform_concurrency', {}) or {})
+            self._scheduler.set_group_weights(config.get('platform_weights', {}) or {})
+        except (TypeError, ValueError, AttributeError):
+            pass
+
+        self._watchdog.configure(
+            config.get('stall_timeout', 60),
+            config.get('throttle_detection', True),
+        )
+
+        if config.get('adaptive_concurrency', False):
+            # 自动模式下由控制器决定并发数，手动值只作为起点
+            try:
+                self._adaptive.set_bounds(
+                    int(config.get('adaptive_min_concurrent', 1) or 1),
+                    int(config.get('adaptive_max_concurrent', 8) or 8),
+                )
+            except (TypeError, ValueError):
+                pass
+            if not self._adaptive.running:
+                self.set_max_concurrent(max_concurrent)
+                self._adaptive.start()
+            return
+
+        self._adaptive.stop()
+        self.set_max_concurrent(max_concurrent)
+
     def set_progress_callback(self, callback: Callable):
-        """设置进度回调函数"""
+        """
+        设置进度回调函数
+
+        回调在分发线程中调用，参数为一帧批量增量，格式见 ProgressDispatcher。
+        """
         self._progress_callback = callback
 
     def _notify_progress(self, task_id: str):
-        """通知进度更新"""
-        if self._progress_callback and task_id in self._tasks:
-            task = self._tasks[task_id]
-            self._progress_callback(task.to_dict())
+        """通知进度更新：递增版本号并标记，由分发线程合并后推送"""
+        task = self._tasks.get(task_id)
+        if not task:
+            return
+        with self._lock:
+            self._version += 1
+            task.version = self._version
+        if self._notified_stages.get(task_id) != task.stage:
+            self._notified_stages[task_id] = task.stage
+            self._emit(EventType.STAGE_CHANGED, task, stage=task.stage)
+        self._events.publish(
+            EventType.PROGRESS,
+            task_id,
+            downloaded_bytes=task.progress.downloaded_bytes,
+            speed=task.progress.speed,
+        )
+
+    @property
+    def events(self) -> EventBus:
+        """任务事件总线，外部可订阅生命周期与进度事件"""
+        return self._events
+
+    def _emit(self, event_type: EventType, task: DownloadTask, **data) -> None:
+        """发布携带任务快照的事件，订阅者异步处理时不受后续修改影响"""
+        snapshot = copy.copy(task)
+        snapshot.progress = copy.copy(task.progress)
+        self._events.publish(event_type, task.task_id, snapshot, **data)
+
+    def _record_history(self, event: TaskEvent) -> None:
+        """历史记录订阅者"""
+        if event.type == EventType.QUEUED:
+            self._history.record_start(event.task)
+        else:
+            self._history.record_finish(event.task)
+
+    def _forward_progress(self, event: TaskEvent) -> None:
+        """前端推送订阅者：标记任务，由分发器合并后推送"""
+        if self._progress_callback:
+            self._dispatcher.mark(event.task_id)
+
+    def _bury_task(self, task_id: str) -> None:
+        """记录任务移除，供变更查询返回（需持有锁）"""
+        self._version += 1
+        self._tombstones[task_id] = self._version
+        self._tombstones.move_to_end(task_id)
+        while len(self._tombstones) > self.MAX_TOMBSTONES:
+            _, version = self._tombstones.popitem(last=False)
+            self._tombstone_floor = version
+
+    def _deliver_progress(self, frame: dict) -> None:
+        """在分发线程中调用进度回调"""
+        callback = self._progress_callback
+        if callback:
+            callback(frame)
+
+    def _pause_requested(self, task_id: str) -> bool:
+        """任务是否被请求暂停"""
+        pause_event = self._pause_events.get(task_id)
+        return pause_event is not None and not pause_event.is_set()
+
+    def _transfer_interrupted(self, task_id: str) -> bool:
+        """传输是否需要中止（暂停，或停滞后重连）"""
+        return self._pause_requested(task_id) or task_id in self._restart_requests
+
+    def _attempt_interrupted(self, task_id: str) -> bool:
+        """下载尝试是否因暂停、取消或重连而中止（而不是真正失败）"""
+        return self._transfer_interrupted(task_id) or self._cancel_flags.get(task_id, False)
+
+    def _on_stall(self, task_id: str) -> bool:
+        """传输停滞：请求中止并重新排队，从 .part 文件续传（在监控线程中调用）"""
+        task = self._tasks.get(task_id)
+        if (
+            not task
+            or task.status != TaskStatus.DOWNLOADING
+            or self._pause_requested(task_id)
+            or self._cancel_flags.get(task_id, False)
+        ):
+            return False
+        task.stall_count += 1
+        self._restart_requests[task_id] = Messages.DOWNLOAD_STALLED
+        self._notify_progress(task_id)
+        return True
+
+    def _on_throttle(self, task_id: str) -> bool:
+        """
+        传输被限速：丢弃当前流地址，换用下一个播放器客户端重新提取，
+        沿用停滞重连的中止与重新排队流程，从 .part 文件续传（在监控线程中调用）
+        """
+        task = self._tasks.get(task_id)
+        if (
+            not task
+            or task.status != TaskStatus.DOWNLOADING
+            or task.throttle_count >= self.MAX_THROTTLE_RESTARTS
+            or self._pause_requested(task_id)
+            or self._cancel_flags.get(task_id, False)
+        ):
+            return False
+        # 本地限速生效时速度低是预期行为
+        if task.rate_limit or self._default_task_rate or self._global_bucket.rate:
+            return False
+        task.throttle_count += 1
+        self._forget_info(task)
+        self._restart_requests[task_id] = Messages.DOWNLOAD_THROTTLED
+        self._notify_progress(task_id)
+        return True
+
+    def _on_transfer_paused(self, task: DownloadTask) -> None:
+        """传输因暂停或重连而中止后的收尾，释放调度槽位"""
+        self._watchdog.forget(task.task_id)
+        # 中止请求已生效，原因留给下一次开始时使用
+        reason = self._restart_requests.pop(task.task_id, None)
+        if reason:
+            self._resume_reasons[task.task_id] = reason
+        if self._pause_requested(task.task_id):
+            task.status = TaskStatus.PAUSED
+            task.stage = TaskStatus.PAUSED.value
+        else:
+            # 中止期间已被恢复，执行结束后重新排队
+            task.status = TaskStatus.PENDING
+            task.stage = TaskStatus.PENDING.value
+            self._enqueue_task(task)
+        task.progress.speed = 0
+        task.progress.eta = None
+        self._notify_progress(task.task_id)
 
     def _resolve_output_path(self, task: DownloadTask, download_path: Path, filename: str) -> Path:
         """恢复或生成输出路径"""
+        # 暂停后恢复时沿用首次的输出模板，保证命中同一个 .part 文件
+        planned = self._output_files.get(task.task_id)
+        if planned:
+            return planned
         if task.output_path:
             candidate = Path(task.output_path)
             part_candidate = candidate.with_name(candidate.name + ".part")
@@ -183,6 +515,18 @@ class DownloadManager:
     def _needs_extract(self, task: DownloadTask) -> bool:
         return task.output_format in ['mp3', 'm4a', 'flac']
 
+    def _use_segmented(self, task: DownloadTask, ffmpeg_available: bool) -> bool:
+        """是否尝试多连接分段下载（仅适用于无需合并/转码的单文件格式）"""
+        if not get_config().get('segmented_download', False):
+            return False
+        return not self._needs_merge(task, ffmpeg_available) and not self._needs_extract(task)
+
+    def _use_parallel_streams(self, task: DownloadTask, ffmpeg_available: bool) -> bool:
+        """是否并行下载视频流和音频流"""
+        if not get_config().get('parallel_stream_download', False):
+            return False
+        return self._needs_merge(task, ffmpeg_available) and not self._needs_extract(task)
+
     def _calculate_overall_percent(
         self,
         task: DownloadTask,
@@ -206,6 +550,9 @@ class DownloadManager:
             return download_percent
 
         if needs_merge:
+            if stage == 'downloading_streams':
+                # 音视频并行下载时按两路合计字节数计算
+                return min(download_percent * 0.9, 90.0)
             if stage == 'downloading_video':
                 return min(download_percent * 0.45, 45.0)
             if stage == 'downloading_audio':
@@ -258,6 +605,22 @@ class DownloadManager:
         except (TypeError, ValueError):
             created_at = time.time()
 
+        try:
+            priority = int(data.get('priority', 0) or 0)
+        except (TypeError, ValueError):
+            priority = 0
+
+        try:
+            rate_limit = int(data.get('rate_limit', 0) or 0)
+        except (TypeError, ValueError):
+            rate_limit = 0
+
+        try:
+            stall_count = int(data.get('stall_count', 0) or 0)
+            throttle_count = int(data.get('throttle_count', 0) or 0)
+        except (TypeError, ValueError):
+            stall_count = throttle_count = 0
+
         task_id_value = data.get('task_id')
         task_id = str(task_id_value) if task_id_value else str(uuid.uuid4())[:8]
 
@@ -276,6 +639,8 @@ class DownloadManager:
             has_audio=bool(data.get('has_audio', True)),
             has_video=bool(data.get('has_video', True)),
             format_ext=data.get('format_ext', ''),
+            priority=priority,
+            rate_limit=rate_limit,
             audio_path=Path(data['audio_path']) if data.get('audio_path') else None,
             output_path=Path(data['output_path']) if data.get('output_path') else None,
             status=status,
@@ -284,6 +649,8 @@ class DownloadManager:
             error_message=data.get('error_message', ''),
             created_at=created_at,
             completed_at=data.get('completed_at'),
+            stall_count=stall_count,
+            throttle_count=throttle_count,
         )
 
         return task
@@ -339,6 +706,7 @@ class DownloadManager:
         has_video: bool = True,
         format_ext: str = "",
         history_id: Optional[int] = None,
+        priority: int = 0,
     ) -> str:
         """
         创建下载任务
@@ -349,6 +717,7 @@ class DownloadManager:
             output_format: 输出格式
             title: 视频标题
             thumbnail: 缩略图 URL
+            priority: 调度优先级，数值越大越先开始
 
         Returns:
             任务 ID
@@ -370,145 +739,209 @@ class DownloadManager:
             has_audio=has_audio,
             has_video=has_video,
             format_ext=format_ext,
+            priority=int(priority or 0),
             stage=TaskStatus.PENDING.value,
         )
 
         self._register_task(task)
-        self._history.record_start(task)
+        self._emit(EventType.QUEUED, task)
 
-        # 启动下载线程
-        thread = threading.Thread(
-            target=self._download_worker,
-            args=(task_id,),
-            daemon=True
-        )
-        self._threads[task_id] = thread
-        thread.start()
+        # 加入所属平台的调度队列，由工作线程池执行
+        self._enqueue_task(task)
 
         return task_id
 
     def _download_worker(self, task_id: str):
-        """下载工作线程"""
-        # 等待获取信号量
-        self._semaphore.acquire()
-
+        """执行下载任务（运行在调度器工作线程中），未处理的异常按下载失败收尾"""
         try:
-            task = self._tasks.get(task_id)
-            if not task:
-                return
+            self._run_download(task_id)
+        except Exception as e:
+            logger.exception('download worker failed for %s', task_id)
+            self._fail_task(task_id, e)
 
-            # 检查是否已取消
-            if self._cancel_flags.get(task_id, False):
-                task.status = TaskStatus.CANCELLED
-                self._notify_progress(task_id)
-                self._history.record_finish(task)
-                return
+    def _fail_task(self, task_id: str, error: Exception) -> None:
+        """下载流程意外中断时将任务标记为失败（已取消的任务保持取消）"""
+        task = self._tasks.get(task_id)
+        if not task:
+            return
+        self._watchdog.forget(task_id)
+        self._restart_requests.pop(task_id, None)
+        if self._cancel_flags.get(task_id, False):
+            task.status = TaskStatus.CANCELLED
+            task.stage = TaskStatus.CANCELLED.value
+        else:
+            task.status = TaskStatus.FAILED
+            task.stage = TaskStatus.FAILED.value
+            task.error_message = Messages.DOWNLOAD_FAILED.format(error=str(error))
+            self._emit(EventType.FAILED, task, error=task.error_message)
+            self._adaptive.record_error()
+        self._notify_progress(task_id)
 
-            task.status = TaskStatus.DOWNLOADING
-            task.stage = TaskStatus.DOWNLOADING.value
+    def _run_download(self, task_id: str):
+        """下载任务主流程"""
+        task = self._tasks.get(task_id)
+        if not task:
+            return
+
+        # 检查是否已取消
+        # 取消事件已由 cancel_task 发布
+        if self._cancel_flags.get(task_id, False):
+            task.status = TaskStatus.CANCELLED
             self._notify_progress(task_id)
+            return
 
-            config = get_config()
-            download_path = config.download_path
+        # 排队期间被暂停
+        if self._pause_requested(task_id):
+            return
 
-            # 构建安全的文件名
-            safe_title = sanitize_filename(task.title)
-            filename = f"{safe_title}.{task.output_format}"
-            output_file = self._resolve_output_path(task, download_path, filename)
+        self._restart_requests.pop(task_id, None)
+        restart_reason = self._resume_reasons.pop(task_id, None)
+        task.status = TaskStatus.DOWNLOADING
+        task.stage = TaskStatus.DOWNLOADING.value
+        self._emit(EventType.STARTED, task)
+        self._notify_progress(task_id)
+
+        config = get_config()
+        download_path = config.download_path
+
+        # 构建安全的文件名
+        safe_title = sanitize_filename(task.title)
+        filename = f"{safe_title}.{task.output_format}"
+        output_file = self._resolve_output_path(task, download_path, filename)
+        task.output_path = output_file
+
+        # 没有 ffmpeg 时，避免输出扩展名与实际格式不一致
+        ffmpeg_available = shutil.which('ffmpeg') is not None
+        if (
+            not ffmpeg_available
+            and task.include_audio
+            and task.has_audio
+            and task.has_video
+            and task.format_ext
+            and task.format_ext != task.output_format
+        ):
+            filename = f"{safe_title}.{task.format_ext}"
+            output_file = get_unique_filepath(download_path, filename)
+            task.output_format = task.format_ext
             task.output_path = output_file
 
-            # 没有 ffmpeg 时，避免输出扩展名与实际格式不一致
-            ffmpeg_available = shutil.which('ffmpeg') is not None
-            if (
-                not ffmpeg_available
-                and task.include_audio
-                and task.has_audio
-                and task.has_video
-                and task.format_ext
-                and task.format_ext != task.output_format
-            ):
-                filename = f"{safe_title}.{task.format_ext}"
-                output_file = get_unique_filepath(download_path, filename)
-                task.output_format = task.format_ext
-                task.output_path = output_file
+        self._output_files[task_id] = output_file
 
-            def attempt_download(opts: dict) -> None:
-                with yt_dlp.YoutubeDL(opts) as ydl:
+        def attempt_download(opts: dict) -> None:
+            with get_ydl_pool().lease(opts) as ydl:
+                info = self._stored_info(task)
+                if info is None:
+                    ydl.download([task.url])
+                    return
+                try:
+                    ydl.process_ie_result(info, download=True)
+                except yt_dlp.utils.DownloadError as e:
+                    # 流地址提前失效：丢弃保留的结果，重新提取一次
+                    if 'HTTP Error' not in str(e) or self._cancel_flags.get(task_id, False):
+                        raise
+                    self._forget_info(task)
                     ydl.download([task.url])
 
-            # 构建 yt-dlp 选项
-            ydl_opts = self._build_ydl_opts(task_id, task, output_file)
+        # 该平台的 403 几乎总能靠 cookies 恢复时，首次下载即带上 cookies
+        platform = self._platform_key(task)
+        cookie_source = None
+        if self._recovery.use_cookies_upfront(platform):
+            cookie_source = get_cookie_provider().best_source(platform)
 
-            try:
-                attempt_download(ydl_opts)
+        # 构建 yt-dlp 选项
+        ydl_opts = self._build_ydl_opts(task_id, task, output_file, cookie_source=cookie_source)
+        if restart_reason == Messages.DOWNLOAD_THROTTLED:
+            # 新地址可能解析到不同的流，先核对已有的 .part 文件再续传
+            self._reuse_partial_downloads(task, ydl_opts)
+
+        try:
+            if self._use_segmented(task, ffmpeg_available):
+                self._download_segmented(task, output_file, ydl_opts)
+            else:
+                self._discard_segmented_parts(output_file)
+                if self._use_parallel_streams(task, ffmpeg_available):
+                    self._download_streams_parallel(task_id, task, output_file, ydl_opts)
+                else:
+                    attempt_download(ydl_opts)
 
-                # 检查是否被取消
+            # 检查是否被取消
+            if self._cancel_flags.get(task_id, False):
+                task.status = TaskStatus.CANCELLED
+                # 清理部分下载的文件
+                if output_file.exists():
+                    output_file.unlink()
+            else:
+                task.status = TaskStatus.COMPLETED
+                task.stage = TaskStatus.COMPLETED.value
+                task.completed_at = time.time()
+                task.progress.percent = 100.0
+                self._extract_audio(task)
+                self._cleanup_temp_files(task)
+                self._emit(EventType.FINISHED, task)
+                self._adaptive.record_success()
+
+        except yt_dlp.utils.DownloadCancelled:
+            self._on_transfer_paused(task)
+            return
+        except yt_dlp.utils.DownloadError as e:
+            error_msg = str(e)
+            retried = self._recover(
+                task_id,
+                task,
+                output_file,
+                ffmpeg_available,
+                attempt_download,
+                error_msg,
+                cookie_source,
+            )
+            self._watchdog.forget(task_id)
+
+            if retried:
+                self._restart_requests.pop(task_id, None)
                 if self._cancel_flags.get(task_id, False):
                     task.status = TaskStatus.CANCELLED
-                    # 清理部分下载的文件
-                    if output_file.exists():
-                        output_file.unlink()
                 else:
                     task.status = TaskStatus.COMPLETED
                     task.stage = TaskStatus.COMPLETED.value
                     task.completed_at = time.time()
                     task.progress.percent = 100.0
-                    self._extract_audio(task)
-                    self._cleanup_temp_files(task)
-                    self._history.record_finish(task)
-
-            except yt_dlp.utils.DownloadError as e:
-                error_msg = str(e)
-                retried = False
-                if self._is_format_unavailable(error_msg):
-                    retried = self._retry_with_fallback_format(
-                        task_id,
-                        task,
-                        output_file,
-                        ffmpeg_available,
-                        attempt_download,
-                    )
-                elif self._is_http_403(error_msg):
-                    retried = self._retry_with_cookies(
-                        task_id,
-                        task,
-                        output_file,
-                        attempt_download,
-                    )
+                    self._adaptive.record_success()
+                    self._emit(EventType.FINISHED, task)
+                self._notify_progress(task_id)
+                return
 
-                if retried:
-                    if self._cancel_flags.get(task_id, False):
-                        task.status = TaskStatus.CANCELLED
-                    else:
-                        task.status = TaskStatus.COMPLETED
-                        task.stage = TaskStatus.COMPLETED.value
-                        task.completed_at = time.time()
-                        task.progress.percent = 100.0
-                    self._history.record_finish(task)
-                    return
+            # 恢复过程中被暂停，或被监控判定停滞/限速：交回重新排队流程
+            if self._transfer_interrupted(task_id) and not self._cancel_flags.get(task_id, False):
+                self._on_transfer_paused(task)
+                return
 
-                if self._cancel_flags.get(task_id, False):
-                    task.status = TaskStatus.CANCELLED
-                    task.stage = TaskStatus.CANCELLED.value
-                    task.error_message = ""
-                else:
-                    task.status = TaskStatus.FAILED
-                    task.stage = TaskStatus.FAILED.value
-                    task.error_message = error_msg
-                self._history.record_finish(task)
-            except Exception as e:
+            if self._cancel_flags.get(task_id, False):
+                task.status = TaskStatus.CANCELLED
+                task.stage = TaskStatus.CANCELLED.value
+                task.error_message = ""
+            else:
                 task.status = TaskStatus.FAILED
                 task.stage = TaskStatus.FAILED.value
-                task.error_message = Messages.DOWNLOAD_FAILED.format(error=str(e))
-                self._history.record_finish(task)
-
-            self._notify_progress(task_id)
-
-        finally:
-            self._semaphore.release()
+                task.error_message = error_msg
+                self._adaptive.record_error()
+                self._emit(EventType.FAILED, task, error=error_msg)
+        except Exception as e:
+            if self._transfer_interrupted(task_id) and not self._cancel_flags.get(task_id, False):
+                self._on_transfer_paused(task)
+                return
+            task.status = TaskStatus.FAILED
+            task.stage = TaskStatus.FAILED.value
+            task.error_message = Messages.DOWNLOAD_FAILED.format(error=str(e))
+            self._emit(EventType.FAILED, task, error=task.error_message)
+            self._adaptive.record_error()
+
+        self._watchdog.forget(task_id)
+        self._restart_requests.pop(task_id, None)
+        self._notify_progress(task_id)
 
     def _cleanup_temp_files(self, task: DownloadTask) -> None:
         """清理临时下载文件"""
+        self._partials.pop(task.task_id, None)
         if not task.output_path:
             return
 
@@ -527,19 +960,174 @@ class DownloadManager:
                 except OSError:
                     pass
                 continue
-            if name.startswith(f"{prefix}.") and (name.endswith(".part") or name.endswith(".ytdl")):
+            if name.startswith(f"{prefix}.") and (
+                name.endswith(".part")
+                or name.endswith(".ytdl")
+                or name.endswith(".part.segments")
+                or name.endswith(".segpart")
+                or name.endswith(".segpart.segments")
+            ):
                 try:
                     entry.unlink()
                 except OSError:
                     pass
 
-    @staticmethod
-    def _is_format_unavailable(error_msg: str) -> bool:
-        return "requested format is not available" in error_msg.lower()
+    def _recover(
+        self,
+        task_id: str,
+        task: DownloadTask,
+        output_file: Path,
+        ffmpeg_available: bool,
+        attempt_download: Callable[[dict], None],
+        error_msg: str,
+        cookie_source: Optional[str] = None,
+    ) -> bool:
+        """
+        按策略表依次尝试恢复下载
 
-    @staticmethod
-    def _is_http_403(error_msg: str) -> bool:
-        return "http error 403" in error_msg.lower() or "403" in error_msg
+        Args:
+            error_msg: 首次下载的错误信息
+            cookie_source: 首次下载已使用的 cookies 来源
+
+        Returns:
+            是否恢复成功
+        """
+        error_class = self._recovery.classify(error_msg)
+        if error_class is None:
+            return False
+
+        platform = self._platform_key(task)
+        exclude = ()
+        if error_class == ERROR_FORBIDDEN:
+            # 流地址可能已失效，后续尝试都重新提取
+            self._forget_info(task)
+            if cookie_source:
+                # 已带 cookies 仍然 403，说明提前使用 cookies 的判断不再成立
+                self._recovery.record(platform, error_class, STRATEGY_COOKIES, False, 0.0)
+                exclude = (STRATEGY_COOKIES,)
+
+        def retry_download(opts: dict) -> None:
+            self._reuse_partial_downloads(task, opts)
+            attempt_download(opts)
+
+        handlers = {
+            STRATEGY_FALLBACK_FORMAT: lambda: self._retry_with_fallback_format(
+                task_id, task, output_file, ffmpeg_available, retry_download, cookie_source
+            ),
+            STRATEGY_COOKIES: lambda: self._retry_with_cookies(
+                task_id, task, output_file, retry_download
+            ),
+            STRATEGY_REFRESH: lambda: self._retry_with_fresh_info(
+                task_id, task, output_file, retry_download, cookie_source
+            ),
+        }
+        for strategy in self._recovery.plan(platform, error_class, exclude):
+            # 暂停、取消或监控请求重连时停止尝试，由调用方转入对应流程
+            if self._attempt_interrupted(task_id):
+                return False
+            started_at = time.monotonic()
+            result = handlers[strategy]()
+            # None 表示策略不适用或尝试被中止，不计入统计
+            if result is None:
+                continue
+            self._recovery.record(
+                platform,
+                error_class,
+                strategy,
+                result,
+                time.monotonic() - started_at,
+            )
+            if result:
+                return True
+        return False
+
+    def _stored_info(self, task: DownloadTask) -> Optional[dict]:
+        """解析阶段保留、且流地址仍然有效的提取结果"""
+        if not get_config().get('reuse_extracted_info', True):
+            return None
+        platform, video_id = get_parser().identify_platform(task.url)
+        return get_info_store().get(platform, video_id)
+
+    def _forget_info(self, task: DownloadTask) -> None:
+        """丢弃保留的提取结果"""
+        platform, video_id = get_parser().identify_platform(task.url)
+        get_info_store().discard(platform, video_id)
+
+    def _extract_task_info(self, ydl: yt_dlp.YoutubeDL, task: DownloadTask) -> Optional[dict]:
+        """
+        按当前选项获取任务的提取结果（不下载）
+
+        优先对保留的结果重新做格式选择，没有可用结果时才完整提取，并保留新结果。
+        """
+        info = self._stored_info(task)
+        if info is not None:
+            return ydl.process_ie_result(info, download=False)
+        info = ydl.extract_info(task.url, download=False)
+        if info:
+            platform, video_id = get_parser().identify_platform(task.url)
+            get_parser().retain_info(platform, video_id, info)
+        return info
+
+    def _reuse_partial_downloads(self, task: DownloadTask, opts: dict) -> None:
+        """
+        重试前接上已下载的部分数据
+
+        先按重试的选项做格式选择，得到每个流将使用的 .part 文件名。
+        之前下载过同一个流（format_id 与内容长度都相同）时，把已有的
+        .part 文件改成新的文件名，由 continuedl 续传；目标位置上若是
+        另一个流的残留数据则删除，避免拼接出损坏的文件。
+        """
+        partials = self._partials.get(task.task_id)
+        if not partials:
+            return
+        try:
+            with get_ydl_pool().lease(opts) as ydl:
+                info = self._extract_task_info(ydl, task)
+                if not info:
+                    return
+                final_path = Path(ydl.prepare_filename(info))
+        except Exception:
+            return
+
+        # 与 yt-dlp 的命名一致：合并下载时各个流为 <名称>.f<format_id>.<ext>
+        requested = info.get('requested_formats')
+        if requested:
+            targets = [
+                (
+                    final_path.with_name(
+                        f"{final_path.stem}.f{fmt.get('format_id')}.{fmt.get('ext')}.part"
+                    ),
+                    fmt,
+                )
+                for fmt in requested
+            ]
+        else:
+            targets = [(final_path.with_name(final_path.name + '.part'), info)]
+
+        for target, fmt in targets:
+            size = fmt.get('filesize')
+            if not size:
+                continue
+            key = (str(fmt.get('format_id') or ''), int(size))
+            stale = [
+                other for other, path in partials.items()
+                if other != key and Path(path) == target
+            ]
+            for other in stale:
+                del partials[other]
+                try:
+                    target.unlink()
+                except OSError:
+                    pass
+
+            source = partials.get(key)
+            if not source or Path(source) == target or target.exists():
+                continue
+            try:
+                Path(source).replace(target)
+            except OSError:
+                continue
+            partials[key] = str(target)
 
     def _retry_with_fallback_format(
         self,
@@ -548,10 +1136,11 @@ class DownloadManager:
         output_file: Path,
         ffmpeg_available: bool,
         attempt_download: Callable[[dict], None],
-    ) -> bool:
-        """格式不可用时的降级重试"""
+        cookie_source: Optional[str] = None,
+    ) -> Optional[bool]:
+        """格式不可用时的降级重试，音频输出不适用或尝试被中止时返回 None"""
         if task.output_format in ['mp3', 'm4a', 'flac']:
-            return False
+            return None
 
         original_format_id = task.format_id
         original_has_audio = task.has_audio
@@ -570,14 +1159,19 @@ class DownloadManager:
             task.format_id = ''
 
         try:
-            fallback_opts = self._build_ydl_opts(task_id, task, output_file)
+            fallback_opts = self._build_ydl_opts(
+                task_id,
+                task,
+                output_file,
+                cookie_source=cookie_source,
+            )
             attempt_download(fallback_opts)
             return True
         except Exception:
             task.format_id = original_format_id
             task.has_audio = original_has_audio
             task.has_video = original_has_video
-            return False
+            return None if self._attempt_interrupted(task_id) else False
 
     def _retry_with_cookies(
         self,
@@ -585,21 +1179,51 @@ class DownloadManager:
         task: DownloadTask,
         output_file: Path,
         attempt_download: Callable[[dict], None],
-    ) -> bool:
-        """403 时尝试使用浏览器 cookies 重试"""
-        for browser in ['chrome', 'edge', 'brave', 'firefox', 'safari']:
-            try:
-                opts = self._build_ydl_opts(
-                    task_id,
-                    task,
-                    output_file,
-                    cookies_from_browser=browser,
-                )
-                attempt_download(opts)
-                return True
-            except Exception:
-                continue
-        return False
+    ) -> Optional[bool]:
+        """使用该平台可用的浏览器 cookies 重试一次，没有可用 cookies 或尝试被中止时返回 None"""
+        platform = self._platform_key(task)
+        provider = get_cookie_provider()
+        source = provider.best_source(platform)
+        if not source:
+            return None
+        try:
+            opts = self._build_ydl_opts(
+                task_id,
+                task,
+                output_file,
+                cookie_source=source,
+            )
+            attempt_download(opts)
+        except Exception:
+            # 被中止的尝试不说明 cookies 无效，不降低来源的优先级
+            if self._attempt_interrupted(task_id):
+                return None
+            provider.mark_failure(platform, source)
+            return False
+        provider.mark_success(platform, source)
+        return True
+
+    def _retry_with_fresh_info(
+        self,
+        task_id: str,
+        task: DownloadTask,
+        output_file: Path,
+        attempt_download: Callable[[dict], None],
+        cookie_source: Optional[str] = None,
+    ) -> Optional[bool]:
+        """重新提取流地址后重试，尝试被中止时返回 None"""
+        self._forget_info(task)
+        try:
+            opts = self._build_ydl_opts(
+                task_id,
+                task,
+                output_file,
+                cookie_source=cookie_source,
+            )
+            attempt_download(opts)
+            return True
+        except Exception:
+            return None if self._attempt_interrupted(task_id) else False
 
     def _extract_audio(self, task: DownloadTask) -> None:
         """为视频额外保存音频文件"""
@@ -657,27 +1281,353 @@ class DownloadManager:
         except (subprocess.SubprocessError, FileNotFoundError):
             pass
 
+    @staticmethod
+    def _combine_streams(streams: Dict[str, dict]) -> tuple:
+        """
+        合计并行下载的各路流进度
+
+        Returns:
+            (已下载字节数, 总字节数, 合计速度, 剩余时间)，有流的大小未知时剩余时间为 None
+        """
+        downloaded = sum(stream['downloaded'] for stream in streams.values())
+        total = sum(stream['total'] for stream in streams.values())
+        speed = sum(stream['speed'] for stream in streams.values())
+        eta = None
+        if speed > 0 and all(stream['total'] for stream in streams.values()):
+            remaining = sum(
+                max(stream['total'] - stream['downloaded'], 0) for stream in streams.values()
+            )
+            eta = int(remaining / speed)
+        return downloaded, total, speed, eta
+
+    def _download_streams_parallel(
+        self,
+        task_id: str,
+        task: DownloadTask,
+        output_file: Path,
+        ydl_opts: dict,
+    ) -> None:
+        """
+        并行下载视频流和音频流，完成后用 ffmpeg 合并
+
+        格式选择结果不是两路流时退回 yt-dlp 的常规流程。
+        """
+        extract_opts = {
+            key: value
+            for key, value in ydl_opts.items()
+            if key not in ('progress_hooks', 'postprocessor_hooks', 'postprocessors')
+        }
+        with get_ydl_pool().lease(extract_opts) as ydl:
+            info = self._extract_task_info(ydl, task)
+
+        requested = (info or {}).get('requested_formats') or []
+        if len(requested) != 2:
+            with get_ydl_pool().lease(ydl_opts) as ydl:
+                ydl.process_ie_result(info, download=True)
+            return
+
+        lock = threading.Lock()
+        # 格式 ID -> {'downloaded', 'total', 'speed'}，速度与剩余时间按两路合计
+        streams: Dict[str, dict] = {
+            fmt['format_id']: {
+                'downloaded': 0,
+                'total': fmt.get('filesize') or fmt.get('filesize_approx') or 0,
+                'speed': 0,
+            }
+            for fmt in requested
+        }
+        errors: list = []
+        sibling_failed = threading.Event()
+        platform = self._platform_key(task)
+
+        def make_hook(format_id: str):
+            throttle_state = {'filename': None, 'bytes': 0}
+
+            def stream_hook(d):
+                if self._transfer_interrupted(task_id):
+                    raise yt_dlp.utils.DownloadCancelled(
+                        self._restart_requests.get(task_id, Messages.DOWNLOAD_PAUSED)
+                    )
+                if self._cancel_flags.get(task_id, False):
+                    raise yt_dlp.utils.DownloadError(Messages.DOWNLOAD_CANCELLED)
+                if sibling_failed.is_set():
+                    raise yt_dlp.utils.DownloadCancelled()
+                if d['status'] == 'finished':
+                    # 已完成的流不再计入速度
+                    with lock:
+                        stream = streams[format_id]
+                        stream['downloaded'] = max(stream['downloaded'], stream['total'])
+                        stream['speed'] = 0
+                    return
+                if d['status'] != 'downloading':
+                    return
+
+                downloaded = d.get('downloaded_bytes', 0) or 0
+                if throttle_state['filename'] != d.get('filename'):
+                    throttle_state['filename'] = d.get('filename')
+                    throttle_state['bytes'] = downloaded
+                delta = downloaded - throttle_state['bytes']
+                throttle_state['bytes'] = downloaded
+                self._throttle(task, delta)
+                self._watchdog.observe(
+                    task_id,
+                    platform,
+                    d.get('filename') or '',
+                    downloaded,
+                    d.get('total_bytes') or d.get('total_bytes_estimate') or 0,
+                )
+
+                with lock:
+                    stream = streams[format_id]
+                    stream['downloaded'] = downloaded
+                    stream['total'] = (
+                        d.get('total_bytes') or d.get('total_bytes_estimate') or stream['total']
+                    )
+                    stream['speed'] = d.get('speed') or 0
+                    total_downloaded, total_bytes, speed, eta = self._combine_streams(streams)
+                    task.progress.downloaded_bytes = total_downloaded
+                    task.progress.total_bytes = total_bytes
+                    task.progress.speed = speed
+                    task.progress.eta = eta
+                    task.stage = 'downloading_streams'
+                    task.progress.percent = self._calculate_overall_percent(
+                        task,
+                        total_downloaded,
+                        total_bytes,
+                        task.stage,
+                        True,
+                    )
+                self._notify_progress(task_id)
+
+            return stream_hook
+
+        stream_files = []
+        threads = []
+        for fmt in requested:
+            format_id = fmt['format_id']
+            stream_file = output_file.with_name(
+                f"{output_file.stem}.f{format_id}.{fmt.get('ext') or 'bin'}"
+            )
+            stream_files.append(stream_file)
+            stream_info = dict(info)
+            stream_info.pop('requested_formats', None)
+            stream_info.update(fmt)
+            stream_opts = dict(extract_opts)
+            stream_opts['progress_hooks'] = [make_hook(format_id)]
+
+            def run_stream(opts=stream_opts, path=stream_file, stream_info=stream_info):
+                try:
+                    with get_ydl_pool().lease(opts) as stream_ydl:
+                        success, _ = stream_ydl.dl(str(path), stream_info)
+                    if not success:
+                        raise yt_dlp.utils.DownloadError(
+                            Messages.DOWNLOAD_FAILED.format(error=path.name)
+                        )
+                except Exception as exc:
+                    errors.append(exc)
+                    sibling_failed.set()
+
+            thread = threading.Thread(target=run_stream, daemon=True)
+            threads.append(thread)
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            # 优先抛出真实错误，其次是暂停/取消
+            for exc in errors:
+                if not isinstance(exc, yt_dlp.utils.DownloadCancelled):
+                    raise exc
+            raise errors[0]
+
+        self._watchdog.forget(task_id)
+        task.stage = 'merging'
+        task.progress.percent = max(task.progress.percent, 95.0)
+        self._notify_progress(task_id)
+
+        merge_ext = task.output_format if task.output_format in ['mp4', 'webm', 'mkv'] else 'mkv'
+        merged_file = output_file.with_suffix(f'.{merge_ext}')
+        self._merge_streams(stream_files[0], stream_files[1], merged_file, requested)
+
+        for stream_file in stream_files:
+            try:
+                stream_file.unlink()
+            except OSError:
+                pass
+        task.output_path = merged_file
+        task.progress.percent = 100.0
+        self._notify_progress(task_id)
+
+    def _download_segmented(self, task: DownloadTask, output_file: Path, ydl_opts: dict) -> None:
+        """
+        多连接分段下载渐进式单文件格式
+
+        选中的格式不是可直接 Range 请求的 HTTP 单文件，或者文件太小时，
+        使用已提取的信息交给 yt-dlp 常规下载，不重复提取。
+        """
+        config = get_config()
+        extract_opts = {
+            key: value
+            for key, value in ydl_opts.items()
+            if key not in ('progress_hooks', 'postprocessor_hooks', 'postprocessors')
+        }
+        with get_ydl_pool().lease(extract_opts) as ydl:
+            info = self._extract_task_info(ydl, task) or {}
+            # X 等平台的 http 格式没有 filesize，总大小由 Range 探测确定
+            total_bytes = info.get('filesize') or 0
+            try:
+                min_size = int(config.get('segmented_min_size', 0) or 0)
+                connections = int(config.get('segmented_connections', 4) or 4)
+            except (TypeError, ValueError):
+                min_size, connections = 0, 4
+            eligible = (
+                not info.get('requested_formats')
+                and info.get('protocol') in ('http', 'https')
+                and info.get('url')
+                and (info.get('filesize') or info.get('filesize_approx') or min_size) >= min_size
+                and info.get('ext') == task.output_format
+            )
+            if eligible:
+                target = output_file.with_suffix(f".{info['ext']}")
+                downloader = SegmentedDownloader(
+                    url=info['url'],
+                    target=target,
+                    total_bytes=total_bytes,
+                    opener=lambda url, headers: ydl.urlopen(
+                        yt_dlp.networking.Request(url, headers=headers)
+                    ),
+                    headers=info.get('http_headers'),
+                    connections=connections,
+                    progress_hook=ydl_opts['progress_hooks'][0],
+                    info_dict=info,
+                )
+                try:
+                    downloader.probe()
+                    if downloader.total_bytes >= min_size:
+                        task.output_path = downloader.download()
+                        return
+                except RangeNotSupported:
+                    pass
+
+        self._discard_segmented_parts(output_file)
+        with get_ydl_pool().lease(ydl_opts) as ydl:
+            ydl.process_ie_result(info, download=True)
+
+    @staticmethod
+    def _discard_segmented_parts(output_file: Path) -> None:
+        """
+        改由 yt-dlp 下载前删除分段下载的预分配数据
+
+        预分配文件从一开始就是完整大小，旧版本以 .part 命名（旁边有
+        .part.segments 状态文件），yt-dlp 续传时会当作已下载完毕。
+        """
+        parent = output_file.parent
+        if not parent.exists():
+            return
+        prefix = f"{output_file.stem}."
+        for entry in parent.iterdir():
+            name = entry.name
+            if not name.startswith(prefix):
+                continue
+            if name.endswith('.segpart') or name.endswith('.segpart.segments'):
+                stale = [entry]
+            elif name.endswith('.part.segments'):
+                stale = [entry, entry.with_name(name[:-len('.segments')])]
+            else:
+                continue
+            for path in stale:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _merge_streams(first: Path, second: Path, target: Path, formats: list) -> None:
+        """用 ffmpeg 合并视频流与音频流，直接复制失败时转码音频"""
+        ffmpeg_path = shutil.which('ffmpeg')
+        if not ffmpeg_path:
+            raise Exception(Messages.FFMPEG_MERGE_REQUIRED)
+
+        # requested_formats 中视频流在前，但以编码信息为准
+        if formats and formats[0].get('vcodec') == 'none':
+            first, second = second, first
+
+        base_command = [
+            ffmpeg_path,
+            '-y',
+            '-i', str(first),
+            '-i', str(second),
+            '-map', '0:v:0',
+            '-map', '1:a:0',
+        ]
+        for codec_args in (['-c', 'copy'], ['-c:v', 'copy', '-c:a', 'aac', '-b:a', '192k']):
+            try:
+                subprocess.run(
+                    [*base_command, *codec_args, str(target)],
+                    check=True,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+                return
+            except subprocess.CalledProcessError:
+                continue
+        raise Exception(Messages.DOWNLOAD_FAILED.format(error=target.name))
+
     def _build_ydl_opts(
         self,
         task_id: str,
         task: DownloadTask,
         output_file: Path,
-        cookies_from_browser: Optional[str] = None,
+        cookie_source: Optional[str] = None,
     ) -> dict:
         """构建 yt-dlp 选项"""
 
+        throttle_state = {'filename': None, 'bytes': 0}
+        platform = self._platform_key(task)
+        fragment_concurrency = self._fragment_concurrency(platform)
+
         def progress_hook(d):
             """进度回调钩子"""
-            # 检查暂停
-            pause_event = self._pause_events.get(task_id)
-            if pause_event:
-                pause_event.wait()  # 如果暂停则阻塞
+            # 检查暂停与停滞：中止传输以释放连接和调度槽位，恢复时依靠 continuedl 续传
+            if self._transfer_interrupted(task_id):
+                raise yt_dlp.utils.DownloadCancelled(
+                    self._restart_requests.get(task_id, Messages.DOWNLOAD_PAUSED)
+                )
 
             # 检查取消
             if self._cancel_flags.get(task_id, False):
                 raise yt_dlp.utils.DownloadError(Messages.DOWNLOAD_CANCELLED)
 
             if d['status'] == 'downloading':
+                # 以本次回调新增的字节数计费；换文件或续传的首次回调只记录基线
+                downloaded = d.get('downloaded_bytes', 0) or 0
+                if throttle_state['filename'] != d.get('filename'):
+                    throttle_state['filename'] = d.get('filename')
+                    throttle_state['bytes'] = downloaded
+                delta = downloaded - throttle_state['bytes']
+                throttle_state['bytes'] = downloaded
+                self._throttle(task, delta)
+                self._watchdog.observe(
+                    task_id,
+                    platform,
+                    d.get('filename') or '',
+                    downloaded,
+                    d.get('total_bytes') or d.get('total_bytes_estimate') or 0,
+                )
+
+                if d.get('fragment_index') is not None:
+                    self._fragment_tuner.observe(
+                        platform, task_id, d['fragment_index'], fragment_concurrency, downloaded
+                    )
+                elif d.get('tmpfilename') and d.get('total_bytes'):
+                    # 记录单文件流的 .part 路径，重试解析到同一个流时续传
+                    stream_format = (d.get('info_dict') or {}).get('format_id')
+                    if stream_format:
+                        self._partials.setdefault(task_id, {})[
+                            (str(stream_format), int(d['total_bytes']))
+                        ] = d['tmpfilename']
+
                 task.progress.downloaded_bytes = d.get('downloaded_bytes', 0)
                 task.progress.total_bytes = d.get('total_bytes') or d.get('total_bytes_estimate', 0)
                 task.progress.speed = d.get('speed', 0) or 0
@@ -700,6 +1650,8 @@ class DownloadManager:
                 self._notify_progress(task_id)
 
             elif d['status'] == 'finished':
+                # 文件传输结束，合并等后处理没有字节进度，不参与停滞检测
+                self._watchdog.forget(task_id)
                 if self._needs_merge(task, ffmpeg_available) or self._needs_extract(task):
                     task.stage = 'processing'
                     task.progress.percent = max(task.progress.percent, 95.0)
@@ -720,6 +1672,7 @@ class DownloadManager:
             'fragment_retries': 5,
             'socket_timeout': 20,
             'continuedl': True,
+            'concurrent_fragment_downloads': fragment_concurrency,
             'http_headers': {
                 'User-Agent': (
                     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) '
@@ -730,12 +1683,18 @@ class DownloadManager:
             },
             'extractor_args': {
                 'youtube': {
-                    'player_client': ['android', 'web'],
+                    'player_client': list(
+                        self.PLAYER_CLIENTS[task.throttle_count % len(self.PLAYER_CLIENTS)]
+                    ),
                 }
             },
         }
-        if cookies_from_browser:
-            opts['cookiesfrombrowser'] = cookies_from_browser
+        opts.update(get_cookie_provider().ydl_options(cookie_source))
+
+        # 分块请求大文件，规避单连接长时间传输被限速
+        http_chunk_size = self._platform_setting('http_chunk_size', platform, 0)
+        if http_chunk_size > 0:
+            opts['http_chunk_size'] = http_chunk_size
 
         ffmpeg_available = shutil.which('ffmpeg') is not None
 
@@ -808,15 +1767,18 @@ class DownloadManager:
             return False
 
         task = self._tasks[task_id]
-        if task.status != TaskStatus.DOWNLOADING:
+        if task.status not in [TaskStatus.DOWNLOADING, TaskStatus.PENDING]:
             return False
 
-        # 清除暂停事件，让下载线程阻塞
+        # 清除暂停事件：排队中的任务直接出队，下载中的任务由进度钩子中止传输
         pause_event = self._pause_events.get(task_id)
         if pause_event:
             pause_event.clear()
+            self._scheduler.discard(task_id)
             task.status = TaskStatus.PAUSED
             task.stage = TaskStatus.PAUSED.value
+            task.progress.speed = 0
+            task.progress.eta = None
             self._notify_progress(task_id)
             return True
 
@@ -831,31 +1793,54 @@ class DownloadManager:
         if task.status != TaskStatus.PAUSED:
             return False
 
-        # 设置暂停事件，让下载线程继续
         pause_event = self._pause_events.get(task_id)
         if not pause_event:
             pause_event = threading.Event()
             self._pause_events[task_id] = pause_event
         pause_event.set()
-        task.status = TaskStatus.DOWNLOADING
-        task.stage = TaskStatus.DOWNLOADING.value
         task.error_message = ""
         self._cancel_flags[task_id] = False
-        self._history.record_start(task)
+
+        if self._scheduler.is_active(task_id):
+            # 传输尚未被中止，直接继续
+            task.status = TaskStatus.DOWNLOADING
+            task.stage = TaskStatus.DOWNLOADING.value
+        else:
+            # 重新排队，由调度器分配槽位后从 .part 文件续传
+            task.status = TaskStatus.PENDING
+            task.stage = TaskStatus.PENDING.value
+            self._enqueue_task(task)
+
+        self._emit(EventType.QUEUED, task, resumed=True)
         self._notify_progress(task_id)
+        return True
 
-        thread = self._threads.get(task_id)
-        if not thread or not thread.is_alive():
-            thread = threading.Thread(
-                target=self._download_worker,
-                args=(task_id,),
-                daemon=True
-            )
-            self._threads[task_id] = thread
-            thread.start()
+    def set_task_priority(self, task_id: str, priority: int) -> bool:
+        """设置任务优先级，等待中的任务会立即按新优先级排队"""
+        task = self._tasks.get(task_id)
+        if not task:
+            return False
+        task.priority = int(priority)
+        self._scheduler.set_priority(task_id, task.priority)
+        self._notify_progress(task_id)
+        return True
 
+    def move_task_to_top(self, task_id: str) -> bool:
+        """将等待中的任务移到队首，下一个空闲槽位优先调度它"""
+        task = self._tasks.get(task_id)
+        if not task:
+            return False
+        priority = self._scheduler.move_to_top(task_id)
+        if priority is None:
+            return False
+        task.priority = priority
+        self._notify_progress(task_id)
         return True
 
+    def reorder_tasks(self, task_ids: list) -> int:
+        """按给定顺序重排等待中的任务（同优先级内生效）"""
+        return self._scheduler.reorder([str(task_id) for task_id in task_ids or []])
+
     def cancel_task(self, task_id: str) -> bool:
         """取消任务"""
         if task_id not in self._tasks:
@@ -867,6 +1852,7 @@ class DownloadManager:
 
         # 设置取消标志
         self._cancel_flags[task_id] = True
+        self._scheduler.discard(task_id)
 
         # 如果任务已暂停，恢复它以便能退出
         pause_event = self._pause_events.get(task_id)
@@ -876,7 +1862,7 @@ class DownloadManager:
         task.status = TaskStatus.CANCELLED
         task.stage = TaskStatus.CANCELLED.value
         self._notify_progress(task_id)
-        self._history.record_finish(task)
+        self._emit(EventType.FINISHED, task)
         return True
 
     def get_task(self, task_id: str) -> Optional[dict]:
@@ -887,7 +1873,70 @@ class DownloadManager:
     def get_all_tasks(self) -> list:
         """获取所有任务"""
         with self._lock:
-            return [task.to_dict() for task in self._tasks.values()]
+            tasks = list(self._tasks.values())
+        return [task.to_dict() for task in tasks]
+
+    def get_changes_since(self, version: int, epoch: str = '') -> dict:
+        """
+        获取指定版本之后发生变化的任务
+
+        锁内只挑出版本号更新的任务，序列化在锁外进行。
+
+        Args:
+            version: 调用方已知的最新版本号，0 表示全量
+            epoch: 调用方上次得到的纪元，与当前进程不一致时视为全量
+
+        Returns:
+            {'version': 当前版本号, 'epoch': 当前进程的纪元, 'tasks': [变化的任务],
+             'removed': [已移除的 task_id],
+             'reset': 版本号来自其他进程、无法识别或墓碑已被淘汰，
+                      调用方需要丢弃本地状态并以本次结果为全量}
+        """
+        try:
+            version = max(int(version or 0), 0)
+            valid = True
+        except (TypeError, ValueError):
+            version = 0
+            valid = False
+        with self._lock:
+            current = self._version
+            reset = not valid or (
+                version > 0
+                and (
+                    epoch != self._epoch
+                    or version < self._tombstone_floor
+                    or version > current
+                )
+            )
+            since = 0 if reset else version
+            changed = [task for task in self._tasks.values() if task.version > since]
+            removed = [
+                task_id for task_id, removed_at in self._tombstones.items()
+                if removed_at > since
+            ] if since else []
+        return {
+            'version': current,
+            'epoch': self._epoch,
+            'tasks': [task.to_dict() for task in changed],
+            'removed': removed,
+            'reset': reset,
+        }
+
+    def get_queue_stats(self) -> dict:
+        """获取调度队列状态（队列深度、等待时间等）"""
+        stats = self._scheduler.get_stats()
+        stats['adaptive'] = self._adaptive.get_stats()
+        stats['aggregate_speed'] = sum(self._sample_speeds())
+        stats['global_rate_limit'] = self._global_bucket.rate
+        stats['per_task_rate_limit'] = self._default_task_rate
+        stats['fragments'] = self._fragment_tuner.get_stats()
+        stats['events'] = self._events.get_stats()
+        stats['metrics'] = self._metrics.get_stats()
+        stats['ydl_pool'] = get_ydl_pool().get_stats()
+        stats['cookies'] = get_cookie_provider().get_stats()
+        stats['recovery'] = self._recovery.get_stats()
+        stats['watchdog'] = self._watchdog.get_stats()
+        return stats
 
     def remove_task(self, task_id: str) -> bool:
         """移除任务（已完成/已取消/失败/已暂停的任务）"""
@@ -903,13 +1952,13 @@ class DownloadManager:
         ]:
             return False
 
-        thread = self._threads.get(task_id)
-        if thread and thread.is_alive():
+        self._scheduler.discard(task_id)
+        if self._scheduler.is_active(task_id):
             self._cancel_flags[task_id] = True
             pause_event = self._pause_events.get(task_id)
             if pause_event:
                 pause_event.set()
-            thread.join(timeout=2)
+            self._scheduler.wait_for(task_id, timeout=2)
 
         for target in [task.output_path, task.audio_path]:
             if not target:
@@ -923,11 +1972,21 @@ class DownloadManager:
 
         self._cleanup_temp_files(task)
 
+        self._dispatcher.mark_removed(task_id)
+
         with self._lock:
             del self._tasks[task_id]
+            self._bury_task(task_id)
             self._pause_events.pop(task_id, None)
             self._cancel_flags.pop(task_id, None)
-            self._threads.pop(task_id, None)
+            self._output_files.pop(task_id, None)
+            self._partials.pop(task_id, None)
+            self._restart_requests.pop(task_id, None)
+            self._resume_reasons.pop(task_id, None)
+            self._task_buckets.pop(task_id, None)
+            self._notified_stages.pop(task_id, None)
+        self._fragment_tuner.forget(task_id)
+        self._watchdog.reset(task_id)
 
         return True
 
@@ -957,4 +2016,5 @@ def get_download_manager() -> DownloadManager:
         max_concurrent = config.get('max_concurrent_downloads', 3)
         _manager_instance = DownloadManager(max_concurrent=max_concurrent)
         _manager_instance.load_state()
+        _manager_instance.apply_config()
     return _manager_instance
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+事件总线模块
+下载任务生命周期与进度事件的多订阅者分发
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class EventType(Enum):
+    """任务事件类型"""
+    QUEUED = "queued"
+    STARTED = "started"
+    PROGRESS = "progress"
+    STAGE_CHANGED = "stage_changed"
+    FINISHED = "finished"  # 完成或取消，状态见 task.status
+    FAILED = "failed"
+
+
+@dataclass
+class TaskEvent:
+    """任务事件"""
+    type: EventType
+    task_id: str
+    task: Any = None  # 发布时的任务快照，进度事件不携带
+    data: dict = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+
+class Subscription:
+    """
+    订阅者
+
+    每个订阅者拥有独立的队列和消费线程，发布方只做入队，不会被慢消费者拖住。
+    进度事件按任务合并：队列中同一任务最多一条，出队时取最新内容，
+    因此积压量不会超过任务数；生命周期事件从不丢弃。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[TaskEvent], None],
+        types: Optional[Iterable[EventType]] = None,
+    ):
+        """
+        初始化订阅者并启动消费线程
+
+        Args:
+            name: 订阅者名称（用于线程名和统计）
+            handler: 事件处理函数，在订阅者自己的线程中调用
+            types: 关注的事件类型，None 表示全部
+        """
+        self.name = name
+        self._handler = handler
+        self._types = frozenset(types) if types else None
+        self._queue: deque = deque()
+        self._progress: Dict[str, TaskEvent] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._delivered = 0
+        self._coalesced = 0
+        self._failed = 0
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f'events-{name}',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def accepts(self, event_type: EventType) -> bool:
+        return self._types is None or event_type in self._types
+
+    def offer(self, event: TaskEvent) -> None:
+        """事件入队（不阻塞）"""
+        with self._cond:
+            if self._closed:
+                return
+            if event.type == EventType.PROGRESS:
+                queued = event.task_id in self._progress
+                self._progress[event.task_id] = event
+                if queued:
+                    self._coalesced += 1
+                    return
+                # 进度事件在队列中只占一个位置，内容取自 _progress
+                self._queue.append(event.task_id)
+            else:
+                self._queue.append(event)
+            self._cond.notify()
+
+    def _next(self) -> Optional[TaskEvent]:
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return None
+            entry = self._queue.popleft()
+            if isinstance(entry, TaskEvent):
+                return entry
+            return self._progress.pop(entry)
+
+    def _run(self) -> None:
+        while True:
+            event = self._next()
+            if event is None:
+                return
+            try:
+                self._handler(event)
+                self._delivered += 1
+            except Exception:
+                self._failed += 1
+                logger.exception('event subscriber %s failed on %s', self.name, event.type.value)
+
+    def close(self) -> None:
+        """停止接收新事件，处理完积压后退出消费线程"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return {
+                'backlog': len(self._queue),
+                'delivered': self._delivered,
+                'coalesced': self._coalesced,
+                'failed': self._failed,
+            }
+
+
+class EventBus:
+    """任务事件总线"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 写时复制，发布时无需加锁
+        self._subscriptions: Tuple[Subscription, ...] = ()
+
+    def subscribe(
+        self,
+        name: str,
+        handler: Callable[[TaskEvent], None],
+        types: Optional[Iterable[EventType]] = None,
+    ) -> Subscription:
+        """
+        注册订阅者
+
+        Args:
+            name: 订阅者名称
+            handler: 事件处理函数
+            types: 关注的事件类型，None 表示全部
+
+        Returns:
+            订阅者对象，可用于取消订阅
+        """
+        subscription = Subscription(name, handler, types)
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """取消订阅"""
+        with self._lock:
+            self._subscriptions = tuple(
+                item for item in self._subscriptions if item is not subscription
+            )
+        subscription.close()
+
+    def publish(self, event_type: EventType, task_id: str, task: Any = None, **data) -> None:
+        """
+        发布事件
+
+        Args:
+            event_type: 事件类型
+            task_id: 任务 ID
+            task: 任务快照
+            **data: 附加数据
+        """
+        subscriptions = [item for item in self._subscriptions if item.accepts(event_type)]
+        if not subscriptions:
+            return
+        event = TaskEvent(event_type, task_id, task, data)
+        for subscription in subscriptions:
+            subscription.offer(event)
+
+    def get_stats(self) -> dict:
+        """获取各订阅者的队列统计"""
+        return {item.name: item.get_stats() for item in self._subscriptions}
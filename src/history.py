@@ -65,6 +65,20 @@ class HistoryStore:
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_history_started ON download_history(started_at)"
             )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS recovery_stats (
+                    platform TEXT NOT NULL,
+                    error_class TEXT NOT NULL,
+                    strategy TEXT NOT NULL,
+                    attempts REAL NOT NULL DEFAULT 0,
+                    successes REAL NOT NULL DEFAULT 0,
+                    total_seconds REAL NOT NULL DEFAULT 0,
+                    updated_at REAL,
+                    PRIMARY KEY (platform, error_class, strategy)
+                )
+                """
+            )
 
     @staticmethod
     def _normalize_platform(platform: str) -> str:
@@ -367,6 +381,48 @@ class HistoryStore:
                 cursor = conn.execute("DELETE FROM download_history")
                 return cursor.rowcount
 
+    def save_recovery_stat(
+        self,
+        platform: str,
+        error_class: str,
+        strategy: str,
+        attempts: float,
+        successes: float,
+        total_seconds: float,
+    ) -> None:
+        """保存一条恢复策略统计"""
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute(
+                    """
+                    INSERT INTO recovery_stats (
+                        platform, error_class, strategy, attempts, successes,
+                        total_seconds, updated_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(platform, error_class, strategy) DO UPDATE SET
+                        attempts = excluded.attempts,
+                        successes = excluded.successes,
+                        total_seconds = excluded.total_seconds,
+                        updated_at = excluded.updated_at
+                    """,
+                    (
+                        platform,
+                        error_class,
+                        strategy,
+                        attempts,
+                        successes,
+                        total_seconds,
+                        time.time(),
+                    ),
+                )
+
+    def get_recovery_stats(self) -> List[Dict[str, Any]]:
+        """读取全部恢复策略统计"""
+        with self._lock:
+            with self._connect() as conn:
+                rows = conn.execute("SELECT * FROM recovery_stats").fetchall()
+        return [dict(row) for row in rows]
+
 
 _history_instance: Optional[HistoryStore] = None
 
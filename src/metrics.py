@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+下载指标模块
+订阅任务事件，按平台汇总下载结果、耗时和流量
+"""
+
+import threading
+from typing import Dict
+
+from src.events import EventType, TaskEvent
+
+
+class MetricsSink:
+    """下载指标汇总（作为事件总线的订阅者运行）"""
+
+    # 关注的事件类型
+    EVENT_TYPES = (
+        EventType.QUEUED,
+        EventType.STARTED,
+        EventType.STAGE_CHANGED,
+        EventType.FINISHED,
+        EventType.FAILED,
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events: Dict[str, int] = {}
+        self._platforms: Dict[str, dict] = {}
+        self._started_at: Dict[str, float] = {}
+
+    def _platform(self, name: str) -> dict:
+        """获取平台统计（需持有锁）"""
+        stats = self._platforms.get(name)
+        if stats is None:
+            stats = {
+                'queued': 0,
+                'started': 0,
+                'completed': 0,
+                'cancelled': 0,
+                'failed': 0,
+                'bytes': 0,
+                'download_seconds': 0.0,
+            }
+            self._platforms[name] = stats
+        return stats
+
+    def handle(self, event: TaskEvent) -> None:
+        """处理一条事件"""
+        task = event.task
+        platform = getattr(task, 'platform', '') or 'unknown'
+        with self._lock:
+            self._events[event.type.value] = self._events.get(event.type.value, 0) + 1
+            stats = self._platform(platform)
+            if event.type == EventType.QUEUED:
+                stats['queued'] += 1
+            elif event.type == EventType.STARTED:
+                stats['started'] += 1
+                self._started_at[event.task_id] = event.timestamp
+            elif event.type in (EventType.FINISHED, EventType.FAILED):
+                started_at = self._started_at.pop(event.task_id, None)
+                status = getattr(getattr(task, 'status', None), 'value', '')
+                if event.type == EventType.FAILED:
+                    stats['failed'] += 1
+                elif status == 'cancelled':
+                    stats['cancelled'] += 1
+                else:
+                    stats['completed'] += 1
+                    if started_at is not None:
+                        stats['download_seconds'] += max(event.timestamp - started_at, 0.0)
+                    progress = getattr(task, 'progress', None)
+                    if progress:
+                        stats['bytes'] += int(progress.total_bytes or progress.downloaded_bytes or 0)
+
+    def get_stats(self) -> dict:
+        """获取汇总指标"""
+        with self._lock:
+            platforms = {}
+            for name, stats in self._platforms.items():
+                item = dict(stats)
+                finished = item['completed'] + item['failed']
+                item['success_rate'] = item['completed'] / finished if finished else None
+                item['avg_speed'] = (
+                    item['bytes'] / item['download_seconds']
+                    if item['download_seconds'] > 0
+                    else 0.0
+                )
+                platforms[name] = item
+            return {'events': dict(self._events), 'platforms': platforms}
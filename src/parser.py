@@ -5,7 +5,8 @@ URL 解析模块
 """
 
 import re
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator, Optional
 from dataclasses import dataclass, field
 from enum import Enum
 
@@ -13,6 +14,10 @@ import yt_dlp
 
 from src.utils import format_size, format_duration
 from src.strings import Messages
+from src.config import get_config
+from src.cache import get_metadata_cache, get_info_store
+from src.cookies import get_cookie_provider
+from src.ydlpool import get_ydl_pool
 
 
 class Platform(Enum):
@@ -123,12 +128,24 @@ class URLParser:
         r'(?:https?://)?(?:www\.|m\.)?bilibili\.com/video/av(\d+)',
     ]
 
+    # 播放列表 / 频道 URL 正则：(平台, 正则, 频道主页需要补全的标签页)
+    COLLECTION_PATTERNS = [
+        (Platform.YOUTUBE, r'(?:https?://)?(?:www\.|m\.)?youtube\.com/playlist\?(?:.*&)?list=([\w-]+)', None),
+        (
+            Platform.YOUTUBE,
+            r'(?:https?://)?(?:www\.|m\.)?youtube\.com/((?:@|channel/|c/|user/)[^/?#]+)(/[\w-]+)?',
+            '/videos',
+        ),
+        (Platform.BILIBILI, r'(?:https?://)?space\.bilibili\.com/(\d+)', None),
+    ]
+
     def __init__(self):
         """初始化解析器"""
         self._ydl_opts = {
             'quiet': True,
             'no_warnings': True,
-            'extract_flat': False,
+            # 单个视频不受影响；结果是播放列表（如 Bilibili 多 P 视频）时只列出条目
+            'extract_flat': 'in_playlist',
             'retries': 3,
             'socket_timeout': 20,
             'http_headers': {
@@ -146,11 +163,10 @@ class URLParser:
             },
         }
 
-    def _build_ydl_opts(self, cookies_from_browser: Optional[str] = None) -> dict:
+    def _build_ydl_opts(self, cookie_source: Optional[str] = None) -> dict:
         """构建 yt-dlp 选项"""
         opts = dict(self._ydl_opts)
-        if cookies_from_browser:
-            opts['cookiesfrombrowser'] = cookies_from_browser
+        opts.update(get_cookie_provider().ydl_options(cookie_source))
         return opts
 
     def identify_platform(self, url: str) -> tuple:
@@ -175,14 +191,38 @@ class URLParser:
             if match:
                 return Platform.TWITTER, match.group(1)
 
-        # 检查 Bilibili
+        # 检查 Bilibili，指定了分 P 的链接（包括 p=1）各自对应一个 ID，
+        # 不带分 P 的链接可能是整个多 P 合集，不能与第一 P 共用 ID
         for pattern in self.BILIBILI_PATTERNS:
             match = re.search(pattern, url)
             if match:
+                part = re.search(r'[?&]p=(\d+)', url)
+                if part:
+                    return Platform.BILIBILI, f'{match.group(1)}_p{int(part.group(1))}'
                 return Platform.BILIBILI, match.group(1)
 
         return Platform.UNKNOWN, None
 
+    def identify_collection(self, url: str) -> tuple:
+        """
+        识别播放列表、频道等合集 URL
+
+        Args:
+            url: 合集 URL
+
+        Returns:
+            (Platform, 展开用的 URL) 元组，不是合集时返回 (Platform.UNKNOWN, None)
+        """
+        for platform, pattern, default_tab in self.COLLECTION_PATTERNS:
+            match = re.search(pattern, url)
+            if not match:
+                continue
+            if default_tab and not match.group(2):
+                # 频道主页会列出各个标签页，直接展开视频标签页
+                return platform, f'https://www.youtube.com/{match.group(1)}{default_tab}'
+            return platform, url
+        return Platform.UNKNOWN, None
+
     def validate_url(self, url: str) -> bool:
         """
         验证 URL 是否有效
@@ -194,7 +234,141 @@ class URLParser:
             是否有效
         """
         platform, video_id = self.identify_platform(url)
-        return platform != Platform.UNKNOWN and video_id is not None
+        if platform != Platform.UNKNOWN and video_id is not None:
+            return True
+        return self.identify_collection(url)[0] != Platform.UNKNOWN
+
+    def dedupe_urls(self, urls: list) -> tuple:
+        """
+        按 (平台, 视频 ID) 去重，不同形式的链接指向同一视频时只保留第一个
+
+        Args:
+            urls: URL 列表
+
+        Returns:
+            (unique, duplicates)：unique 为 [(序号, url)]，
+            duplicates 为 {重复项序号: 首次出现的序号}
+        """
+        seen = {}
+        unique = []
+        duplicates = {}
+        for index, url in enumerate(urls):
+            url = (url or '').strip()
+            platform, video_id = self.identify_platform(url)
+            key = (platform, video_id) if video_id else ('url', url)
+            if key in seen:
+                duplicates[index] = seen[key]
+                continue
+            seen[key] = index
+            unique.append((index, url))
+        return unique, duplicates
+
+    @staticmethod
+    def _collection_result(url: str, platform: Platform, title: str = '') -> dict:
+        """合集的解析结果：只标记，条目通过 iter_entries 获取"""
+        return {
+            'collection': True,
+            'url': url,
+            'platform': platform.value,
+            'title': title,
+        }
+
+    def _entry_summary(self, index: int, entry: dict) -> Optional[dict]:
+        """将平铺模式的条目转换为精简信息，不是可下载视频时返回 None"""
+        url = entry.get('url') or entry.get('webpage_url') or ''
+        if url and not url.startswith('http'):
+            url = entry.get('webpage_url') or ''
+        platform, video_id = self.identify_platform(url)
+        if platform == Platform.UNKNOWN:
+            return None
+        thumbnails = entry.get('thumbnails') or []
+        thumbnail = entry.get('thumbnail') or (thumbnails[-1].get('url', '') if thumbnails else '')
+        duration = entry.get('duration') or 0
+        return {
+            'index': index,
+            'url': url,
+            'platform': platform.value,
+            'video_id': video_id,
+            'title': entry.get('title') or video_id,
+            'thumbnail': thumbnail,
+            'duration': duration,
+            'duration_str': format_duration(duration) if duration else '',
+            'channel': entry.get('channel') or entry.get('uploader') or '',
+        }
+
+    def iter_entries(self, url: str) -> Iterator[dict]:
+        """
+        以平铺模式逐条列出播放列表、频道或多 P 视频的条目
+
+        条目在提取器翻页时陆续产生，不解析单个视频的格式；用户选中后
+        再对条目 URL 调用 extract_info 获取完整信息。
+
+        Args:
+            url: 合集 URL
+
+        Yields:
+            条目精简信息 {'index', 'url', 'platform', 'video_id', 'title', ...}
+        """
+        _, expand_url = self.identify_collection(url)
+        opts = self._build_ydl_opts()
+        opts['lazy_playlist'] = True
+        with get_ydl_pool().lease(opts) as ydl:
+            result = ydl.extract_info(expand_url or url, download=False, process=False)
+            # 跟随跳转型结果（如频道 ID 跳转到标签页）
+            for _ in range(3):
+                if not result or result.get('_type') not in ('url', 'url_transparent'):
+                    break
+                result = ydl.extract_info(
+                    result['url'],
+                    download=False,
+                    process=False,
+                    ie_key=result.get('ie_key'),
+                )
+            if not result:
+                return
+            if result.get('_type') not in ('playlist', 'multi_video'):
+                summary = self._entry_summary(1, result)
+                if summary:
+                    yield summary
+                return
+            for index, entry in enumerate(result.get('entries') or [], 1):
+                if not entry:
+                    continue
+                summary = self._entry_summary(index, entry)
+                if summary:
+                    yield summary
+
+    def extract_many(
+        self,
+        items: list,
+        on_result: Callable[[int, str, dict], None],
+        max_workers: int = 4,
+        force_refresh: bool = False,
+    ) -> None:
+        """
+        并行解析多个 URL，每完成一个立即回调
+
+        Args:
+            items: [(序号, url)] 列表
+            on_result: 结果回调，参数为 (序号, url, 解析结果)，在解析线程中调用
+            max_workers: 最大并行数
+            force_refresh: 忽略缓存，重新提取
+        """
+        with ThreadPoolExecutor(
+            max_workers=max(int(max_workers or 1), 1),
+            thread_name_prefix='parse',
+        ) as executor:
+            futures = {
+                executor.submit(self.extract_info, url, force_refresh): (index, url)
+                for index, url in items
+            }
+            for future in as_completed(futures):
+                index, url = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'error': Messages.PARSE_ERROR.format(error=str(e))}
+                on_result(index, url, result)
 
     def _parse_formats(self, formats_data: list) -> list:
         """解析格式列表"""
@@ -260,12 +434,15 @@ class URLParser:
         formats.sort(key=sort_key, reverse=True)
         return formats
 
-    def extract_info(self, url: str) -> dict:
+    def extract_info(self, url: str, force_refresh: bool = False) -> dict:
         """
         提取视频信息
 
+        同一视频的解析结果会被缓存，有效期内再次解析直接返回缓存。
+
         Args:
             url: 视频 URL
+            force_refresh: 忽略缓存，重新提取
 
         Returns:
             包含视频信息的字典，出错时返回 {'error': '错误信息'}
@@ -273,15 +450,50 @@ class URLParser:
         platform, video_id = self.identify_platform(url)
 
         if platform == Platform.UNKNOWN:
+            collection_platform, _ = self.identify_collection(url)
+            if collection_platform != Platform.UNKNOWN:
+                # 合集不在这里解析，由 iter_entries 逐条列出
+                return self._collection_result(url, collection_platform)
             return {'error': Messages.UNSUPPORTED_URL}
 
+        cache = get_metadata_cache()
+        if not force_refresh:
+            cached = cache.get(platform, video_id)
+            if cached is not None:
+                # 同一视频可能来自不同形式的链接，返回本次请求的链接
+                cached['url'] = url
+                return cached
+
+        result = self._extract_info(url, platform, video_id)
+        if 'error' not in result and not result.get('collection'):
+            cache.put(platform, video_id, result)
+        return result
+
+    @staticmethod
+    def retain_info(platform: Platform, video_id: str, info: dict) -> None:
+        """保留提取结果，下载时可跳过二次提取"""
+        if not get_config().get('reuse_extracted_info', True):
+            return
+        try:
+            info = yt_dlp.YoutubeDL.sanitize_info(info, remove_private_keys=True)
+        except Exception:
+            return
+        get_info_store().put(platform, video_id, info)
+
+    def _extract_info(self, url: str, platform: Platform, video_id: str) -> dict:
+        """执行 yt-dlp 提取"""
         try:
-            with yt_dlp.YoutubeDL(self._build_ydl_opts()) as ydl:
+            with get_ydl_pool().lease(self._build_ydl_opts()) as ydl:
                 info = ydl.extract_info(url, download=False)
 
                 if info is None:
                     return {'error': '无法获取视频信息'}
 
+                if info.get('_type') in ('playlist', 'multi_video'):
+                    return self._collection_result(url, platform, info.get('title', ''))
+
+                self.retain_info(platform, video_id, info)
+
                 # 解析格式
                 formats = self._parse_formats(info.get('formats', []))
 
@@ -306,12 +518,15 @@ class URLParser:
         except yt_dlp.utils.DownloadError as e:
             error_msg = str(e)
             if platform == Platform.TWITTER:
-                for browser in ['chrome', 'edge', 'brave', 'firefox', 'safari']:
+                provider = get_cookie_provider()
+                source = provider.best_source(platform.value)
+                if source:
                     try:
-                        with yt_dlp.YoutubeDL(self._build_ydl_opts(browser)) as ydl:
+                        with get_ydl_pool().lease(self._build_ydl_opts(source)) as ydl:
                             info = ydl.extract_info(url, download=False)
-                            if info is None:
-                                continue
+                        if info is not None:
+                            provider.mark_success(platform.value, source)
+                            self.retain_info(platform, video_id, info)
                             formats = self._parse_formats(info.get('formats', []))
                             video_info = VideoInfo(
                                 url=url,
@@ -330,7 +545,8 @@ class URLParser:
                             )
                             return video_info.to_dict()
                     except Exception:
-                        continue
+                        pass
+                    provider.mark_failure(platform.value, source)
 
             if 'Video unavailable' in error_msg:
                 return {'error': Messages.VIDEO_UNAVAILABLE}
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+进度分发模块
+合并高频进度更新，按固定节拍批量推送增量给前端
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional, Set
+
+_MISSING = object()
+
+
+def diff_dict(previous: dict, current: dict) -> dict:
+    """
+    计算两个状态字典的差异
+
+    嵌套字典递归比较，只保留变化的字段。
+
+    Args:
+        previous: 上次推送的状态
+        current: 最新状态
+
+    Returns:
+        变化字段组成的字典
+    """
+    delta = {}
+    for key, value in current.items():
+        old = previous.get(key, _MISSING)
+        if old == value:
+            continue
+        if isinstance(value, dict) and isinstance(old, dict):
+            delta[key] = diff_dict(old, value)
+        else:
+            delta[key] = value
+    return delta
+
+
+class ProgressDispatcher:
+    """
+    进度分发器
+
+    下载线程只负责标记任务“有变化”，序列化和推送都在分发线程中按固定
+    节拍执行。每个节拍最多推送一帧，帧内包含所有变化任务相对上次推送的
+    增量字段：
+
+        {
+            'version': 最大版本号,
+            'tasks': {task_id: {变化的字段..., 'version': 版本号}},
+            'removed': [已移除的 task_id],
+        }
+
+    任务第一次出现在帧中时携带完整状态。
+    """
+
+    # 默认推送间隔（秒）
+    DEFAULT_INTERVAL = 0.25
+
+    def __init__(
+        self,
+        snapshot: Callable[[str], Optional[dict]],
+        deliver: Callable[[dict], None],
+        interval: float = DEFAULT_INTERVAL,
+    ):
+        """
+        初始化分发器
+
+        Args:
+            snapshot: 根据任务 ID 生成最新状态的函数，任务不存在时返回 None
+            deliver: 推送一帧增量的函数
+            interval: 推送间隔（秒）
+        """
+        self._snapshot = snapshot
+        self._deliver = deliver
+        self._interval = max(float(interval), 0.01)
+        self._dirty: Set[str] = set()
+        self._removed: Set[str] = set()
+        self._last_sent: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_thread(self) -> None:
+        """启动分发线程（需持有锁）"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run,
+                name='progress-dispatcher',
+                daemon=True,
+            )
+            self._thread.start()
+
+    def mark(self, task_id: str) -> None:
+        """标记任务状态已变化（可在任意线程调用，不会阻塞）"""
+        with self._lock:
+            self._dirty.add(task_id)
+            self._removed.discard(task_id)
+            self._ensure_thread()
+        self._wakeup.set()
+
+    def mark_removed(self, task_id: str) -> None:
+        """标记任务已被移除"""
+        with self._lock:
+            self._dirty.discard(task_id)
+            self._removed.add(task_id)
+            self._ensure_thread()
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self.flush()
+            # 固定节拍：推送后至少间隔一个周期再处理下一批
+            time.sleep(self._interval)
+
+    def flush(self) -> None:
+        """立即推送所有待发送的变化"""
+        with self._lock:
+            task_ids = self._dirty
+            removed = self._removed
+            self._dirty = set()
+            self._removed = set()
+
+        tasks = {}
+        version = 0
+        for task_id in task_ids:
+            data = self._snapshot(task_id)
+            if data is None:
+                removed.add(task_id)
+                continue
+            delta = diff_dict(self._last_sent.get(task_id, {}), data)
+            self._last_sent[task_id] = data
+            if not delta:
+                continue
+            delta['version'] = data.get('version', 0)
+            version = max(version, delta['version'])
+            tasks[task_id] = delta
+
+        removed = [task_id for task_id in removed if self._last_sent.pop(task_id, None) is not None]
+        if not tasks and not removed:
+            return
+
+        try:
+            self._deliver({'version': version, 'tasks': tasks, 'removed': removed})
+        except Exception:
+            pass
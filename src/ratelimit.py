@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+带宽限制模块
+基于令牌桶的下载限速，支持运行时调整速率
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """
+    令牌桶限速器
+
+    多个下载线程共享同一个桶时，带宽按实际消耗动态分配。
+    允许短暂透支：一次消耗超过桶内令牌时，调用方休眠到欠账还清为止。
+    """
+
+    # 单次休眠的最长时间，便于及时响应暂停/取消
+    SLEEP_SLICE = 0.25
+
+    def __init__(self, rate: float = 0, burst_seconds: float = 1.0):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 速率（字节/秒），0 表示不限速
+            burst_seconds: 桶容量对应的秒数
+        """
+        self._lock = threading.Lock()
+        self._burst_seconds = max(burst_seconds, 0.1)
+        self._rate = 0.0
+        self._capacity = 0.0
+        self._tokens = 0.0
+        self._updated_at = time.monotonic()
+        self.set_rate(rate)
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @property
+    def unlimited(self) -> bool:
+        return self._rate <= 0
+
+    def set_rate(self, rate: float) -> None:
+        """运行时调整速率（字节/秒），0 表示不限速"""
+        with self._lock:
+            self._refill()
+            self._rate = max(float(rate or 0), 0.0)
+            self._capacity = self._rate * self._burst_seconds
+            self._tokens = min(self._tokens, self._capacity)
+
+    def _refill(self) -> None:
+        """按经过的时间补充令牌（需持有锁）"""
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        if self._rate > 0:
+            self._tokens = min(self._tokens + elapsed * self._rate, self._capacity)
+
+    def consume(self, amount: int, should_abort: Optional[Callable[[], bool]] = None) -> None:
+        """
+        消耗令牌，不足时阻塞
+
+        Args:
+            amount: 本次传输的字节数
+            should_abort: 返回 True 时提前结束等待
+        """
+        if amount <= 0:
+            return
+        with self._lock:
+            if self._rate <= 0:
+                return
+            self._refill()
+            self._tokens -= amount
+
+        while True:
+            with self._lock:
+                if self._rate <= 0:
+                    return
+                self._refill()
+                if self._tokens >= 0:
+                    return
+                delay = -self._tokens / self._rate
+            if should_abort and should_abort():
+                return
+            time.sleep(min(delay, self.SLEEP_SLICE))
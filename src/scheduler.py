@@ -0,0 +1,640 @@
+# -*- coding: utf-8 -*-
+"""
+下载调度器模块
+固定大小的工作线程池 + 按平台分组的等待队列
+"""
+
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueueEntry:
+    """调度队列条目"""
+    task_id: str
+    group: str = ""
+    priority: int = 0
+    seq: int = 0
+    enqueued_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+
+    @property
+    def sort_key(self) -> Tuple[int, int]:
+        # 优先级高的在前，同优先级按序号先后
+        return (-self.priority, self.seq)
+
+    @property
+    def wait_seconds(self) -> float:
+        end = self.started_at if self.started_at is not None else time.time()
+        return max(end - self.enqueued_at, 0.0)
+
+
+class PendingQueue:
+    """按 (优先级, 序号) 有序的等待队列"""
+
+    def __init__(self):
+        self._keys: List[Tuple[int, int]] = []
+        self._entries: List[QueueEntry] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[QueueEntry]:
+        return iter(list(self._entries))
+
+    def push(self, entry: QueueEntry) -> None:
+        key = entry.sort_key
+        index = bisect.bisect_right(self._keys, key)
+        self._keys.insert(index, key)
+        self._entries.insert(index, entry)
+
+    def remove(self, entry: QueueEntry) -> None:
+        index = bisect.bisect_left(self._keys, entry.sort_key)
+        while self._entries[index] is not entry:
+            index += 1
+        del self._keys[index]
+        del self._entries[index]
+
+    def peek(self) -> Optional[QueueEntry]:
+        return self._entries[0] if self._entries else None
+
+    def pop(self) -> QueueEntry:
+        del self._keys[0]
+        return self._entries.pop(0)
+
+
+class DownloadScheduler:
+    """
+    下载调度器
+
+    工作线程数量固定为 max_workers，只有被调度的任务才会占用线程，
+    其余任务留在等待队列中。任务按分组（平台）各自排队，每个分组可以
+    设置独立的并发上限，分组之间按权重轮转出队，避免单一平台饿死其他平台。
+    任务优先级高于分组轮转：有空闲槽位时总是先调度最高优先级的任务。
+    被移到队首的任务不参与轮转，也不受分组上限约束，在下一个空闲槽位直接开始。
+    """
+
+    def __init__(self, runner: Callable[[str], None], max_workers: int = 3):
+        """
+        初始化调度器
+
+        Args:
+            runner: 执行单个任务的函数，参数为任务 ID
+            max_workers: 工作线程数
+        """
+        self._runner = runner
+        self._max_workers = max(1, int(max_workers))
+        self._queues: Dict[str, PendingQueue] = {}
+        self._pending_ids: Dict[str, QueueEntry] = {}
+        self._active: Dict[str, QueueEntry] = {}
+        self._group_active: Dict[str, int] = {}
+        self._group_limits: Dict[str, int] = {}
+        self._group_weights: Dict[str, int] = {}
+        self._group_credits: Dict[str, int] = {}
+        self._requeue: Set[str] = set()
+        self._seq = 0
+        self._top_seq = 0
+        # 被移到队首、下一次调度时直接选中的任务，最后移动的在末尾
+        self._pinned: List[str] = []
+        self._workers: List[threading.Thread] = []
+        self._worker_seq = 0
+        self._cond = threading.Condition()
+        self._admitted_count = 0
+        self._total_wait = 0.0
+        self._last_wait = 0.0
+
+    def _ensure_workers(self) -> None:
+        """按需启动工作线程（需持有锁）"""
+        while len(self._workers) < self._max_workers:
+            self._worker_seq += 1
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"download-worker-{self._worker_seq}",
+                daemon=True,
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def _worker_loop(self) -> None:
+        """工作线程主循环"""
+        while True:
+            with self._cond:
+                entry = None
+                while not self._is_surplus():
+                    entry = self._next_entry()
+                    if entry:
+                        break
+                    self._cond.wait()
+                # 并发上限被调低：空闲的多余线程直接退出，正在执行的任务不受影响
+                if entry is None:
+                    self._workers.remove(threading.current_thread())
+                    self._cond.notify_all()
+                    return
+                entry.started_at = time.time()
+                self._active[entry.task_id] = entry
+                self._group_active[entry.group] = self._group_active.get(entry.group, 0) + 1
+                self._admitted_count += 1
+                self._last_wait = entry.wait_seconds
+                self._total_wait += self._last_wait
+
+            try:
+                self._runner(entry.task_id)
+            except Exception:
+                logger.exception("runner failed for task %s", entry.task_id)
+            finally:
+                with self._cond:
+                    self._active.pop(entry.task_id, None)
+                    self._group_active[entry.group] = max(
+                        self._group_active.get(entry.group, 1) - 1, 0
+                    )
+                    if entry.task_id in self._requeue:
+                        self._requeue.discard(entry.task_id)
+                        self._enqueue(entry.task_id, entry.group, entry.priority)
+                    self._cond.notify_all()
+
+    def _is_surplus(self) -> bool:
+        """当前线程数是否超过上限（需持有锁）"""
+        return len(self._workers) > self._max_workers
+
+    def _group_has_capacity(self, group: str) -> bool:
+        """分组是否还有空闲并发（需持有锁）"""
+        limit = self._group_limits.get(group, 0)
+        return limit <= 0 or self._group_active.get(group, 0) < limit
+
+    def _next_entry(self) -> Optional[QueueEntry]:
+        """
+        选出下一个任务（需持有锁）
+
+        被移到队首的任务最先选出；其余只考虑有等待任务且未达到分组上限的分组，
+        先比较队首任务的优先级，优先级相同的分组之间按平滑加权轮转。
+        """
+        while self._pinned:
+            entry = self._pending_ids.pop(self._pinned.pop(), None)
+            if entry:
+                self._queues[entry.group].remove(entry)
+                return entry
+
+        heads = {
+            group: queue.peek()
+            for group, queue in self._queues.items()
+            if queue and self._group_has_capacity(group)
+        }
+        if not heads:
+            return None
+        top_priority = max(entry.priority for entry in heads.values())
+        eligible = [group for group, entry in heads.items() if entry.priority == top_priority]
+
+        total = 0
+        chosen = None
+        for group in eligible:
+            weight = max(self._group_weights.get(group, 1), 1)
+            total += weight
+            self._group_credits[group] = self._group_credits.get(group, 0) + weight
+            if chosen is None or self._group_credits[group] > self._group_credits[chosen]:
+                chosen = group
+        self._group_credits[chosen] -= total
+
+        entry = self._queues[chosen].pop()
+        self._pending_ids.pop(entry.task_id, None)
+        return entry
+
+    def _enqueue(self, task_id: str, group: str = "", priority: int = 0) -> None:
+        """加入分组等待队列（需持有锁）"""
+        self._seq += 1
+        entry = QueueEntry(task_id=task_id, group=group, priority=int(priority), seq=self._seq)
+        self._queues.setdefault(group, PendingQueue()).push(entry)
+        self._pending_ids[task_id] = entry
+
+    def _unpin(self, task_id: str) -> None:
+        """取消任务的队首标记（需持有锁）"""
+        if task_id in self._pinned:
+            self._pinned.remove(task_id)
+
+    def _reposition(self, entry: QueueEntry, priority: int, seq: int) -> None:
+        """修改等待中任务的排序键（需持有锁）"""
+        queue = self._queues[entry.group]
+        queue.remove(entry)
+        entry.priority = priority
+        entry.seq = seq
+        queue.push(entry)
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    @property
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending_ids)
+
+    def set_max_workers(self, max_workers: int) -> None:
+        """
+        运行时调整并发上限
+
+        调高时立即补齐工作线程；调低时不打断正在执行的下载，
+        多余线程在完成当前任务后退出。
+
+        Args:
+            max_workers: 新的工作线程数
+        """
+        with self._cond:
+            self._max_workers = max(1, int(max_workers))
+            if self._pending_ids:
+                self._ensure_workers()
+            self._cond.notify_all()
+
+    def set_group_limits(self, limits: Dict[str, int]) -> None:
+        """
+        设置各分组的并发上限
+
+        Args:
+            limits: {分组: 上限}，上限 <= 0 表示只受全局上限约束
+        """
+        with self._cond:
+            self._group_limits = {str(k): int(v) for k, v in (limits or {}).items()}
+            self._cond.notify_all()
+
+    def set_group_weights(self, weights: Dict[str, int]) -> None:
+        """
+        设置各分组的出队权重
+
+        Args:
+            weights: {分组: 权重}，未配置的分组权重为 1
+        """
+        with self._cond:
+            self._group_weights = {str(k): int(v) for k, v in (weights or {}).items()}
+            self._group_credits.clear()
+
+    def submit(self, task_id: str, group: str = "", priority: int = 0) -> bool:
+        """
+        将任务加入等待队列
+
+        任务正在执行时，会在本次执行结束后重新入队。
+
+        Args:
+            task_id: 任务 ID
+            group: 任务所属分组（平台）
+            priority: 优先级，数值越大越先调度
+
+        Returns:
+            是否入队（已在队列中时返回 False）
+        """
+        with self._cond:
+            if task_id in self._pending_ids:
+                return False
+            if task_id in self._active:
+                self._active[task_id].priority = int(priority)
+                self._requeue.add(task_id)
+                return True
+            self._enqueue(task_id, group, priority)
+            self._ensure_workers()
+            self._cond.notify_all()
+        return True
+
+    def discard(self, task_id: str) -> bool:
+        """从等待队列移除任务（不影响正在执行的任务）"""
+        with self._cond:
+            self._requeue.discard(task_id)
+            self._unpin(task_id)
+            entry = self._pending_ids.pop(task_id, None)
+            if not entry:
+                return False
+            self._queues[entry.group].remove(entry)
+        return True
+
+    def set_priority(self, task_id: str, priority: int) -> bool:
+        """
+        修改等待中任务的优先级
+
+        Returns:
+            任务是否在等待队列中
+        """
+        with self._cond:
+            entry = self._pending_ids.get(task_id)
+            if not entry:
+                return False
+            # 明确指定优先级后不再保持在队首
+            self._unpin(task_id)
+            self._reposition(entry, int(priority), entry.seq)
+            self._cond.notify_all()
+        return True
+
+    def move_to_top(self, task_id: str) -> Optional[int]:
+        """
+        将等待中的任务移到队首
+
+        下一个空闲槽位直接调度该任务，不参与分组轮转，也不受分组并发上限约束。
+        任务的优先级同时提升到当前所有等待任务的最高优先级，
+        并排在同优先级任务之前。
+
+        Returns:
+            任务的新优先级；不在等待队列中时返回 None
+        """
+        with self._cond:
+            entry = self._pending_ids.get(task_id)
+            if not entry:
+                return None
+            top_priority = max(e.priority for e in self._pending_ids.values())
+            self._top_seq -= 1
+            self._reposition(entry, top_priority, self._top_seq)
+            self._unpin(task_id)
+            self._pinned.append(task_id)
+            self._cond.notify_all()
+            return top_priority
+
+    def reorder(self, task_ids: List[str]) -> int:
+        """
+        按给定顺序重排等待中的任务
+
+        列表中的任务交换彼此占用的排队位置，优先级保持不变，
+        因此顺序调整只在同一优先级内生效。
+
+        Args:
+            task_ids: 期望的先后顺序
+
+        Returns:
+            实际参与重排的任务数
+        """
+        with self._cond:
+            entries = [
+                self._pending_ids[task_id]
+                for task_id in dict.fromkeys(task_ids)
+                if task_id in self._pending_ids
+            ]
+            seqs = sorted(entry.seq for entry in entries)
+            for entry, seq in zip(entries, seqs):
+                self._reposition(entry, entry.priority, seq)
+            return len(entries)
+
+    def is_pending(self, task_id: str) -> bool:
+        with self._cond:
+            return task_id in self._pending_ids
+
+    def is_active(self, task_id: str) -> bool:
+        with self._cond:
+            return task_id in self._active
+
+    def wait_for(self, task_id: str, timeout: Optional[float] = None) -> bool:
+        """
+        等待正在执行的任务退出
+
+        Returns:
+            任务是否已不在执行中
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: task_id not in self._active,
+                timeout=timeout,
+            )
+
+    def get_wait_time(self, task_id: str) -> Optional[float]:
+        """获取任务在队列中的等待时间（秒）"""
+        with self._cond:
+            entry = self._pending_ids.get(task_id) or self._active.get(task_id)
+            return entry.wait_seconds if entry else None
+
+    def get_stats(self) -> dict:
+        """获取调度器状态"""
+        with self._cond:
+            entries = sorted(self._pending_ids.values(), key=lambda e: e.sort_key)
+            pending = [
+                {
+                    'task_id': entry.task_id,
+                    'group': entry.group,
+                    'priority': entry.priority,
+                    'wait_seconds': entry.wait_seconds,
+                }
+                for entry in entries
+            ]
+            groups = set(self._queues) | set(self._group_active) | set(self._group_limits)
+            return {
+                'max_workers': self._max_workers,
+                'workers': len(self._workers),
+                'draining': max(len(self._workers) - self._max_workers, 0),
+                'active': len(self._active),
+                'pending': len(pending),
+                'pending_tasks': pending,
+                'groups': {
+                    group: {
+                        'pending': len(self._queues.get(group, ())),
+                        'active': self._group_active.get(group, 0),
+                        'limit': self._group_limits.get(group, 0),
+                        'weight': self._group_weights.get(group, 1),
+                    }
+                    for group in groups
+                },
+                'oldest_wait_seconds': max(
+                    (item['wait_seconds'] for item in pending),
+                    default=0.0,
+                ),
+                'last_wait_seconds': self._last_wait,
+                'avg_wait_seconds': (
+                    self._total_wait / self._admitted_count
+                    if self._admitted_count
+                    else 0.0
+                ),
+                'admitted': self._admitted_count,
+            }
+
+
+class AdaptiveConcurrencyController:
+    """
+    自适应并发控制器
+
+    周期性采样正在下载任务的速度，在总吞吐持续上升时增加并发，
+    在单任务速度骤降或错误激增时回退。
+    """
+
+    # 采样间隔（秒）
+    INTERVAL = 5.0
+    # 调整后跳过的采样次数，等待速度稳定
+    SETTLE_TICKS = 2
+    # 总吞吐提升超过该比例才继续加并发
+    GAIN_THRESHOLD = 0.05
+    # 总吞吐下降超过该比例则回退一个并发
+    DROP_THRESHOLD = 0.2
+    # 单任务速度低于历史峰值的该比例视为骤降
+    COLLAPSE_RATIO = 0.4
+    # 单任务速度峰值的衰减系数
+    PEAK_DECAY = 0.95
+    # 一个采样窗口内的失败数达到该值视为错误激增
+    ERROR_THRESHOLD = 2
+
+    def __init__(
+        self,
+        scheduler: DownloadScheduler,
+        sampler: Callable[[], List[float]],
+        min_workers: int = 1,
+        max_workers: int = 8,
+    ):
+        """
+        初始化控制器
+
+        Args:
+            scheduler: 被控制的调度器
+            sampler: 返回当前所有下载中任务速度（字节/秒）的函数
+            min_workers: 并发下限
+            max_workers: 并发上限
+        """
+        self._scheduler = scheduler
+        self._sampler = sampler
+        self._min_workers = 1
+        self._max_workers = 1
+        self.set_bounds(min_workers, max_workers)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._errors = 0
+        self._successes = 0
+        self._settle = 0
+        self._last_aggregate: Optional[float] = None
+        self._per_task_peak = 0.0
+        self._decisions: Deque[dict] = deque(maxlen=50)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def set_bounds(self, min_workers: int, max_workers: int) -> None:
+        """设置并发上下限"""
+        self._min_workers = max(1, int(min_workers))
+        self._max_workers = max(self._min_workers, int(max_workers))
+
+    def start(self) -> None:
+        """启动控制线程"""
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._last_aggregate = None
+        self._per_task_peak = 0.0
+        self._settle = 0
+        clamped = min(max(self._scheduler.max_workers, self._min_workers), self._max_workers)
+        if clamped != self._scheduler.max_workers:
+            self._apply(clamped, 'clamp to bounds', 0.0, 0.0, 0)
+        self._thread = threading.Thread(
+            target=self._run,
+            name='adaptive-concurrency',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止控制线程"""
+        self._stop_event.set()
+        self._thread = None
+
+    def record_error(self) -> None:
+        """记录一次下载失败"""
+        with self._lock:
+            self._errors += 1
+
+    def record_success(self) -> None:
+        """记录一次下载成功"""
+        with self._lock:
+            self._successes += 1
+
+    def get_stats(self) -> dict:
+        """获取控制器状态与最近的决策"""
+        return {
+            'enabled': self.running,
+            'min_workers': self._min_workers,
+            'max_workers': self._max_workers,
+            'per_task_peak': self._per_task_peak,
+            'decisions': list(self._decisions),
+        }
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.INTERVAL):
+            try:
+                self.tick()
+            except Exception:
+                logger.exception('adaptive concurrency tick failed')
+
+    def _apply(
+        self,
+        target: int,
+        reason: str,
+        aggregate: float,
+        per_task: float,
+        errors: int,
+    ) -> None:
+        """应用并记录一次并发调整"""
+        current = self._scheduler.max_workers
+        target = min(max(target, self._min_workers), self._max_workers)
+        decision = {
+            'time': time.time(),
+            'from': current,
+            'to': target,
+            'reason': reason,
+            'aggregate_speed': aggregate,
+            'per_task_speed': per_task,
+            'errors': errors,
+        }
+        self._decisions.append(decision)
+        logger.info(
+            'adaptive concurrency %d -> %d (%s): aggregate=%.0f B/s per_task=%.0f B/s errors=%d',
+            current, target, reason, aggregate, per_task, errors,
+        )
+        if target != current:
+            self._scheduler.set_max_workers(target)
+            self._settle = self.SETTLE_TICKS
+
+    def tick(self) -> None:
+        """执行一次采样与调整"""
+        speeds = [speed for speed in self._sampler() if speed and speed > 0]
+        if self._settle > 0:
+            self._settle -= 1
+            return
+
+        with self._lock:
+            errors, successes = self._errors, self._successes
+            self._errors = 0
+            self._successes = 0
+
+        limit = self._scheduler.max_workers
+        active = len(speeds)
+        aggregate = float(sum(speeds))
+        per_task = aggregate / active if active else 0.0
+
+        if errors >= self.ERROR_THRESHOLD and errors >= successes:
+            self._apply(min(limit // 2, limit - 1), 'error spike', aggregate, per_task, errors)
+            self._last_aggregate = None
+            return
+
+        if not active:
+            return
+
+        if (
+            self._per_task_peak
+            and per_task < self._per_task_peak * self.COLLAPSE_RATIO
+            and limit > self._min_workers
+        ):
+            self._apply(limit - 1, 'per-task speed collapsed', aggregate, per_task, errors)
+            self._per_task_peak *= self.PEAK_DECAY
+            self._last_aggregate = aggregate
+            return
+
+        self._per_task_peak = max(per_task, self._per_task_peak * self.PEAK_DECAY)
+
+        saturated = active >= limit and self._scheduler.pending_count > 0
+        previous = self._last_aggregate
+        self._last_aggregate = aggregate
+
+        if previous is not None and aggregate < previous * (1 - self.DROP_THRESHOLD) and saturated:
+            self._apply(limit - 1, 'aggregate throughput dropped', aggregate, per_task, errors)
+        elif saturated and limit < self._max_workers and (
+            previous is None or aggregate > previous * (1 + self.GAIN_THRESHOLD)
+        ):
+            self._apply(limit + 1, 'aggregate throughput rising', aggregate, per_task, errors)
+        else:
+            logger.debug(
+                'adaptive concurrency hold at %d: aggregate=%.0f B/s per_task=%.0f B/s saturated=%s',
+                limit, aggregate, per_task, saturated,
+            )
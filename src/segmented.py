@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+分段下载模块
+将单个渐进式文件按字节范围拆分，多连接并行下载并写入同一个文件
+"""
+
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+class RangeNotSupported(Exception):
+    """服务器不支持 Range 请求"""
+
+
+class SegmentedDownloader:
+    """
+    多连接分段下载器
+
+    目标文件先以 .segpart 形式预分配，每个分段直接写入自己的字节区间，
+    全部完成后重命名为最终文件。各分段的进度保存在 .segpart.segments
+    旁路文件中，中断后按分段续传。预分配文件不使用 yt-dlp 的 .part 名称：
+    它从一开始就是完整大小，yt-dlp 续传时会误认为已经下载完毕。
+    文件大小以 Range 探测响应中 Content-Range 的总长度为准，
+    提取结果中没有 filesize 的格式（如 X 的 http 格式）同样可以分段。
+    """
+
+    # 单次读取的块大小
+    CHUNK_SIZE = 64 * 1024
+    # 状态文件落盘间隔（秒）
+    STATE_FLUSH_INTERVAL = 1.0
+    # 进度回调的最小间隔（秒）与最小字节数
+    REPORT_INTERVAL = 0.25
+    REPORT_BYTES = 1024 * 1024
+    # 速度统计窗口（秒）
+    SPEED_WINDOW = 3.0
+
+    def __init__(
+        self,
+        url: str,
+        target: Path,
+        total_bytes: int,
+        opener: Callable[[str, Dict[str, str]], Any],
+        headers: Optional[Dict[str, str]] = None,
+        connections: int = 4,
+        progress_hook: Optional[Callable[[dict], None]] = None,
+        info_dict: Optional[dict] = None,
+    ):
+        """
+        初始化分段下载器
+
+        Args:
+            url: 文件直链
+            target: 最终文件路径
+            total_bytes: 文件总大小，未知时为 0（由 Range 探测得到）
+            opener: 发起请求的函数，参数为 (url, headers)，返回带 read() 与 status 的响应
+            headers: 额外请求头
+            connections: 并行连接数
+            progress_hook: 与 yt-dlp 进度钩子格式一致的回调，可抛出异常中止下载
+            info_dict: 传给进度钩子的格式信息
+        """
+        self.url = url
+        self.target = Path(target)
+        self.part_path, self.state_path = self.temp_paths(self.target)
+        self.total_bytes = int(total_bytes or 0)
+        self._opener = opener
+        self._headers = dict(headers or {})
+        self._connections = max(1, int(connections))
+        self._progress_hook = progress_hook
+        self._info_dict = info_dict or {}
+        self._lock = threading.Lock()
+        # 进度钩子按增量计费，多个分段线程的上报必须串行且按进度顺序
+        self._hook_lock = threading.Lock()
+        self._probed = False
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+        self._segments: List[List[int]] = []
+        self._state_flushed_at = 0.0
+        self._reported_bytes = 0
+        self._reported_at = 0.0
+        self._speed_samples: List[tuple] = []
+
+    @staticmethod
+    def temp_paths(target: Path) -> tuple:
+        """预分配文件与续传状态文件的路径"""
+        target = Path(target)
+        return (
+            target.with_name(target.name + '.segpart'),
+            target.with_name(target.name + '.segpart.segments'),
+        )
+
+    @classmethod
+    def discard(cls, target: Path) -> None:
+        """删除未完成的分段下载数据（改用其他方式下载时调用）"""
+        for path in cls.temp_paths(target):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    @property
+    def downloaded_bytes(self) -> int:
+        return sum(segment[2] for segment in self._segments)
+
+    def _plan_segments(self) -> List[List[int]]:
+        """按连接数划分字节区间：[起始, 结束（含）, 已下载]"""
+        size = self.total_bytes
+        count = min(self._connections, max(size // (1024 * 1024), 1))
+        step = size // count
+        segments = []
+        for index in range(count):
+            start = index * step
+            end = size - 1 if index == count - 1 else start + step - 1
+            segments.append([start, end, 0])
+        return segments
+
+    def _load_state(self) -> Optional[List[List[int]]]:
+        """读取续传状态，文件大小不一致时放弃（直链可能已重新签名，不比较地址）"""
+        if not self.part_path.exists() or not self.state_path.exists():
+            return None
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if state.get('total_bytes') != self.total_bytes:
+            return None
+        segments = state.get('segments')
+        if not isinstance(segments, list) or not segments:
+            return None
+        try:
+            return [[int(start), int(end), int(done)] for start, end, done in segments]
+        except (TypeError, ValueError):
+            return None
+
+    def _flush_state(self, force: bool = False) -> None:
+        """保存各分段进度（需持有锁）"""
+        now = time.monotonic()
+        if not force and now - self._state_flushed_at < self.STATE_FLUSH_INTERVAL:
+            return
+        self._state_flushed_at = now
+        try:
+            with open(self.state_path, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {'total_bytes': self.total_bytes, 'segments': self._segments},
+                    f,
+                )
+        except OSError:
+            pass
+
+    def _speed(self, now: float, downloaded: int) -> float:
+        """滑动窗口内的平均速度（需持有锁）"""
+        self._speed_samples.append((now, downloaded))
+        while len(self._speed_samples) > 2 and now - self._speed_samples[0][0] > self.SPEED_WINDOW:
+            self._speed_samples.pop(0)
+        first_time, first_bytes = self._speed_samples[0]
+        elapsed = now - first_time
+        return (downloaded - first_bytes) / elapsed if elapsed > 0 else 0.0
+
+    def _progress_snapshot(self, force: bool = False) -> Optional[dict]:
+        """
+        按间隔生成进度钩子的参数（需持有锁）
+
+        不提供 tmpfilename：预分配文件不能被当作 yt-dlp 的 .part 续传。
+        """
+        now = time.monotonic()
+        downloaded = self.downloaded_bytes
+        if (
+            not force
+            and downloaded - self._reported_bytes < self.REPORT_BYTES
+            and now - self._reported_at < self.REPORT_INTERVAL
+        ):
+            return None
+        self._reported_bytes = downloaded
+        self._reported_at = now
+        speed = self._speed(now, downloaded)
+        remaining = self.total_bytes - downloaded
+        return {
+            'status': 'downloading',
+            'downloaded_bytes': downloaded,
+            'total_bytes': self.total_bytes,
+            'speed': speed,
+            'eta': int(remaining / speed) if speed > 0 else None,
+            'filename': str(self.target),
+            'info_dict': self._info_dict,
+        }
+
+    def _report(self, force: bool = False) -> None:
+        """
+        调用进度钩子
+
+        钩子可能在限速桶中等待，不能持有 _lock，否则分段无法记录进度；
+        但钩子按相邻两次上报的差值计费，生成快照与调用钩子在 _hook_lock 内
+        一起完成，保证上报串行且已下载字节数不回退。
+        """
+        if not self._progress_hook:
+            return
+        with self._hook_lock:
+            with self._lock:
+                report = self._progress_snapshot(force)
+            if report:
+                self._progress_hook(report)
+
+    @staticmethod
+    def _content_range_total(response) -> int:
+        """从 Content-Range 响应头读取文件总长度，未知时返回 0"""
+        headers = getattr(response, 'headers', None) or {}
+        match = re.match(r'bytes\s+\d+-\d+/(\d+)', headers.get('Content-Range') or '')
+        return int(match.group(1)) if match else 0
+
+    def probe(self) -> None:
+        """
+        确认服务器支持 Range 请求，并以响应中的总长度确定文件大小
+
+        Raises:
+            RangeNotSupported: 服务器不支持 Range 请求，或无法确定文件大小
+        """
+        headers = dict(self._headers)
+        headers['Range'] = 'bytes=0-0'
+        response = self._opener(self.url, headers)
+        try:
+            if getattr(response, 'status', None) != 206:
+                raise RangeNotSupported(self.url)
+            total = self._content_range_total(response)
+        finally:
+            close = getattr(response, 'close', None)
+            if close:
+                close()
+        if total:
+            self.total_bytes = total
+        if self.total_bytes <= 0:
+            raise RangeNotSupported(self.url)
+        self._probed = True
+
+    def _run_segment(self, segment: List[int]) -> None:
+        """下载单个分段并写入对应区间"""
+        try:
+            start, end, done = segment
+            if start + done > end:
+                return
+            headers = dict(self._headers)
+            headers['Range'] = f'bytes={start + done}-{end}'
+            response = self._opener(self.url, headers)
+            try:
+                if getattr(response, 'status', None) != 206:
+                    raise RangeNotSupported(self.url)
+                with open(self.part_path, 'r+b') as f:
+                    f.seek(start + done)
+                    while not self._stop.is_set():
+                        remaining = end - (start + segment[2]) + 1
+                        if remaining <= 0:
+                            break
+                        chunk = response.read(min(self.CHUNK_SIZE, remaining))
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                        # 先落盘数据再记录进度，避免续传时跳过未写入的字节
+                        f.flush()
+                        with self._lock:
+                            segment[2] += len(chunk)
+                            self._flush_state()
+                        self._report()
+            finally:
+                close = getattr(response, 'close', None)
+                if close:
+                    close()
+            if not self._stop.is_set() and start + segment[2] <= end:
+                raise IOError(f'segment {start}-{end} ended early')
+        except BaseException as exc:
+            with self._lock:
+                self._errors.append(exc)
+            self._stop.set()
+
+    def download(self) -> Path:
+        """
+        执行分段下载
+
+        Returns:
+            最终文件路径
+
+        Raises:
+            RangeNotSupported: 服务器不支持 Range 请求
+            进度钩子或网络请求抛出的其他异常
+        """
+        # 续传时同样先确认 Range 可用，避免分段中途才发现服务器返回完整文件
+        if not self._probed:
+            self.probe()
+        segments = self._load_state()
+        if segments is None:
+            self.part_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.part_path, 'wb') as f:
+                f.truncate(self.total_bytes)
+            segments = self._plan_segments()
+        self._segments = segments
+
+        with self._lock:
+            self._flush_state(force=True)
+        self._report(force=True)
+
+        threads = [
+            threading.Thread(target=self._run_segment, args=(segment,), daemon=True)
+            for segment in self._segments
+            if segment[0] + segment[2] <= segment[1]
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with self._lock:
+            self._flush_state(force=True)
+
+        if self._errors:
+            raise self._errors[0]
+
+        self.part_path.replace(self.target)
+        try:
+            self.state_path.unlink()
+        except OSError:
+            pass
+
+        if self._progress_hook:
+            self._progress_hook({
+                'status': 'finished',
+                'downloaded_bytes': self.total_bytes,
+                'total_bytes': self.total_bytes,
+                'filename': str(self.target),
+                'info_dict': self._info_dict,
+            })
+        return self.target
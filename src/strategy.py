@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+恢复策略模块
+按平台与错误类型统计各恢复策略的成功率与耗时，决定重试顺序
+"""
+
+import random
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from src.history import get_history_store
+
+# 错误类型
+ERROR_FORMAT_UNAVAILABLE = 'format_unavailable'
+ERROR_FORBIDDEN = 'http_403'
+
+# 恢复策略
+STRATEGY_FALLBACK_FORMAT = 'fallback_format'  # 降级为可用格式
+STRATEGY_COOKIES = 'cookies'                  # 使用浏览器 cookies
+STRATEGY_REFRESH = 'refresh'                  # 丢弃保留的提取结果，重新提取
+
+
+class RecoveryStrategies:
+    """
+    恢复策略表
+
+    每种错误类型有一组候选策略和默认顺序。每次尝试后记录是否成功及耗时，
+    统计保存在历史数据库中，按指数衰减，近期结果权重更高。
+    排序依据平滑后的成功率，其次是平均耗时；多次尝试从未成功的策略
+    会被跳过，但仍以小概率尝试，以便情况变化后重新启用。
+    某平台的 403 几乎总能靠 cookies 恢复时，首次下载就直接带上 cookies。
+    """
+
+    # 各错误类型的候选策略（默认顺序）
+    CANDIDATES = {
+        ERROR_FORMAT_UNAVAILABLE: (STRATEGY_FALLBACK_FORMAT, STRATEGY_COOKIES),
+        ERROR_FORBIDDEN: (STRATEGY_COOKIES, STRATEGY_REFRESH),
+    }
+    # 每次记录时旧统计的衰减系数
+    DECAY = 0.95
+    # 判断跳过或提前使用所需的最少尝试次数
+    MIN_ATTEMPTS = 3
+    # 平滑成功率低于该值的策略跳过
+    SKIP_BELOW = 0.15
+    # 被跳过的策略仍然尝试的概率
+    EXPLORE_RATE = 0.1
+    # 403 的 cookies 恢复成功率达到该值时首次下载即使用 cookies
+    UPFRONT_COOKIES_RATE = 0.8
+
+    def __init__(self, store=None):
+        """
+        初始化策略表
+
+        Args:
+            store: 统计持久化存储，需提供 save_recovery_stat 与 get_recovery_stats
+        """
+        self._store = store
+        self._lock = threading.Lock()
+        # (平台, 错误类型, 策略) -> [尝试次数, 成功次数, 成功耗时合计]
+        self._stats: Dict[Tuple[str, str, str], List[float]] = {}
+        if store is not None:
+            try:
+                rows = store.get_recovery_stats()
+            except Exception:
+                rows = []
+            for row in rows:
+                key = (row['platform'], row['error_class'], row['strategy'])
+                self._stats[key] = [row['attempts'], row['successes'], row['total_seconds']]
+
+    @staticmethod
+    def classify(error_msg: str) -> Optional[str]:
+        """
+        识别错误类型
+
+        Args:
+            error_msg: yt-dlp 错误信息
+
+        Returns:
+            错误类型，没有对应恢复策略时返回 None
+        """
+        lowered = error_msg.lower()
+        if 'requested format is not available' in lowered:
+            return ERROR_FORMAT_UNAVAILABLE
+        if 'http error 403' in lowered or '403' in error_msg:
+            return ERROR_FORBIDDEN
+        return None
+
+    def _success_rate(self, stats: Optional[List[float]]) -> float:
+        """平滑后的成功率（没有数据时为 0.5）"""
+        if not stats:
+            return 0.5
+        return (stats[1] + 1) / (stats[0] + 2)
+
+    def plan(self, platform: str, error_class: str, exclude=()) -> List[str]:
+        """
+        生成本次恢复要依次尝试的策略
+
+        Args:
+            platform: 平台
+            error_class: 错误类型
+            exclude: 本次不需要尝试的策略
+
+        Returns:
+            策略列表，按尝试顺序排列
+        """
+        candidates = [
+            strategy for strategy in self.CANDIDATES.get(error_class, ())
+            if strategy not in exclude
+        ]
+        with self._lock:
+            scored = []
+            for order, strategy in enumerate(candidates):
+                stats = self._stats.get((platform, error_class, strategy))
+                rate = self._success_rate(stats)
+                if (
+                    stats
+                    and stats[0] >= self.MIN_ATTEMPTS
+                    and rate < self.SKIP_BELOW
+                    and random.random() >= self.EXPLORE_RATE
+                ):
+                    continue
+                avg_seconds = stats[2] / stats[1] if stats and stats[1] else float('inf')
+                scored.append((-rate, avg_seconds, order, strategy))
+        return [item[-1] for item in sorted(scored)]
+
+    def record(
+        self,
+        platform: str,
+        error_class: str,
+        strategy: str,
+        success: bool,
+        seconds: float,
+    ) -> None:
+        """
+        记录一次恢复尝试
+
+        Args:
+            platform: 平台
+            error_class: 错误类型
+            strategy: 策略
+            success: 是否成功
+            seconds: 耗时（秒）
+        """
+        key = (platform, error_class, strategy)
+        with self._lock:
+            stats = self._stats.setdefault(key, [0.0, 0.0, 0.0])
+            stats[0] = stats[0] * self.DECAY + 1
+            stats[1] = stats[1] * self.DECAY + (1 if success else 0)
+            stats[2] = stats[2] * self.DECAY + (max(seconds, 0.0) if success else 0.0)
+            snapshot = tuple(stats)
+        if self._store is not None:
+            try:
+                self._store.save_recovery_stat(platform, error_class, strategy, *snapshot)
+            except Exception:
+                pass
+
+    def use_cookies_upfront(self, platform: str) -> bool:
+        """该平台的 403 是否几乎总能靠 cookies 恢复"""
+        with self._lock:
+            stats = self._stats.get((platform, ERROR_FORBIDDEN, STRATEGY_COOKIES))
+            if not stats or stats[0] < self.MIN_ATTEMPTS:
+                return False
+            return stats[1] / stats[0] >= self.UPFRONT_COOKIES_RATE
+
+    def get_stats(self) -> dict:
+        """获取策略统计，按 平台 -> 错误类型 -> 策略 组织"""
+        with self._lock:
+            result: Dict[str, dict] = {}
+            for (platform, error_class, strategy), stats in self._stats.items():
+                result.setdefault(platform, {}).setdefault(error_class, {})[strategy] = {
+                    'attempts': round(stats[0], 2),
+                    'successes': round(stats[1], 2),
+                    'success_rate': round(self._success_rate(stats), 3),
+                    'avg_seconds': round(stats[2] / stats[1], 2) if stats[1] else None,
+                }
+            return result
+
+
+# 全局策略表
+_strategies_instance: Optional[RecoveryStrategies] = None
+
+
+def get_recovery_strategies() -> RecoveryStrategies:
+    """获取全局恢复策略表"""
+    global _strategies_instance
+    if _strategies_instance is None:
+        _strategies_instance = RecoveryStrategies(get_history_store())
+    return _strategies_instance
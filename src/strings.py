@@ -20,6 +20,9 @@ class Messages:
     TASK_NOT_FOUND = '任务不存在'
 
     DOWNLOAD_CANCELLED = '用户取消下载'
+    DOWNLOAD_PAUSED = '用户暂停下载'
+    DOWNLOAD_STALLED = '传输停滞，重新连接'
+    DOWNLOAD_THROTTLED = '传输被限速，重新获取下载地址'
     DOWNLOAD_FAILED = '下载失败: {error}'
 
     FFMPEG_AUDIO_REQUIRED = '需要安装 ffmpeg 才能提取音频'
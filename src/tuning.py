@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+下载参数自动调优模块
+根据观测到的分片吞吐为 DASH/HLS 下载选择分片并发数
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class FragmentTuner:
+    """
+    分片并发调优器
+
+    分片下载受请求延迟限制时，提高并发可以掩盖延迟，吞吐随之上升；
+    受带宽限制时，提高并发只会让每个分片变慢，吞吐不变。
+    调优器按平台、按并发数统计分片下载吞吐，从低到高比较：
+    并发提高后吞吐提升不足 GAIN_THRESHOLD 即停在较低的并发数。
+    比当前最佳并发数更高的一档尚未测量时，推荐它作为试探。
+    """
+
+    # 提高并发后吞吐至少提升该比例才视为有效
+    GAIN_THRESHOLD = 0.1
+    # 一个并发数至少需要的观测次数
+    MIN_SAMPLES = 5
+    # 指数移动平均系数
+    EMA_ALPHA = 0.2
+    MIN_CONCURRENCY = 1
+    MAX_CONCURRENCY = 16
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 平台 -> {并发数: 吞吐（字节/秒，没有字节数时为分片/秒）}
+        self._throughput: Dict[str, Dict[int, float]] = {}
+        self._samples: Dict[Tuple[str, int], int] = {}
+        # 任务 ID -> (分片序号, 已下载字节数, 时间)
+        self._last_seen: Dict[str, Tuple[int, int, float]] = {}
+
+    def observe(
+        self,
+        platform: str,
+        task_id: str,
+        fragment_index: int,
+        concurrency: int,
+        downloaded_bytes: int = 0,
+    ) -> None:
+        """
+        记录一次分片进度
+
+        Args:
+            platform: 平台
+            task_id: 任务 ID
+            fragment_index: 当前已完成的分片序号
+            concurrency: 本次下载使用的分片并发数
+            downloaded_bytes: 已下载的字节数，未知时为 0（按分片数计算吞吐）
+        """
+        now = time.monotonic()
+        concurrency = max(int(concurrency or 1), 1)
+        with self._lock:
+            last = self._last_seen.get(task_id)
+            if last and fragment_index <= last[0]:
+                return
+            self._last_seen[task_id] = (fragment_index, downloaded_bytes, now)
+            if not last or now <= last[2]:
+                return
+            if downloaded_bytes and last[1]:
+                amount = downloaded_bytes - last[1]
+            else:
+                amount = fragment_index - last[0]
+            if amount <= 0:
+                return
+            rate = amount / (now - last[2])
+            levels = self._throughput.setdefault(platform, {})
+            previous = levels.get(concurrency)
+            levels[concurrency] = (
+                rate
+                if previous is None
+                else previous + self.EMA_ALPHA * (rate - previous)
+            )
+            key = (platform, concurrency)
+            self._samples[key] = self._samples.get(key, 0) + 1
+
+    def forget(self, task_id: str) -> None:
+        """清理任务的观测状态"""
+        with self._lock:
+            self._last_seen.pop(task_id, None)
+
+    def _best_level(self, platform: str) -> Optional[int]:
+        """吞吐不再随并发明显提升的并发数，没有足够数据时返回 None（需持有锁）"""
+        levels = self._throughput.get(platform, {})
+        best = None
+        for level in sorted(levels):
+            if self._samples.get((platform, level), 0) < self.MIN_SAMPLES:
+                continue
+            if best is None or levels[level] > levels[best] * (1 + self.GAIN_THRESHOLD):
+                best = level
+        return best
+
+    def recommend(self, platform: str, default: int) -> int:
+        """
+        推荐分片并发数
+
+        Args:
+            platform: 平台
+            default: 没有足够观测数据时使用的并发数
+
+        Returns:
+            推荐的并发数
+        """
+        with self._lock:
+            best = self._best_level(platform)
+            if best is None:
+                return default
+            measured_above = any(
+                level > best and self._samples.get((platform, level), 0) >= self.MIN_SAMPLES
+                for level in self._throughput.get(platform, {})
+            )
+            throughput = self._throughput[platform][best]
+        concurrency = best
+        if not measured_above:
+            # 更高的并发还没测过：试探翻倍后的吞吐
+            concurrency = best * 2
+        concurrency = min(max(concurrency, self.MIN_CONCURRENCY), self.MAX_CONCURRENCY)
+        logger.info(
+            'fragment concurrency for %s: %d (best measured %d at %.0f/s)',
+            platform, concurrency, best, throughput,
+        )
+        return concurrency
+
+    def get_stats(self) -> dict:
+        """获取各平台按并发数统计的分片吞吐"""
+        with self._lock:
+            return {
+                platform: {
+                    'best': self._best_level(platform),
+                    'throughput': {
+                        level: {
+                            'rate': round(rate),
+                            'samples': self._samples.get((platform, level), 0),
+                        }
+                        for level, rate in sorted(levels.items())
+                    },
+                }
+                for platform, levels in self._throughput.items()
+            }
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+传输监控模块
+根据进度钩子上报的字节数发现停滞或被限速的传输
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TransferWatchdog:
+    """
+    传输监控
+
+    下载线程在进度钩子中上报每个文件的已下载字节数，监控线程定期检查：
+
+    - 停滞：任务在停滞时限内所有文件合计新增不足 MIN_PROGRESS_BYTES，
+      回调 on_stall。半开的连接会以极低速率持续返回数据，不会触发
+      socket 超时，因此以字节增量而不是回调间隔判断。
+    - 限速：最近 THROTTLE_WINDOW 秒的平均速度低于 THROTTLE_CEILING，
+      且不到任务此前峰值或平台常态速度的 THROTTLE_RATIO，回调 on_throttle。
+      YouTube 偶尔下发整个有效期内都被限速的流地址，只能换地址解决。
+      同时传输的任务共享带宽，因此速度先乘以同时传输的任务数，按
+      “占用整条链路时的速度”比较；窗口内同时传输的任务数增加时不做判断。
+
+    回调返回 True 表示已中止传输，计入统计。
+    """
+
+    # 停滞时限内至少需要新增的字节数
+    MIN_PROGRESS_BYTES = 16384
+    # 同一任务连续停滞超过该次数后不再处理，交给 yt-dlp 自身的超时与重试
+    MAX_CONSECUTIVE_STALLS = 5
+    # 限速判断的测速窗口（秒）
+    THROTTLE_WINDOW = 30
+    # 低于参考速度的该比例视为限速
+    THROTTLE_RATIO = 0.25
+    # 高于该速度（字节/秒）时不判定为限速，避免把多任务分享带宽误判为限速
+    THROTTLE_CEILING = 262144
+    # 当前文件剩余不足该字节数时不再换地址
+    THROTTLE_MIN_REMAINING = 4194304
+    # 平台常态速度的指数移动平均系数
+    NORM_ALPHA = 0.2
+
+    def __init__(
+        self,
+        on_stall: Callable[[str], bool],
+        on_throttle: Optional[Callable[[str], bool]] = None,
+        timeout: float = 60,
+        detect_throttle: bool = False,
+    ):
+        """
+        初始化监控
+
+        Args:
+            on_stall: 发现停滞时的回调，参数为任务 ID，返回是否已处理，在监控线程中调用
+            on_throttle: 发现限速时的回调，约定同 on_stall
+            timeout: 停滞时限（秒），0 表示不检测
+            detect_throttle: 是否检测限速
+        """
+        self._on_stall = on_stall
+        self._on_throttle = on_throttle
+        self._lock = threading.Lock()
+        self._timeout = 0.0
+        self._detect_throttle = False
+        # 任务 ID -> {'platform', 'files', 'latest', 'remaining', 'progress_at', 'samples'}
+        self._watched: Dict[str, dict] = {}
+        self._consecutive: Dict[str, int] = {}
+        # 任务此前的峰值窗口速度（乘以同时传输的任务数），跨越重连保留
+        self._peaks: Dict[str, float] = {}
+        # 平台常态窗口速度（未限速的任务，同样乘以同时传输的任务数）
+        self._norms: Dict[str, float] = {}
+        self._platform_stalls: Dict[str, int] = {}
+        self._platform_throttles: Dict[str, int] = {}
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.configure(timeout, detect_throttle)
+
+    @property
+    def _enabled(self) -> bool:
+        return bool(self._timeout) or self._throttle_enabled
+
+    @property
+    def _throttle_enabled(self) -> bool:
+        return self._detect_throttle and self._on_throttle is not None
+
+    def configure(self, timeout: float, detect_throttle: bool = False) -> None:
+        """调整停滞时限与限速检测开关，必要时启动监控线程"""
+        try:
+            timeout = max(float(timeout or 0), 0.0)
+        except (TypeError, ValueError):
+            timeout = 0.0
+        with self._lock:
+            self._timeout = timeout
+            self._detect_throttle = bool(detect_throttle)
+            if self._enabled and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name='transfer-watchdog',
+                    daemon=True,
+                )
+                self._thread.start()
+        self._wakeup.set()
+
+    def observe(
+        self,
+        task_id: str,
+        platform: str,
+        filename: str,
+        downloaded: int,
+        total: int = 0,
+    ) -> None:
+        """
+        上报一次进度（在下载线程中调用）
+
+        Args:
+            task_id: 任务 ID
+            platform: 平台
+            filename: 正在下载的文件
+            downloaded: 该文件已下载的字节数
+            total: 该文件总字节数，未知时为 0
+        """
+        if not self._enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            state = self._watched.get(task_id)
+            if state is None:
+                state = {
+                    'platform': platform,
+                    'files': {},
+                    'latest': {},
+                    'remaining': 0,
+                    'progress_at': now,
+                    'samples': deque(),
+                }
+                self._watched[task_id] = state
+            state['latest'][filename] = downloaded
+            state['remaining'] = max(total - downloaded, 0) if total else 0
+            files = state['files']
+            baseline = files.get(filename)
+            if baseline is None or downloaded < baseline:
+                files[filename] = downloaded
+                state['progress_at'] = now
+            elif downloaded - baseline >= self.MIN_PROGRESS_BYTES:
+                files[filename] = downloaded
+                state['progress_at'] = now
+                self._consecutive.pop(task_id, None)
+
+    def forget(self, task_id: str) -> None:
+        """停止监控任务（传输结束、进入后处理或被中止时调用）"""
+        with self._lock:
+            self._watched.pop(task_id, None)
+
+    def reset(self, task_id: str) -> None:
+        """清除任务的全部记录（任务移除时调用）"""
+        with self._lock:
+            self._watched.pop(task_id, None)
+            self._consecutive.pop(task_id, None)
+            self._peaks.pop(task_id, None)
+
+    def _window_speed(self, state: dict, now: float, active: int) -> Optional[tuple]:
+        """
+        记录采样点并计算测速窗口内的平均速度（需持有锁）
+
+        Returns:
+            (平均速度, 窗口内同时传输的任务数是否增加)，窗口未满时返回 None
+        """
+        samples = state['samples']
+        samples.append((now, sum(state['latest'].values()), active))
+        while len(samples) > 2 and now - samples[1][0] >= self.THROTTLE_WINDOW:
+            samples.popleft()
+        elapsed = now - samples[0][0]
+        if elapsed < self.THROTTLE_WINDOW:
+            return None
+        speed = max(samples[-1][1] - samples[0][1], 0) / elapsed
+        contention_rose = max(sample[2] for sample in samples) > samples[0][2]
+        return speed, contention_rose
+
+    def _throttled(
+        self,
+        task_id: str,
+        state: dict,
+        speed: float,
+        active: int,
+        contention_rose: bool,
+    ) -> bool:
+        """根据窗口速度判断是否被限速，并更新峰值与平台常态速度（需持有锁）"""
+        platform = state['platform']
+        # 按占用整条链路折算，多个任务分享带宽不会被当作限速
+        scaled = speed * max(active, 1)
+        peak = self._peaks.get(task_id, 0.0)
+        norm = self._norms.get(platform, 0.0)
+        reference = max(peak, norm)
+        throttled = (
+            not contention_rose
+            and speed < self.THROTTLE_CEILING
+            and scaled < reference * self.THROTTLE_RATIO
+            and state['remaining'] >= self.THROTTLE_MIN_REMAINING
+        )
+        if not throttled:
+            self._peaks[task_id] = max(peak, scaled)
+            self._norms[platform] = scaled if not norm else norm + self.NORM_ALPHA * (scaled - norm)
+        return throttled
+
+    def _collect(self, now: float) -> list:
+        """找出停滞或限速的任务并停止监控（需持有锁）"""
+        found = []
+        active = len(self._watched)
+        for task_id, state in list(self._watched.items()):
+            if self._timeout and now - state['progress_at'] >= self._timeout:
+                del self._watched[task_id]
+                if self._consecutive.get(task_id, 0) < self.MAX_CONSECUTIVE_STALLS:
+                    found.append(('stall', task_id, state['platform']))
+                continue
+            if not self._throttle_enabled:
+                continue
+            window = self._window_speed(state, now, active)
+            if window is not None and self._throttled(task_id, state, window[0], active, window[1]):
+                del self._watched[task_id]
+                found.append(('throttle', task_id, state['platform']))
+        return found
+
+    def _interval(self) -> Optional[float]:
+        """检查间隔：停滞时限的四分之一（1～15 秒），检测限速时不超过 5 秒（需持有锁）"""
+        intervals = []
+        if self._timeout:
+            intervals.append(min(max(self._timeout / 4, 1.0), 15.0))
+        if self._throttle_enabled:
+            intervals.append(5.0)
+        return min(intervals) if intervals else None
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                interval = self._interval()
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            with self._lock:
+                found = self._collect(time.monotonic()) if self._enabled else []
+            for kind, task_id, platform in found:
+                handler = self._on_stall if kind == 'stall' else self._on_throttle
+                try:
+                    handled = handler(task_id)
+                except Exception:
+                    logger.exception('%s handler failed for %s', kind, task_id)
+                    continue
+                if not handled:
+                    continue
+                with self._lock:
+                    if kind == 'stall':
+                        self._consecutive[task_id] = self._consecutive.get(task_id, 0) + 1
+                        counts = self._platform_stalls
+                    else:
+                        counts = self._platform_throttles
+                    counts[platform] = counts.get(platform, 0) + 1
+
+    def get_stats(self) -> dict:
+        """获取停滞与限速统计"""
+        with self._lock:
+            return {
+                'timeout': self._timeout,
+                'detect_throttle': self._detect_throttle,
+                'watching': len(self._watched),
+                'stalls': dict(self._platform_stalls),
+                'throttles': dict(self._platform_throttles),
+                'norm_speeds': {key: round(value) for key, value in self._norms.items()},
+            }
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+YoutubeDL 实例池
+按选项组合复用已初始化的 YoutubeDL，保留提取器、HTTP 连接与 cookies
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+import yt_dlp
+
+
+class _PooledInstance:
+    """池中的实例：钩子在构造时固定为转发函数，实际钩子随每次租用替换"""
+
+    def __init__(self):
+        self.ydl: Optional[yt_dlp.YoutubeDL] = None
+        self.progress_hooks: List[Callable] = []
+        self.postprocessor_hooks: List[Callable] = []
+        self.released_at = 0.0
+
+    def on_progress(self, d: dict) -> None:
+        for hook in self.progress_hooks:
+            hook(d)
+
+    def on_postprocess(self, d: dict) -> None:
+        for hook in self.postprocessor_hooks:
+            hook(d)
+
+
+class YoutubeDLPool:
+    """
+    YoutubeDL 实例池
+
+    选项（除钩子外）完全相同的调用共用一组实例，例如同一平台、同一 cookies
+    来源的解析，或同一任务的重试与续传。实例同一时间只租给一个调用方；
+    用完归还后保持空闲，超过空闲时限或数量上限时关闭。
+    """
+
+    # 随每次租用替换、不参与分组的选项
+    HOOK_KEYS = ('progress_hooks', 'postprocessor_hooks')
+    # 每种选项组合与全池保留的空闲实例数
+    MAX_IDLE_PER_PROFILE = 4
+    MAX_IDLE = 8
+    # 空闲实例的最长保留时间（秒）
+    IDLE_TIMEOUT = 600
+
+    def __init__(self, factory: Callable[[dict], yt_dlp.YoutubeDL] = yt_dlp.YoutubeDL):
+        """
+        初始化实例池
+
+        Args:
+            factory: 创建 YoutubeDL 实例的函数
+        """
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._idle: Dict[str, List[_PooledInstance]] = {}
+        self._created = 0
+        self._reused = 0
+
+    @classmethod
+    def profile_key(cls, opts: dict) -> str:
+        """选项组合的分组键（不含钩子）"""
+        profile = {key: value for key, value in opts.items() if key not in cls.HOOK_KEYS}
+        return json.dumps(profile, sort_keys=True, default=repr)
+
+    def _close(self, pooled: _PooledInstance) -> None:
+        try:
+            pooled.ydl.close()
+        except Exception:
+            pass
+
+    def _collect_expired(self, now: float) -> List[_PooledInstance]:
+        """移出超时与超额的空闲实例（需持有锁）"""
+        expired = []
+        for key in list(self._idle):
+            items = self._idle[key]
+            keep = [item for item in items if now - item.released_at < self.IDLE_TIMEOUT]
+            expired.extend(item for item in items if item not in keep)
+            if keep:
+                self._idle[key] = keep
+            else:
+                del self._idle[key]
+
+        idle = sorted(
+            ((item.released_at, key, item) for key, items in self._idle.items() for item in items),
+            key=lambda entry: entry[0],
+        )
+        for _, key, item in idle[:max(len(idle) - self.MAX_IDLE, 0)]:
+            self._idle[key].remove(item)
+            if not self._idle[key]:
+                del self._idle[key]
+            expired.append(item)
+        return expired
+
+    def _acquire(self, key: str, opts: dict) -> _PooledInstance:
+        with self._lock:
+            expired = self._collect_expired(time.monotonic())
+            items = self._idle.get(key)
+            pooled = items.pop() if items else None
+            if items is not None and not items:
+                del self._idle[key]
+            if pooled:
+                self._reused += 1
+        for item in expired:
+            self._close(item)
+        if pooled:
+            return pooled
+
+        pooled = _PooledInstance()
+        build_opts = dict(opts)
+        build_opts['progress_hooks'] = [pooled.on_progress]
+        build_opts['postprocessor_hooks'] = [pooled.on_postprocess]
+        pooled.ydl = self._factory(build_opts)
+        with self._lock:
+            self._created += 1
+        return pooled
+
+    def _release(self, key: str, pooled: _PooledInstance) -> None:
+        pooled.released_at = time.monotonic()
+        with self._lock:
+            items = self._idle.setdefault(key, [])
+            if len(items) < self.MAX_IDLE_PER_PROFILE:
+                items.append(pooled)
+                pooled = None
+        if pooled:
+            self._close(pooled)
+
+    @contextmanager
+    def lease(self, opts: dict) -> Iterator[yt_dlp.YoutubeDL]:
+        """
+        租用一个实例
+
+        用法与 ``with yt_dlp.YoutubeDL(opts) as ydl`` 相同。正常结束或以
+        DownloadError 结束的实例归还池中；其他异常（包括暂停触发的
+        DownloadCancelled）可能留下未关闭的连接或文件，直接关闭实例。
+
+        Args:
+            opts: yt-dlp 选项，progress_hooks 与 postprocessor_hooks 只对本次租用生效
+        """
+        key = self.profile_key(opts)
+        pooled = self._acquire(key, opts)
+        pooled.progress_hooks = list(opts.get('progress_hooks') or [])
+        pooled.postprocessor_hooks = list(opts.get('postprocessor_hooks') or [])
+        reusable = False
+        try:
+            yield pooled.ydl
+            reusable = True
+        except yt_dlp.utils.DownloadError:
+            reusable = True
+            raise
+        finally:
+            pooled.progress_hooks = []
+            pooled.postprocessor_hooks = []
+            if reusable:
+                self._release(key, pooled)
+            else:
+                self._close(pooled)
+
+    def clear(self) -> None:
+        """关闭所有空闲实例"""
+        with self._lock:
+            items = [item for entries in self._idle.values() for item in entries]
+            self._idle.clear()
+        for item in items:
+            self._close(item)
+
+    def get_stats(self) -> dict:
+        """获取实例池统计"""
+        with self._lock:
+            return {
+                'profiles': len(self._idle),
+                'idle': sum(len(items) for items in self._idle.values()),
+                'created': self._created,
+                'reused': self._reused,
+            }
+
+
+# 全局实例池
+_pool_instance: Optional[YoutubeDLPool] = None
+
+
+def get_ydl_pool() -> YoutubeDLPool:
+    """获取全局 YoutubeDL 实例池"""
+    global _pool_instance
+    if _pool_instance is None:
+        _pool_instance = YoutubeDLPool()
+    return _pool_instance
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共配置
+配置、历史记录等全局实例写在用户目录下，测试期间指向临时目录
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ['HOME'] = tempfile.mkdtemp(prefix='grabfrom-test-')
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""元数据缓存与解析结果暂存"""
+
+import json
+import time
+
+import pytest
+
+import src.parser as parser_module
+from src.cache import InfoStore, MetadataCache, info_expires_at
+from src.parser import Platform, URLParser
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(MetadataCache, 'SAVE_DELAY', 0.2)
+    return MetadataCache(tmp_path / 'metadata.json', ttl=3600, max_entries=3)
+
+
+def saved_keys(cache):
+    with open(cache.path, 'r', encoding='utf-8') as f:
+        return [item['key'] for item in json.load(f)]
+
+
+def test_get_returns_copy(cache):
+    cache.put('youtube', 'a', {'title': 'A', 'formats': [1]})
+    data = cache.get('youtube', 'a')
+    data['formats'].append(2)
+    assert cache.get('youtube', 'a') == {'title': 'A', 'formats': [1]}
+    assert cache.get('youtube', 'missing') is None
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses']) == (2, 1)
+
+
+def test_lru_eviction(cache):
+    for video_id in ('a', 'b', 'c'):
+        cache.put('youtube', video_id, {'id': video_id})
+    cache.get('youtube', 'a')
+    cache.put('youtube', 'd', {'id': 'd'})
+    assert cache.get('youtube', 'b') is None
+    assert cache.get('youtube', 'a') is not None
+
+
+def test_expired_entries_are_dropped(cache, monkeypatch):
+    cache.put('youtube', 'a', {'id': 'a'})
+    now = time.time()
+    monkeypatch.setattr('src.cache.time.time', lambda: now + 7200)
+    assert cache.get('youtube', 'a') is None
+
+
+def test_writes_are_batched_in_background(cache):
+    for video_id in ('a', 'b', 'c'):
+        cache.put('youtube', video_id, {'id': video_id})
+    # 写入由后台线程延迟完成，put 本身不落盘
+    assert not cache.path.exists()
+    deadline = time.monotonic() + 5
+    while not cache.path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert saved_keys(cache) == ['youtube:a', 'youtube:b', 'youtube:c']
+
+
+def test_flush_persists_invalidate_and_clear(cache, tmp_path):
+    cache.put('youtube', 'a', {'id': 'a'})
+    cache.put('youtube', 'b', {'id': 'b'})
+    cache.invalidate('youtube', 'a')
+    cache.flush()
+    assert saved_keys(cache) == ['youtube:b']
+
+    reloaded = MetadataCache(tmp_path / 'metadata.json', ttl=3600)
+    assert reloaded.get('youtube', 'b') == {'id': 'b'}
+
+    cache.clear()
+    cache.flush()
+    assert saved_keys(cache) == []
+
+
+def test_bilibili_part_links_have_their_own_key():
+    parser = URLParser()
+    base = 'https://www.bilibili.com/video/BV1xx411c7mD'
+    assert parser.identify_platform(base) == (Platform.BILIBILI, 'BV1xx411c7mD')
+    assert parser.identify_platform(base + '?p=1') == (Platform.BILIBILI, 'BV1xx411c7mD_p1')
+    assert parser.identify_platform(base + '?spm=1&p=02') == (Platform.BILIBILI, 'BV1xx411c7mD_p2')
+
+
+def test_first_part_does_not_shadow_collection(cache, monkeypatch):
+    parser = URLParser()
+    base = 'https://www.bilibili.com/video/BV1xx411c7mD'
+
+    def extract(url, platform, video_id):
+        if 'p=' in url:
+            return {'video_id': video_id, 'title': 'P1'}
+        return parser._collection_result(url, platform, 'All parts')
+
+    monkeypatch.setattr(parser_module, 'get_metadata_cache', lambda: cache)
+    monkeypatch.setattr(parser, '_extract_info', extract)
+    assert parser.extract_info(base + '?p=1')['title'] == 'P1'
+    assert parser.extract_info(base).get('collection')
+
+
+def test_parse_does_not_reconfigure_cache(cache, monkeypatch):
+    parser = URLParser()
+    monkeypatch.setattr(parser_module, 'get_metadata_cache', lambda: cache)
+    monkeypatch.setattr(parser, '_extract_info', lambda url, platform, video_id: {'id': video_id})
+    monkeypatch.setattr(cache, 'configure', lambda *args: pytest.fail('configure called on parse'))
+    parser.extract_info('https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+    assert cache.get('youtube', 'dQw4w9WgXcQ') == {'id': 'dQw4w9WgXcQ'}
+
+
+def test_info_expiry_from_stream_urls():
+    info = {
+        'url': 'https://rr1.googlevideo.com/videoplayback?expire=2000000000&id=1',
+        'formats': [
+            {'url': 'https://rr1.googlevideo.com/videoplayback?expire=1900000000'},
+            {'manifest_url': 'https://manifest.googlevideo.com/api/manifest/dash/expire/1800000000/id/1'},
+        ],
+    }
+    assert info_expires_at(info) == 1800000000
+    assert info_expires_at({'url': 'https://example.com/video.mp4'}) is None
+
+
+def test_info_store_returns_fresh_info_only(tmp_path):
+    store = InfoStore(tmp_path / 'info', max_age=1800)
+    fresh = {'id': 'a', 'url': f'https://x.googlevideo.com/v?expire={int(time.time()) + 3600}',
+             'thumbnails': [{'url': 'https://example.com/a.jpg'}]}
+    stale = {'id': 'b', 'url': f'https://x.googlevideo.com/v?expire={int(time.time()) + 60}'}
+    store.put('youtube', 'a', fresh)
+    store.put('youtube', 'b', stale)
+
+    info = store.get('youtube', 'a')
+    assert info['id'] == 'a'
+    # 体积大且下载用不到的字段不保留
+    assert 'thumbnails' not in info
+    # 距离过期不足 EXPIRY_MARGIN 的结果视为失效
+    assert store.get('youtube', 'b') is None
+
+    # 重启后从文件读取
+    assert InfoStore(tmp_path / 'info').get('youtube', 'a')['id'] == 'a'
+    store.discard('youtube', 'a')
+    assert store.get('youtube', 'a') is None
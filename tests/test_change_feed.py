@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""任务变更查询：增量、墓碑与全量重置"""
+
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip('yt_dlp')
+
+from yt_dlp.utils import DownloadError
+
+import src.downloader as downloader_module
+from src.downloader import DownloadManager, DownloadTask, TaskStatus
+from src.strategy import RecoveryStrategies
+
+
+@pytest.fixture
+def manager():
+    return DownloadManager(max_concurrent=1)
+
+
+def add_task(manager, task_id, status=TaskStatus.COMPLETED):
+    task = DownloadTask(
+        task_id=task_id,
+        url=f'https://www.youtube.com/watch?v={task_id:0>11}',
+        title=task_id,
+        platform='youtube',
+        status=status,
+    )
+    manager._register_task(task)
+    return task
+
+
+def task_ids(changes):
+    return sorted(task['task_id'] for task in changes['tasks'])
+
+
+def test_incremental_changes(manager):
+    add_task(manager, 'a')
+    add_task(manager, 'b')
+    first = manager.get_changes_since(0)
+    assert task_ids(first) == ['a', 'b']
+    assert not first['reset']
+
+    manager._notify_progress('b')
+    changes = manager.get_changes_since(first['version'], first['epoch'])
+    assert task_ids(changes) == ['b']
+    assert changes['removed'] == []
+    assert not changes['reset']
+
+    latest = manager.get_changes_since(changes['version'], changes['epoch'])
+    assert latest['tasks'] == [] and latest['version'] == changes['version']
+
+
+def test_removed_tasks_are_reported(manager):
+    add_task(manager, 'a')
+    add_task(manager, 'b')
+    first = manager.get_changes_since(0)
+    assert manager.remove_task('a')
+
+    changes = manager.get_changes_since(first['version'], first['epoch'])
+    assert changes['removed'] == ['a']
+    assert task_ids(changes) == []
+
+
+def test_evicted_tombstones_force_reset(manager, monkeypatch):
+    monkeypatch.setattr(DownloadManager, 'MAX_TOMBSTONES', 2)
+    for task_id in ('a', 'b', 'c', 'd'):
+        add_task(manager, task_id)
+    first = manager.get_changes_since(0)
+    for task_id in ('a', 'b', 'c'):
+        assert manager.remove_task(task_id)
+
+    changes = manager.get_changes_since(first['version'], first['epoch'])
+    assert changes['reset']
+    assert task_ids(changes) == ['d']
+
+
+def test_version_from_another_process_forces_reset(manager):
+    add_task(manager, 'a')
+    current = manager.get_changes_since(0)
+    # 后端重启后版本号重新计数，旧版本号可能小于当前版本号
+    changes = manager.get_changes_since(1, 'previous-process')
+    assert changes['reset']
+    assert task_ids(changes) == ['a']
+    assert changes['epoch'] == current['epoch']
+
+
+@pytest.mark.parametrize('version', ['abc', [1], {'v': 1}])
+def test_invalid_version_forces_reset(manager, version):
+    add_task(manager, 'a')
+    changes = manager.get_changes_since(version)
+    assert changes['reset']
+    assert task_ids(changes) == ['a']
+
+
+class FlakyYDL:
+    """第一次下载返回 403，之后成功；下载过程中记录客户端的一次轮询"""
+
+    def __init__(self, manager, polls, attempts):
+        self.manager = manager
+        self.polls = polls
+        self.attempts = attempts
+
+    def download(self, urls):
+        self.attempts.append(urls)
+        if len(self.attempts) == 1:
+            self.polls.append(self.manager.get_changes_since(0))
+            raise DownloadError('ERROR: unable to download video data: HTTP Error 403: Forbidden')
+
+
+class FlakyPool:
+    def __init__(self, manager):
+        self.manager = manager
+        self.polls = []
+        self.attempts = []
+
+    @contextmanager
+    def lease(self, opts):
+        yield FlakyYDL(self.manager, self.polls, self.attempts)
+
+
+class Cookies:
+    def best_source(self, platform):
+        return 'chrome'
+
+    def ydl_options(self, source):
+        return {}
+
+    def mark_success(self, platform, source):
+        pass
+
+    def mark_failure(self, platform, source):
+        pass
+
+
+def test_recovered_download_reports_final_status(manager, monkeypatch):
+    task = add_task(manager, 'a', status=TaskStatus.PENDING)
+    pool = FlakyPool(manager)
+    monkeypatch.setattr(downloader_module, 'get_ydl_pool', lambda: pool)
+    monkeypatch.setattr(downloader_module, 'get_cookie_provider', lambda: Cookies())
+    monkeypatch.setattr(manager, '_recovery', RecoveryStrategies())
+    monkeypatch.setattr(manager, '_stored_info', lambda task: None)
+    monkeypatch.setattr(manager, '_forget_info', lambda task: None)
+
+    manager._download_worker(task.task_id)
+
+    assert len(pool.attempts) == 2
+    assert task.status == TaskStatus.COMPLETED
+    # 下载过程中轮询过的客户端能拿到最终状态
+    poll = pool.polls[0]
+    assert [item['status'] for item in poll['tasks']] == ['downloading']
+    changes = manager.get_changes_since(poll['version'], poll['epoch'])
+    assert [item['status'] for item in changes['tasks']] == ['completed']
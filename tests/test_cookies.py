@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""浏览器 cookies 提供者"""
+
+import http.cookiejar
+import os
+
+import pytest
+
+yt_dlp = pytest.importorskip('yt_dlp')
+
+from src.cookies import CookieProvider
+
+
+def make_cookie(domain, name='sid'):
+    return http.cookiejar.Cookie(
+        0, name, 'value', None, False, domain, True, domain.startswith('.'),
+        '/', False, True, None, False, None, None, {},
+    )
+
+
+BROWSER_COOKIES = {
+    'chrome': ['.bilibili.com', '.example.com'],
+    'edge': [],
+    'brave': ['.x.com', '.youtube.com', '.bank.example'],
+    'firefox': ['.x.com'],
+}
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    reads = []
+
+    def extract(browser):
+        reads.append(browser)
+        if browser not in BROWSER_COOKIES:
+            raise FileNotFoundError(browser)
+        jar = yt_dlp.cookies.YoutubeDLCookieJar()
+        for domain in BROWSER_COOKIES[browser]:
+            jar.set_cookie(make_cookie(domain))
+        return jar
+
+    monkeypatch.setattr(yt_dlp.cookies, 'extract_cookies_from_browser', extract)
+    return reads
+
+
+def test_browsers_are_read_once_until_platform_is_covered(tmp_path, reads):
+    provider = CookieProvider(tmp_path)
+    assert provider.best_source('twitter') == 'brave'
+    assert reads == ['chrome', 'edge', 'brave']
+
+    # 已读取的浏览器不再重复解密
+    assert provider.best_source('bilibili') == 'chrome'
+    assert provider.best_source('youtube') == 'brave'
+    assert reads == ['chrome', 'edge', 'brave']
+
+
+def test_only_platform_cookies_are_exported(tmp_path, reads):
+    provider = CookieProvider(tmp_path)
+    provider.best_source('twitter')
+    options = provider.ydl_options('brave')
+    path = options['cookiefile']
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    assert '.x.com' in content and '.youtube.com' in content
+    assert 'bank.example' not in content
+    if os.name == 'posix':
+        assert os.stat(path).st_mode & 0o777 == 0o600
+    assert provider.ydl_options(None) == {}
+    assert provider.ydl_options('safari') == {'cookiesfrombrowser': ('safari', None, None, None)}
+
+
+def test_failure_switches_source_and_success_is_remembered(tmp_path, reads):
+    provider = CookieProvider(tmp_path)
+    assert provider.best_source('twitter') == 'brave'
+    provider.mark_failure('twitter', 'brave')
+    assert provider.best_source('twitter') == 'firefox'
+    # 所有来源都失败过时退回失败次数最少的来源
+    provider.mark_failure('twitter', 'firefox')
+    provider.mark_failure('twitter', 'firefox')
+    assert provider.best_source('twitter') == 'brave'
+    provider.mark_success('twitter', 'firefox')
+
+    # 重启后先读取上次成功的浏览器
+    reads.clear()
+    restarted = CookieProvider(tmp_path)
+    assert list(tmp_path.glob('*.txt')) == []
+    assert restarted.best_source('twitter') == 'firefox'
+    assert reads == ['firefox']
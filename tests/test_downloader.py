@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""下载管理器：工作线程中的任务收尾、音视频流并行下载"""
+
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip('yt_dlp')
+
+import src.downloader as downloader_module
+from src.downloader import DownloadManager, DownloadTask, TaskStatus
+from src.strings import Messages
+
+
+@pytest.fixture
+def manager():
+    return DownloadManager(max_concurrent=1)
+
+
+def add_task(manager, task_id='t1'):
+    task = DownloadTask(
+        task_id=task_id,
+        url='https://www.youtube.com/watch?v=abcdefghijk',
+        title='video',
+        platform='youtube',
+    )
+    manager._register_task(task)
+    return task
+
+
+def test_error_before_transfer_fails_task(manager, monkeypatch):
+    task = add_task(manager)
+
+    def build_opts(*args, **kwargs):
+        raise Exception(Messages.FFMPEG_MERGE_REQUIRED)
+
+    monkeypatch.setattr(manager, '_build_ydl_opts', build_opts)
+    manager._download_worker(task.task_id)
+
+    assert task.status == TaskStatus.FAILED
+    assert task.stage == TaskStatus.FAILED.value
+    assert Messages.FFMPEG_MERGE_REQUIRED in task.error_message
+
+
+def test_error_after_cancel_keeps_cancelled(manager, monkeypatch):
+    task = add_task(manager)
+    manager.cancel_task(task.task_id)
+    manager._cancel_flags[task.task_id] = True
+    monkeypatch.setattr(manager, '_run_download', lambda task_id: 1 / 0)
+    manager._download_worker(task.task_id)
+
+    assert task.status == TaskStatus.CANCELLED
+    assert task.error_message == ''
+
+
+class StreamYDL:
+    """按给定进度依次调用钩子的 YoutubeDL 替身，两路流在 barrier 处同时处于下载中"""
+
+    def __init__(self, opts, barrier):
+        self.params = opts
+        self.barrier = barrier
+
+    def dl(self, path, info):
+        hooks = self.params.get('progress_hooks') or []
+        total = info['filesize']
+        for hook in hooks:
+            hook({
+                'status': 'downloading',
+                'filename': path,
+                'downloaded_bytes': total // 2,
+                'total_bytes': total,
+                'speed': info['speed'],
+            })
+        self.barrier.wait(5)
+        # 两路流都上报过一次后再结束
+        self.barrier.wait(5)
+        with open(path, 'wb') as f:
+            f.write(b'\0')
+        for hook in hooks:
+            hook({'status': 'finished', 'filename': path, 'downloaded_bytes': total, 'total_bytes': total})
+        return True, path
+
+
+class StreamPool:
+    def __init__(self, barrier):
+        self.barrier = barrier
+
+    @contextmanager
+    def lease(self, opts):
+        yield StreamYDL(opts, self.barrier)
+
+
+def test_parallel_streams_report_combined_speed(manager, monkeypatch, tmp_path):
+    task = add_task(manager)
+    task.status = TaskStatus.DOWNLOADING
+    info = {
+        'id': 'abcdefghijk',
+        'requested_formats': [
+            {'format_id': '137', 'ext': 'mp4', 'filesize': 8000000, 'speed': 1000000},
+            {'format_id': '140', 'ext': 'm4a', 'filesize': 2000000, 'speed': 250000},
+        ],
+    }
+    barrier = threading.Barrier(3)
+    monkeypatch.setattr(downloader_module, 'get_ydl_pool', lambda: StreamPool(barrier))
+    monkeypatch.setattr(manager, '_extract_task_info', lambda ydl, task: info)
+    merged = []
+    monkeypatch.setattr(manager, '_merge_streams', lambda *args: merged.append(args))
+
+    worker = threading.Thread(
+        target=manager._download_streams_parallel,
+        args=(task.task_id, task, tmp_path / 'video.mp4', {}),
+    )
+    worker.start()
+    barrier.wait(5)
+    # 速度为两路之和，剩余时间按两路剩余字节合计计算
+    assert task.progress.speed == 1250000
+    assert task.progress.downloaded_bytes == 5000000
+    assert task.progress.total_bytes == 10000000
+    assert task.progress.eta == 4
+    barrier.wait(5)
+    worker.join(5)
+
+    assert len(merged) == 1
+    assert task.output_path == tmp_path / 'video.mp4'
+
+
+def test_combine_streams_without_sizes():
+    streams = {
+        '137': {'downloaded': 100, 'total': 0, 'speed': 50},
+        '140': {'downloaded': 10, 'total': 20, 'speed': 0},
+    }
+    assert DownloadManager._combine_streams(streams) == (110, 20, 50, None)
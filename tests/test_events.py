@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""事件总线：按类型订阅与进度合并"""
+
+import threading
+import time
+
+from src.events import EventBus, EventType
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_subscribers_receive_selected_types():
+    bus = EventBus()
+    lifecycle, everything = [], []
+    bus.subscribe('lifecycle', lifecycle.append, (EventType.QUEUED, EventType.FINISHED))
+    bus.subscribe('all', everything.append)
+
+    bus.publish(EventType.QUEUED, 't1')
+    bus.publish(EventType.PROGRESS, 't1', percent=10)
+    bus.publish(EventType.FINISHED, 't1')
+
+    assert wait_until(lambda: len(everything) == 3)
+    assert wait_until(lambda: len(lifecycle) == 2)
+    assert [event.type for event in lifecycle] == [EventType.QUEUED, EventType.FINISHED]
+
+
+def test_progress_events_are_coalesced_per_task():
+    bus = EventBus()
+    gate = threading.Event()
+    received = []
+
+    def handler(event):
+        gate.wait(5)
+        received.append(event)
+
+    subscription = bus.subscribe('slow', handler)
+    bus.publish(EventType.STARTED, 't1')
+    for percent in range(100):
+        bus.publish(EventType.PROGRESS, 't1', percent=percent)
+    bus.publish(EventType.FINISHED, 't1')
+    gate.set()
+
+    assert wait_until(lambda: received and received[-1].type == EventType.FINISHED)
+    progress = [event for event in received if event.type == EventType.PROGRESS]
+    # 慢消费者只收到最新的进度，生命周期事件不丢失
+    assert len(progress) == 1
+    assert progress[0].data['percent'] == 99
+    assert subscription.get_stats()['coalesced'] == 99
+
+
+def test_failing_handler_does_not_stop_delivery():
+    bus = EventBus()
+    received = []
+
+    def handler(event):
+        received.append(event)
+        raise RuntimeError('boom')
+
+    subscription = bus.subscribe('failing', handler)
+    bus.publish(EventType.QUEUED, 't1')
+    bus.publish(EventType.QUEUED, 't2')
+    assert wait_until(lambda: len(received) == 2)
+    assert wait_until(lambda: subscription.get_stats()['failed'] == 2)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""URL 识别、批量解析与合集展开"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+import src.parser as parser_module
+from src.parser import Platform, URLParser
+
+
+@pytest.fixture
+def parser():
+    return URLParser()
+
+
+def test_dedupe_urls_by_video_id(parser):
+    urls = [
+        'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+        'https://youtu.be/dQw4w9WgXcQ',
+        ' https://x.com/user/status/1234567890 ',
+        'not a url',
+        'not a url',
+    ]
+    unique, duplicates = parser.dedupe_urls(urls)
+    assert unique == [
+        (0, 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'),
+        (2, 'https://x.com/user/status/1234567890'),
+        (3, 'not a url'),
+    ]
+    assert duplicates == {1: 0, 4: 3}
+
+
+def test_extract_many_bounds_parallelism_and_streams_results(parser, monkeypatch):
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def extract_info(url, force_refresh=False):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        # 序号越小耗时越长，结果按完成顺序回调
+        time.sleep(0.02 * (5 - int(url)))
+        with lock:
+            running[0] -= 1
+        if url == '0':
+            raise RuntimeError('boom')
+        return {'title': url}
+
+    monkeypatch.setattr(parser, 'extract_info', extract_info)
+    results = []
+    parser.extract_many(
+        [(index, str(index)) for index in range(5)],
+        lambda index, url, result: results.append((index, result)),
+        max_workers=2,
+    )
+
+    assert peak[0] == 2
+    assert sorted(index for index, _ in results) == [0, 1, 2, 3, 4]
+    assert results[0][0] != 0
+    errors = [result for index, result in results if index == 0]
+    assert 'boom' in errors[0]['error']
+
+
+class LazyYDL:
+    """平铺提取：频道 ID 先跳转到标签页，条目由生成器逐个产生"""
+
+    def __init__(self, produced):
+        self.produced = produced
+        self.calls = []
+
+    def entries(self):
+        for video_id in ('dQw4w9WgXcQ', None, 'abcdefghijk'):
+            self.produced.append(video_id)
+            if video_id is None:
+                yield {'url': 'https://www.youtube.com/@someone/shorts', 'title': 'Shorts'}
+            else:
+                yield {'url': video_id, 'webpage_url': f'https://www.youtube.com/watch?v={video_id}',
+                       'title': video_id.upper(), 'duration': 65}
+
+    def extract_info(self, url, download=False, process=True, ie_key=None):
+        self.calls.append((url, process, ie_key))
+        if url.startswith('https://www.youtube.com/channel/'):
+            return {'_type': 'url', 'url': 'https://www.youtube.com/@someone/videos', 'ie_key': 'YoutubeTab'}
+        return {'_type': 'playlist', 'entries': self.entries()}
+
+
+class LazyPool:
+    def __init__(self, ydl):
+        self.ydl = ydl
+        self.opts = None
+
+    @contextmanager
+    def lease(self, opts):
+        self.opts = opts
+        yield self.ydl
+
+
+def test_identify_collection(parser):
+    assert parser.identify_collection('https://www.youtube.com/@someone') == (
+        Platform.YOUTUBE, 'https://www.youtube.com/@someone/videos')
+    assert parser.identify_collection('https://www.youtube.com/@someone/streams') == (
+        Platform.YOUTUBE, 'https://www.youtube.com/@someone/streams')
+    playlist = 'https://www.youtube.com/playlist?list=PL1234567890'
+    assert parser.identify_collection(playlist) == (Platform.YOUTUBE, playlist)
+    assert parser.identify_collection('https://www.youtube.com/watch?v=dQw4w9WgXcQ') == (Platform.UNKNOWN, None)
+    assert parser.validate_url('https://space.bilibili.com/12345')
+
+
+def test_iter_entries_streams_flat_entries(parser, monkeypatch):
+    produced = []
+    ydl = LazyYDL(produced)
+    pool = LazyPool(ydl)
+    monkeypatch.setattr(parser_module, 'get_ydl_pool', lambda: pool)
+
+    entries = parser.iter_entries('https://www.youtube.com/channel/UC123')
+    first = next(entries)
+    # 条目在提取器产生时就交给调用方，不等整个合集列完
+    assert produced == ['dQw4w9WgXcQ']
+    assert (first['index'], first['video_id'], first['title'], first['duration_str']) == (
+        1, 'dQw4w9WgXcQ', 'DQW4W9WGXCQ', '1:05')
+
+    rest = list(entries)
+    # 不是视频的条目（标签页链接）被跳过，序号保持原位置
+    assert [(item['index'], item['video_id']) for item in rest] == [(3, 'abcdefghijk')]
+    assert pool.opts['lazy_playlist'] is True
+    assert ydl.calls == [
+        ('https://www.youtube.com/channel/UC123/videos', False, None),
+        ('https://www.youtube.com/@someone/videos', False, 'YoutubeTab'),
+    ]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""进度分发：增量帧"""
+
+from src.progress import ProgressDispatcher, diff_dict
+
+
+def test_diff_dict_keeps_only_changes():
+    previous = {'status': 'downloading', 'progress': {'percent': 10, 'speed': 5}}
+    current = {'status': 'downloading', 'progress': {'percent': 20, 'speed': 5}, 'title': 'x'}
+    assert diff_dict(previous, current) == {'progress': {'percent': 20}, 'title': 'x'}
+    assert diff_dict(current, current) == {}
+
+
+def test_frames_carry_deltas_and_removals():
+    states = {'t1': {'version': 1, 'status': 'pending', 'progress': {'percent': 0}}}
+    frames = []
+    dispatcher = ProgressDispatcher(lambda task_id: states.get(task_id), frames.append)
+
+    dispatcher._dirty.add('t1')
+    dispatcher.flush()
+    # 第一次出现时携带完整状态
+    assert frames[-1] == {'version': 1, 'tasks': {'t1': states['t1']}, 'removed': []}
+
+    states['t1'] = {'version': 2, 'status': 'downloading', 'progress': {'percent': 0}}
+    dispatcher._dirty.add('t1')
+    dispatcher.flush()
+    assert frames[-1]['tasks'] == {'t1': {'status': 'downloading', 'version': 2}}
+
+    # 没有变化时不推送
+    dispatcher._dirty.add('t1')
+    dispatcher.flush()
+    assert len(frames) == 2
+
+    del states['t1']
+    dispatcher._removed.add('t1')
+    dispatcher.flush()
+    assert frames[-1] == {'version': 0, 'tasks': {}, 'removed': ['t1']}
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""令牌桶限速"""
+
+import time
+
+from src.ratelimit import TokenBucket
+
+
+def test_unlimited_never_blocks():
+    bucket = TokenBucket()
+    assert bucket.unlimited
+    started = time.monotonic()
+    bucket.consume(10 ** 9)
+    assert time.monotonic() - started < 0.05
+
+
+def test_rate_is_enforced():
+    bucket = TokenBucket(rate=100000, burst_seconds=0.1)
+    started = time.monotonic()
+    for _ in range(5):
+        bucket.consume(10000)
+    # 5 万字节在 10 万字节/秒下约需 0.5 秒
+    elapsed = time.monotonic() - started
+    assert 0.3 <= elapsed < 1.0
+
+
+def test_abort_ends_wait():
+    bucket = TokenBucket(rate=1000)
+    started = time.monotonic()
+    bucket.consume(100000, should_abort=lambda: True)
+    assert time.monotonic() - started < 0.1
+
+
+def test_set_rate_at_runtime():
+    bucket = TokenBucket(rate=1000)
+    assert bucket.rate == 1000
+    bucket.set_rate(0)
+    assert bucket.unlimited
+    started = time.monotonic()
+    bucket.consume(10 ** 6)
+    assert time.monotonic() - started < 0.05
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""下载失败后的恢复：策略排序，以及暂停、取消、停滞重连对恢复流程的中止"""
+
+import pytest
+
+pytest.importorskip('yt_dlp')
+
+from yt_dlp.utils import DownloadCancelled, DownloadError
+
+import src.downloader as downloader_module
+from src.downloader import DownloadManager, DownloadTask, TaskStatus
+from src.strategy import (
+    ERROR_FORBIDDEN,
+    ERROR_FORMAT_UNAVAILABLE,
+    STRATEGY_COOKIES,
+    STRATEGY_FALLBACK_FORMAT,
+    STRATEGY_REFRESH,
+    RecoveryStrategies,
+)
+
+FORBIDDEN = 'ERROR: unable to download video data: HTTP Error 403: Forbidden'
+
+
+class FakeCookieProvider:
+    def __init__(self):
+        self.failures = []
+        self.successes = []
+
+    def best_source(self, platform):
+        return 'chrome'
+
+    def mark_failure(self, platform, source):
+        self.failures.append((platform, source))
+
+    def mark_success(self, platform, source):
+        self.successes.append((platform, source))
+
+
+class FakeScheduler:
+    max_workers = 1
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, task_id, group='', priority=0):
+        self.submitted.append(task_id)
+        return True
+
+
+@pytest.fixture
+def cookies(monkeypatch):
+    provider = FakeCookieProvider()
+    monkeypatch.setattr(downloader_module, 'get_cookie_provider', lambda: provider)
+    return provider
+
+
+@pytest.fixture
+def manager(monkeypatch, cookies):
+    manager = DownloadManager(max_concurrent=1)
+    manager._recovery = RecoveryStrategies()
+    manager._scheduler = FakeScheduler()
+    monkeypatch.setattr(manager, '_build_ydl_opts', lambda *args, **kwargs: {})
+    monkeypatch.setattr(manager, '_reuse_partial_downloads', lambda task, opts: None)
+    monkeypatch.setattr(manager, '_forget_info', lambda task: None)
+    monkeypatch.setattr(manager, '_notify_progress', lambda task_id: None)
+    return manager
+
+
+@pytest.fixture
+def task(manager):
+    task = DownloadTask(
+        task_id='t1',
+        url='https://www.youtube.com/watch?v=abcdefghijk',
+        title='video',
+        platform='youtube',
+    )
+    task.status = TaskStatus.DOWNLOADING
+    manager._register_task(task)
+    return task
+
+
+def recover(manager, task, attempt_download, error_msg=FORBIDDEN):
+    return manager._recover(
+        task.task_id, task, manager._output_files.get(task.task_id), False,
+        attempt_download, error_msg,
+    )
+
+
+def recorded(manager):
+    return manager._recovery.get_stats().get('youtube', {}).get(ERROR_FORBIDDEN, {})
+
+
+def test_genuine_failures_try_every_strategy(manager, task, cookies):
+    calls = []
+
+    def attempt(opts):
+        calls.append(opts)
+        raise DownloadError('HTTP Error 403: Forbidden')
+
+    assert recover(manager, task, attempt) is False
+    assert len(calls) == 2
+    stats = recorded(manager)
+    assert stats[STRATEGY_COOKIES]['successes'] == 0
+    assert stats[STRATEGY_REFRESH]['successes'] == 0
+    assert cookies.failures == [('youtube', 'chrome')]
+
+
+def test_success_stops_recovery(manager, task, cookies):
+    calls = []
+
+    def attempt(opts):
+        calls.append(opts)
+
+    assert recover(manager, task, attempt) is True
+    assert len(calls) == 1
+    assert recorded(manager)[STRATEGY_COOKIES]['successes'] == 1
+    assert cookies.successes == [('youtube', 'chrome')]
+
+
+@pytest.mark.parametrize('interrupt', ['stall', 'pause', 'cancel'])
+def test_interrupted_attempt_ends_recovery_unrecorded(manager, task, cookies, interrupt):
+    calls = []
+
+    def attempt(opts):
+        calls.append(opts)
+        if interrupt == 'stall':
+            assert manager._on_stall(task.task_id)
+        elif interrupt == 'pause':
+            manager._pause_events[task.task_id].clear()
+        else:
+            manager._cancel_flags[task.task_id] = True
+        raise DownloadCancelled(interrupt)
+
+    assert recover(manager, task, attempt) is False
+    # 后续策略不再尝试，被中止的尝试不计为失败，cookies 来源也不降级
+    assert len(calls) == 1
+    assert recorded(manager) == {}
+    assert cookies.failures == []
+
+
+def test_stall_during_recovery_is_requeued(manager, task):
+    def attempt(opts):
+        manager._on_stall(task.task_id)
+        raise DownloadCancelled('stalled')
+
+    assert recover(manager, task, attempt) is False
+    manager._on_transfer_paused(task)
+
+    assert task.status == TaskStatus.PENDING
+    assert manager._scheduler.submitted == [task.task_id]
+    assert task.task_id not in manager._restart_requests
+    assert manager._resume_reasons[task.task_id]
+    assert not manager._transfer_interrupted(task.task_id)
+
+
+def test_pause_during_recovery_pauses_task(manager, task):
+    def attempt(opts):
+        manager._pause_events[task.task_id].clear()
+        raise DownloadCancelled('paused')
+
+    assert recover(manager, task, attempt) is False
+    manager._on_transfer_paused(task)
+
+    assert task.status == TaskStatus.PAUSED
+    assert manager._scheduler.submitted == []
+
+
+def test_unknown_error_is_not_recovered(manager, task):
+    calls = []
+    assert recover(manager, task, calls.append, 'ERROR: Unsupported URL') is False
+    assert calls == []
+
+
+class TestRecoveryStrategies:
+    def test_default_order(self):
+        strategies = RecoveryStrategies()
+        assert strategies.plan('youtube', ERROR_FORBIDDEN) == [STRATEGY_COOKIES, STRATEGY_REFRESH]
+        assert strategies.plan('youtube', ERROR_FORMAT_UNAVAILABLE) == [
+            STRATEGY_FALLBACK_FORMAT, STRATEGY_COOKIES,
+        ]
+        assert strategies.plan('youtube', ERROR_FORBIDDEN, exclude=(STRATEGY_COOKIES,)) == [
+            STRATEGY_REFRESH,
+        ]
+
+    def test_successful_strategy_moves_first(self):
+        strategies = RecoveryStrategies()
+        for _ in range(3):
+            strategies.record('youtube', ERROR_FORBIDDEN, STRATEGY_COOKIES, False, 0)
+            strategies.record('youtube', ERROR_FORBIDDEN, STRATEGY_REFRESH, True, 2.0)
+        assert strategies.plan('youtube', ERROR_FORBIDDEN)[0] == STRATEGY_REFRESH
+        # 统计按平台区分
+        assert strategies.plan('bilibili', ERROR_FORBIDDEN)[0] == STRATEGY_COOKIES
+
+    def test_hopeless_strategy_is_skipped(self, monkeypatch):
+        strategies = RecoveryStrategies()
+        for _ in range(10):
+            strategies.record('youtube', ERROR_FORBIDDEN, STRATEGY_COOKIES, False, 0)
+        monkeypatch.setattr('src.strategy.random.random', lambda: 0.99)
+        assert strategies.plan('youtube', ERROR_FORBIDDEN) == [STRATEGY_REFRESH]
+        monkeypatch.setattr('src.strategy.random.random', lambda: 0.0)
+        assert STRATEGY_COOKIES in strategies.plan('youtube', ERROR_FORBIDDEN)
+
+    def test_upfront_cookies(self):
+        strategies = RecoveryStrategies()
+        assert not strategies.use_cookies_upfront('youtube')
+        for _ in range(4):
+            strategies.record('youtube', ERROR_FORBIDDEN, STRATEGY_COOKIES, True, 1.0)
+        assert strategies.use_cookies_upfront('youtube')
+
+    def test_classify(self):
+        assert RecoveryStrategies.classify(FORBIDDEN) == ERROR_FORBIDDEN
+        assert RecoveryStrategies.classify(
+            'ERROR: Requested format is not available'
+        ) == ERROR_FORMAT_UNAVAILABLE
+        assert RecoveryStrategies.classify('ERROR: Unsupported URL') is None
+
+    def test_stats_are_persisted(self):
+        class Store:
+            def __init__(self):
+                self.rows = {}
+
+            def save_recovery_stat(self, platform, error_class, strategy, attempts, successes, seconds):
+                self.rows[(platform, error_class, strategy)] = {
+                    'platform': platform, 'error_class': error_class, 'strategy': strategy,
+                    'attempts': attempts, 'successes': successes, 'total_seconds': seconds,
+                }
+
+            def get_recovery_stats(self):
+                return list(self.rows.values())
+
+        store = Store()
+        RecoveryStrategies(store).record('youtube', ERROR_FORBIDDEN, STRATEGY_REFRESH, True, 1.0)
+        restored = RecoveryStrategies(store).get_stats()
+        assert restored['youtube'][ERROR_FORBIDDEN][STRATEGY_REFRESH]['successes'] == 1
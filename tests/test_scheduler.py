@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""调度器：固定大小的工作线程池、按平台分组的公平出队与优先级"""
+
+import threading
+import time
+
+from src.scheduler import AdaptiveConcurrencyController, DownloadScheduler
+
+
+class GatedRunner:
+    """记录执行顺序的任务函数，放行前任务一直占用工作线程"""
+
+    def __init__(self):
+        self.order = []
+        self.running = {}
+        self.peak = {}
+        self.gate = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, task_id: str) -> None:
+        group = task_id.split('-')[0]
+        with self._lock:
+            self.order.append(task_id)
+            self.running[group] = self.running.get(group, 0) + 1
+            self.peak[group] = max(self.peak.get(group, 0), self.running[group])
+        self.gate.wait(5)
+        with self._lock:
+            self.running[group] -= 1
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def drain(scheduler, runner, count):
+    runner.gate.set()
+    assert wait_until(lambda: len(runner.order) == count)
+    assert wait_until(lambda: not scheduler.get_stats()['active'])
+
+
+def test_global_limit_caps_concurrency():
+    runner = GatedRunner()
+    scheduler = DownloadScheduler(runner, max_workers=2)
+    for i in range(5):
+        scheduler.submit(f'youtube-{i}', 'youtube')
+    assert wait_until(lambda: len(runner.order) == 2)
+    time.sleep(0.1)
+    assert len(runner.order) == 2
+    # 等待中的任务不占用线程
+    stats = scheduler.get_stats()
+    assert (stats['active'], stats['workers'], stats['pending']) == (2, 2, 3)
+
+    drain(scheduler, runner, 5)
+    assert runner.peak['youtube'] == 2
+
+
+def test_resubmitting_active_task_requeues_after_run():
+    runner = GatedRunner()
+    scheduler = DownloadScheduler(runner, max_workers=1)
+    scheduler.submit('youtube-0', 'youtube')
+    assert wait_until(lambda: runner.order == ['youtube-0'])
+    assert scheduler.submit('youtube-0', 'youtube')
+    assert not scheduler.is_pending('youtube-0')
+
+    drain(scheduler, runner, 2)
+    assert runner.order == ['youtube-0', 'youtube-0']
+
+
+def test_groups_are_served_round_robin():
+    runner = GatedRunner()
+    scheduler = DownloadScheduler(runner, max_workers=1)
+    # 第一个任务占住唯一的线程，其余任务全部排队后再放行
+    scheduler.submit('warmup-0', 'warmup')
+    assert wait_until(lambda: runner.order == ['warmup-0'])
+    for i in range(4):
+        scheduler.submit(f'youtube-{i}', 'youtube')
+    for i in range(2):
+        scheduler.submit(f'bilibili-{i}', 'bilibili')
+    drain(scheduler, runner, 7)
+
+    groups = [task_id.split('-')[0] for task_id in runner.order[1:]]
+    # 排在前面的大批量分组不会饿死后来的分组
+    assert groups[:4] == ['youtube', 'bilibili', 'youtube', 'bilibili']
+    assert groups[4:] == ['youtube', 'youtube']
+
+
+def test_group_weights_share_slots_proportionally():
+    runner = GatedRunner()
+    scheduler = DownloadScheduler(runner, max_workers=1)
+    scheduler.set_group_weights({'youtube': 2})
+    scheduler.submit('warmup-0', 'warmup')
+    assert wait_until(lambda: runner.order == ['warmup-0'])
+    for i in range(4):
+        scheduler.submit(f'youtube-{i}', 'youtube')
+        scheduler.submit(f'bilibili-{i}', 'bilibili')
+    drain(scheduler, runner, 9)
+
+    groups = [task_id.split('-')[0] for task_id in runner.order[1:7]]
+    assert groups.count('youtube') == 4
+    assert groups.count('bilibili') == 2
+
+
+def test_group_limit_caps_concurrency():
+    runner = GatedRunner()
+    scheduler = DownloadScheduler(runner, max_workers=3)
+    scheduler.set_group_limits({'youtube': 1})
+    for i in range(3):
+        scheduler.submit(f'youtube-{i}', 'youtube')
+    scheduler.submit('bilibili-0', 'bilibili')
+
+    # youtube 只占一个槽位，空闲槽位留给其他分组
+    assert wait_until(lambda: len(runner.order) == 2)
+    time.sleep(0.1)
+    assert sorted(runner.order) == ['bilibili-0', 'youtube-0']
+    assert scheduler.pending_count == 2
+
+    drain(scheduler, runner, 4)
+    assert runner.peak['youtube'] == 1
+
+
+def test_priority_beats_group_rotation():
+    runner = GatedRunner()
+    scheduler = DownloadScheduler(runner, max_workers=1)
+    scheduler.submit('warmup-0', 'warmup')
+    assert wait_until(lambda: runner.order == ['warmup-0'])
+    scheduler.submit('youtube-0', 'youtube')
+    scheduler.submit('bilibili-0', 'bilibili')
+    scheduler.submit('youtube-1', 'youtube', priority=5)
+    drain(scheduler, runner, 4)
+
+    assert runner.order[1] == 'youtube-1'
+
+
+def test_move_to_top_within_group():
+    runner = GatedRunner()
+    scheduler = DownloadScheduler(runner, max_workers=1)
+    scheduler.submit('warmup-0', 'warmup')
+    assert wait_until(lambda: runner.order == ['warmup-0'])
+    for i in range(3):
+        scheduler.submit(f'youtube-{i}', 'youtube')
+    assert scheduler.move_to_top('youtube-2') == 0
+    assert scheduler.move_to_top('missing') is None
+    drain(scheduler, runner, 4)
+
+    assert runner.order[1:] == ['youtube-2', 'youtube-0', 'youtube-1']
+
+
+def test_move_to_top_beats_group_rotation():
+    runner = GatedRunner()
+    scheduler = DownloadScheduler(runner, max_workers=1)
+    scheduler.submit('warmup-0', 'warmup')
+    assert wait_until(lambda: runner.order == ['warmup-0'])
+    # 轮转会先选 bilibili，移到队首的 youtube 任务必须先开始
+    scheduler.submit('bilibili-0', 'bilibili')
+    scheduler.submit('youtube-0', 'youtube')
+    scheduler.submit('youtube-1', 'youtube')
+    assert scheduler.move_to_top('youtube-1') == 0
+    drain(scheduler, runner, 4)
+
+    assert runner.order[1] == 'youtube-1'
+
+
+def test_move_to_top_bypasses_group_limit():
+    runner = GatedRunner()
+    scheduler = DownloadScheduler(runner, max_workers=2)
+    scheduler.set_group_limits({'youtube': 1})
+    scheduler.submit('youtube-0', 'youtube')
+    scheduler.submit('youtube-1', 'youtube')
+    assert wait_until(lambda: runner.order == ['youtube-0'])
+    time.sleep(0.05)
+    assert scheduler.is_pending('youtube-1')
+
+    scheduler.move_to_top('youtube-1')
+    assert wait_until(lambda: runner.order == ['youtube-0', 'youtube-1'], timeout=1)
+    drain(scheduler, runner, 2)
+
+
+def test_last_moved_task_starts_first():
+    runner = GatedRunner()
+    scheduler = DownloadScheduler(runner, max_workers=1)
+    scheduler.submit('warmup-0', 'warmup')
+    assert wait_until(lambda: runner.order == ['warmup-0'])
+    scheduler.submit('youtube-0', 'youtube')
+    scheduler.submit('bilibili-0', 'bilibili')
+    scheduler.submit('x-0', 'x')
+    scheduler.move_to_top('youtube-0')
+    scheduler.move_to_top('x-0')
+    # 再次指定优先级后不再固定在队首
+    scheduler.move_to_top('bilibili-0')
+    scheduler.set_priority('bilibili-0', -1)
+    drain(scheduler, runner, 4)
+
+    assert runner.order[1:] == ['x-0', 'youtube-0', 'bilibili-0']
+
+
+def test_runner_exception_is_logged_and_frees_slot(caplog):
+    done = []
+
+    def runner(task_id):
+        if task_id == 'youtube-0':
+            raise RuntimeError('boom')
+        done.append(task_id)
+
+    scheduler = DownloadScheduler(runner, max_workers=1)
+    with caplog.at_level('ERROR', logger='src.scheduler'):
+        scheduler.submit('youtube-0', 'youtube')
+        scheduler.submit('youtube-1', 'youtube')
+        assert wait_until(lambda: done == ['youtube-1'])
+    assert 'youtube-0' in caplog.text
+    assert 'boom' in caplog.text
+
+
+class FixedScheduler:
+    """只记录并发上限的调度器替身"""
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self.pending_count = 0
+
+    def set_max_workers(self, max_workers):
+        self.max_workers = max_workers
+
+
+def test_error_spike_halves_concurrency_and_is_recorded():
+    scheduler = FixedScheduler(8)
+    controller = AdaptiveConcurrencyController(scheduler, lambda: [100.0] * 8, max_workers=8)
+    for _ in range(3):
+        controller.record_error()
+    controller.tick()
+
+    assert scheduler.max_workers == 4
+    decision = controller.get_stats()['decisions'][-1]
+    assert (decision['from'], decision['to'], decision['reason']) == (8, 4, 'error spike')
+    assert decision['errors'] == 3
+
+
+def test_saturated_rising_throughput_adds_worker():
+    scheduler = FixedScheduler(2)
+    scheduler.pending_count = 5
+    speeds = [[100.0, 100.0]]
+    controller = AdaptiveConcurrencyController(scheduler, lambda: speeds[0], max_workers=4)
+    controller.tick()
+    assert scheduler.max_workers == 3
+    assert controller.get_stats()['decisions'][-1]['reason'] == 'aggregate throughput rising'
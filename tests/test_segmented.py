@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""多连接分段下载"""
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from src.segmented import RangeNotSupported, SegmentedDownloader
+
+MB = 1024 * 1024
+
+
+class Response:
+    def __init__(self, status, body, headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self._body = body
+        self._offset = 0
+
+    def read(self, size):
+        chunk = self._body[self._offset:self._offset + size]
+        self._offset += len(chunk)
+        return chunk
+
+    def close(self):
+        pass
+
+
+class RangeServer:
+    """支持 Range 请求的文件服务替身"""
+
+    def __init__(self, data, ranges=True):
+        self.data = data
+        self.ranges = ranges
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def __call__(self, url, headers):
+        with self._lock:
+            self.requests.append(headers.get('Range'))
+        match = re.match(r'bytes=(\d+)-(\d+)', headers.get('Range') or '')
+        if not self.ranges or not match:
+            return Response(200, self.data)
+        start, end = int(match.group(1)), int(match.group(2))
+        return Response(206, self.data[start:end + 1], {
+            'Content-Range': f'bytes {start}-{end}/{len(self.data)}',
+        })
+
+
+@pytest.fixture
+def data():
+    return os.urandom(4 * MB + 123)
+
+
+def test_size_comes_from_range_probe(tmp_path, data):
+    server = RangeServer(data)
+    target = tmp_path / 'video.mp4'
+    downloader = SegmentedDownloader('https://video.twimg.com/v.mp4', target, 0, server, connections=4)
+
+    assert downloader.download() == target
+    assert target.read_bytes() == data
+    assert downloader.total_bytes == len(data)
+    # 一次探测加四个分段
+    assert len(server.requests) == 5
+    assert not any(path.exists() for path in SegmentedDownloader.temp_paths(target))
+
+
+def test_server_without_range_support(tmp_path, data):
+    downloader = SegmentedDownloader('https://example.com/v.mp4', tmp_path / 'v.mp4', 0,
+                                     RangeServer(data, ranges=False))
+    with pytest.raises(RangeNotSupported):
+        downloader.download()
+
+
+def test_progress_hook_calls_are_serialized_and_monotonic(tmp_path, data):
+    reports = []
+    state = {'inside': 0, 'overlap': False}
+
+    def hook(report):
+        state['inside'] += 1
+        if state['inside'] > 1:
+            state['overlap'] = True
+        # 模拟在限速桶中等待
+        time.sleep(0.002)
+        reports.append(report)
+        state['inside'] -= 1
+
+    downloader = SegmentedDownloader('https://example.com/v.mp4', tmp_path / 'v.mp4', len(data),
+                                     RangeServer(data), connections=4, progress_hook=hook)
+    downloader.REPORT_BYTES = 64 * 1024
+    downloader.download()
+
+    assert not state['overlap']
+    downloaded = [report['downloaded_bytes'] for report in reports]
+    assert downloaded == sorted(downloaded)
+    assert reports[-1]['status'] == 'finished'
+    assert all('tmpfilename' not in report for report in reports)
+
+
+def test_resume_downloads_only_missing_ranges(tmp_path, data):
+    target = tmp_path / 'v.mp4'
+    part_path, state_path = SegmentedDownloader.temp_paths(target)
+    half = len(data) // 2
+    with open(part_path, 'wb') as f:
+        f.write(data[:MB])
+        f.truncate(len(data))
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'total_bytes': len(data),
+            'segments': [[0, half - 1, MB], [half, len(data) - 1, 0]],
+        }, f)
+
+    server = RangeServer(data)
+    SegmentedDownloader('https://example.com/v.mp4', target, 0, server).download()
+
+    assert target.read_bytes() == data
+    # 续传前重新探测，已下载的部分不再请求
+    assert server.requests[0] == 'bytes=0-0'
+    assert sorted(server.requests[1:]) == sorted([
+        f'bytes={MB}-{half - 1}',
+        f'bytes={half}-{len(data) - 1}',
+    ])
+
+
+class SegmentYDL:
+    def __init__(self, server, fallbacks):
+        self.server = server
+        self.fallbacks = fallbacks
+
+    def urlopen(self, request):
+        return self.server(request.url, request.headers)
+
+    def process_ie_result(self, info, download=True):
+        self.fallbacks.append(info)
+
+
+class SegmentPool:
+    def __init__(self, server):
+        self.server = server
+        self.fallbacks = []
+
+    @contextmanager
+    def lease(self, opts):
+        yield SegmentYDL(self.server, self.fallbacks)
+
+
+def test_manager_segments_format_without_filesize(tmp_path, data, monkeypatch):
+    pytest.importorskip('yt_dlp')
+    import src.downloader as downloader_module
+    from src.config import get_config
+    from src.downloader import DownloadManager, DownloadTask
+
+    manager = DownloadManager(max_concurrent=1)
+    task = DownloadTask(task_id='x1', url='https://x.com/user/status/1', title='clip',
+                        platform='twitter', output_format='mp4')
+    # X 的 http 格式：提取结果中没有 filesize
+    info = {'id': '1', 'ext': 'mp4', 'protocol': 'https',
+            'url': 'https://video.twimg.com/ext_tw_video/1/vid/720x1280/a.mp4'}
+    pool = SegmentPool(RangeServer(data))
+    monkeypatch.setattr(downloader_module, 'get_ydl_pool', lambda: pool)
+    monkeypatch.setattr(manager, '_extract_task_info', lambda ydl, task: info)
+    monkeypatch.setitem(get_config()._config, 'segmented_min_size', MB)
+    reports = []
+
+    manager._download_segmented(task, tmp_path / 'clip.mp4', {'progress_hooks': [reports.append]})
+
+    assert pool.fallbacks == []
+    assert task.output_path == tmp_path / 'clip.mp4'
+    assert task.output_path.read_bytes() == data
+    assert reports[-1]['total_bytes'] == len(data)
+
+
+def test_manager_falls_back_below_min_size(tmp_path, data, monkeypatch):
+    pytest.importorskip('yt_dlp')
+    import src.downloader as downloader_module
+    from src.config import get_config
+    from src.downloader import DownloadManager, DownloadTask
+
+    manager = DownloadManager(max_concurrent=1)
+    task = DownloadTask(task_id='x1', url='https://x.com/user/status/1', title='clip',
+                        platform='twitter', output_format='mp4')
+    info = {'id': '1', 'ext': 'mp4', 'protocol': 'https', 'url': 'https://video.twimg.com/a.mp4'}
+    pool = SegmentPool(RangeServer(data))
+    monkeypatch.setattr(downloader_module, 'get_ydl_pool', lambda: pool)
+    monkeypatch.setattr(manager, '_extract_task_info', lambda ydl, task: info)
+    monkeypatch.setitem(get_config()._config, 'segmented_min_size', 64 * MB)
+
+    manager._download_segmented(task, tmp_path / 'clip.mp4', {'progress_hooks': [lambda d: None]})
+
+    # 探测得到的大小低于阈值，交给 yt-dlp 常规下载
+    assert pool.fallbacks == [info]
+    assert not (tmp_path / 'clip.mp4').exists()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""分片并发调优"""
+
+import pytest
+
+from src.tuning import FragmentTuner
+
+FRAGMENT = 1024 * 1024
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr('src.tuning.time.monotonic', clock)
+    return clock
+
+
+def download(tuner, clock, task_id, concurrency, seconds_per_fragment, fragments=10):
+    """模拟一次分片下载：每个分片间隔 seconds_per_fragment 秒完成"""
+    for index in range(1, fragments + 1):
+        clock.now += seconds_per_fragment
+        tuner.observe('youtube', task_id, index, concurrency, index * FRAGMENT)
+    tuner.forget(task_id)
+
+
+def fixed_bandwidth(concurrency):
+    """带宽受限：无论并发多少，每秒完成 4 个分片"""
+    return 0.25
+
+
+def latency_bound(concurrency):
+    """延迟受限：每个分片 1 秒，并发越高完成越快，直到 8 个并发占满带宽"""
+    return 1.0 / min(concurrency, 8)
+
+
+def tune(tuner, clock, link, rounds=8, default=1):
+    used = []
+    for round_index in range(rounds):
+        concurrency = tuner.recommend('youtube', default)
+        used.append(concurrency)
+        download(tuner, clock, f't{round_index}', concurrency, link(concurrency))
+    return used
+
+
+def test_default_until_enough_samples(clock):
+    tuner = FragmentTuner()
+    assert tuner.recommend('youtube', 3) == 3
+    download(tuner, clock, 't1', 3, 0.5, fragments=3)
+    assert tuner.recommend('youtube', 3) == 3
+
+
+def test_fixed_bandwidth_does_not_run_away(clock):
+    tuner = FragmentTuner()
+    used = tune(tuner, clock, fixed_bandwidth)
+    # 试探一次更高并发，吞吐没有提升后回到较低的并发数
+    assert used[:3] == [1, 2, 1]
+    assert set(used[2:]) == {1}
+    assert max(used) < FragmentTuner.MAX_CONCURRENCY
+
+
+def test_latency_bound_link_climbs_until_saturated(clock):
+    tuner = FragmentTuner()
+    used = tune(tuner, clock, latency_bound)
+    assert used[:5] == [1, 2, 4, 8, 16]
+    assert used[-1] == 8
+    assert tuner.get_stats()['youtube']['best'] == 8
+
+
+def test_platforms_are_tuned_separately(clock):
+    tuner = FragmentTuner()
+    download(tuner, clock, 't1', 1, 1.0)
+    assert tuner.recommend('youtube', 1) == 2
+    assert tuner.recommend('bilibili', 1) == 1
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""传输监控：停滞与限速判断"""
+
+import pytest
+
+from src.watchdog import TransferWatchdog
+
+MB = 1024 * 1024
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr('src.watchdog.time.monotonic', clock)
+    # 不启动监控线程，由测试直接驱动检查
+    monkeypatch.setattr(TransferWatchdog, '_run', lambda self: None)
+    return clock
+
+
+def make_watchdog(timeout=0, detect_throttle=False):
+    return TransferWatchdog(
+        lambda task_id: True,
+        lambda task_id: True,
+        timeout=timeout,
+        detect_throttle=detect_throttle,
+    )
+
+
+def run(watchdog, clock, transfers, seconds, step=5):
+    """
+    按固定速度推进所有传输并定期检查
+
+    Args:
+        transfers: {task_id: [已下载字节数, 速度]}
+    """
+    found = []
+    for _ in range(int(seconds / step)):
+        clock.now += step
+        for task_id, state in transfers.items():
+            state[0] += state[1] * step
+            watchdog.observe(task_id, 'youtube', 'video.mp4.part', int(state[0]), 1024 * MB)
+        with watchdog._lock:
+            found.extend(watchdog._collect(clock.now))
+    return found
+
+
+def test_stall_detected_after_timeout(clock):
+    watchdog = make_watchdog(timeout=60)
+    watchdog.observe('t1', 'youtube', 'video.mp4.part', 1 * MB)
+    clock.now += 30
+    # 新增不足 MIN_PROGRESS_BYTES 不算有进展
+    watchdog.observe('t1', 'youtube', 'video.mp4.part', 1 * MB + 1000)
+    with watchdog._lock:
+        assert watchdog._collect(clock.now) == []
+    clock.now += 31
+    with watchdog._lock:
+        assert watchdog._collect(clock.now) == [('stall', 't1', 'youtube')]
+        # 上报后停止监控，直到下一次进度
+        assert watchdog._collect(clock.now + 120) == []
+
+
+def test_progress_resets_stall_timer(clock):
+    watchdog = make_watchdog(timeout=60)
+    downloaded = 0
+    for _ in range(10):
+        clock.now += 30
+        downloaded += 64 * 1024
+        watchdog.observe('t1', 'youtube', 'video.mp4.part', downloaded)
+        with watchdog._lock:
+            assert watchdog._collect(clock.now) == []
+
+
+def test_forget_stops_watching(clock):
+    watchdog = make_watchdog(timeout=60)
+    watchdog.observe('t1', 'youtube', 'video.mp4.part', 0)
+    watchdog.forget('t1')
+    with watchdog._lock:
+        assert watchdog._collect(clock.now + 300) == []
+
+
+def test_throttle_detected_after_speed_drop(clock):
+    watchdog = make_watchdog(detect_throttle=True)
+    transfers = {'t1': [0, 2 * MB]}
+    assert run(watchdog, clock, transfers, 60) == []
+    transfers['t1'][1] = 50 * 1024
+    assert ('throttle', 't1', 'youtube') in run(watchdog, clock, transfers, 40)
+
+
+def test_fast_transfer_is_never_throttled(clock):
+    watchdog = make_watchdog(detect_throttle=True)
+    transfers = {'t1': [0, 8 * MB]}
+    run(watchdog, clock, transfers, 60)
+    # 降速明显，但仍高于 THROTTLE_CEILING
+    transfers['t1'][1] = 1 * MB
+    assert run(watchdog, clock, transfers, 60) == []
+
+
+def test_sharing_bandwidth_is_not_throttling(clock):
+    watchdog = make_watchdog(detect_throttle=True)
+    # 慢速链路：单个任务独占 200 KB/s
+    transfers = {'t1': [0, 200 * 1024]}
+    assert run(watchdog, clock, transfers, 60) == []
+    # 又开始三个任务，每个任务只分到四分之一
+    for task_id in ('t2', 't3', 't4'):
+        transfers[task_id] = [0, 50 * 1024]
+    transfers['t1'][1] = 50 * 1024
+    assert run(watchdog, clock, transfers, 120) == []
+
+
+def test_throttle_detection_disabled(clock):
+    watchdog = make_watchdog(timeout=60)
+    transfers = {'t1': [0, 2 * MB]}
+    run(watchdog, clock, transfers, 60)
+    transfers['t1'][1] = 50 * 1024
+    assert run(watchdog, clock, transfers, 60) == []
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""YoutubeDL 实例池"""
+
+import pytest
+
+yt_dlp = pytest.importorskip('yt_dlp')
+
+from src.ydlpool import YoutubeDLPool
+
+
+class FakeYDL:
+    def __init__(self, opts):
+        self.opts = opts
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def report(self, d):
+        for hook in self.opts['progress_hooks']:
+            hook(d)
+
+
+@pytest.fixture
+def pool():
+    return YoutubeDLPool(factory=FakeYDL)
+
+
+def test_same_options_reuse_instance(pool):
+    with pool.lease({'format': 'best'}) as first:
+        pass
+    with pool.lease({'format': 'best', 'progress_hooks': [print]}) as second:
+        pass
+    with pool.lease({'format': 'worst'}) as third:
+        pass
+    assert second is first
+    assert third is not first
+    assert pool.get_stats() == {'profiles': 2, 'idle': 2, 'created': 2, 'reused': 1}
+
+
+def test_concurrent_leases_get_separate_instances(pool):
+    with pool.lease({}) as first, pool.lease({}) as second:
+        assert first is not second
+    assert pool.get_stats()['idle'] == 2
+
+
+def test_hooks_apply_only_to_current_lease(pool):
+    seen = []
+    with pool.lease({'progress_hooks': [seen.append]}) as ydl:
+        ydl.report({'status': 'downloading'})
+    with pool.lease({}) as ydl:
+        ydl.report({'status': 'finished'})
+    assert seen == [{'status': 'downloading'}]
+
+
+def test_download_error_returns_instance_other_errors_close_it(pool):
+    with pytest.raises(yt_dlp.utils.DownloadError):
+        with pool.lease({}) as kept:
+            raise yt_dlp.utils.DownloadError('HTTP Error 403')
+    with pytest.raises(yt_dlp.utils.DownloadCancelled):
+        with pool.lease({}) as dropped:
+            assert dropped is kept
+            raise yt_dlp.utils.DownloadCancelled()
+    assert dropped.closed
+    assert pool.get_stats()['idle'] == 0
+
+
+def test_idle_instances_expire(pool, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('src.ydlpool.time.monotonic', lambda: now[0])
+    with pool.lease({}) as old:
+        pass
+    now[0] += YoutubeDLPool.IDLE_TIMEOUT + 1
+    with pool.lease({}) as new:
+        pass
+    assert old.closed
+    assert new is not old
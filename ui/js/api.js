@@ -37,9 +37,27 @@ const API = {
     // ==================== URL 解析 ====================
 
     // 解析视频 URL
-    async parseUrl(url) {
+    async parseUrl(url, forceRefresh = false) {
         if (!this._api) await this.init();
-        return await this._api.parse_url(url);
+        return await this._api.parse_url(url, forceRefresh);
+    },
+
+    // 批量解析 URL（结果通过 window.onParseResult 逐个推送）
+    async parseUrls(urls, forceRefresh = false) {
+        if (!this._api) await this.init();
+        return await this._api.parse_urls(urls, forceRefresh);
+    },
+
+    // 展开播放列表 / 频道（条目通过 window.onPlaylistEntries 分批推送）
+    async expandUrl(url) {
+        if (!this._api) await this.init();
+        return await this._api.expand_url(url);
+    },
+
+    // 停止展开
+    async cancelExpansion(expansionId) {
+        if (!this._api) await this.init();
+        return await this._api.cancel_expansion(expansionId);
     },
 
     // 验证 URL
@@ -64,7 +82,8 @@ const API = {
         hasAudio = true,
         hasVideo = true,
         formatExt = '',
-        historyId = null
+        historyId = null,
+        priority = 0
     ) {
         if (!this._api) await this.init();
         return await this._api.start_download(
@@ -80,7 +99,8 @@ const API = {
             hasAudio,
             hasVideo,
             formatExt,
-            historyId
+            historyId,
+            priority
         );
     },
 
@@ -102,6 +122,30 @@ const API = {
         return await this._api.cancel_download(taskId);
     },
 
+    // 设置任务优先级
+    async setTaskPriority(taskId, priority) {
+        if (!this._api) await this.init();
+        return await this._api.set_task_priority(taskId, priority);
+    },
+
+    // 设置单任务限速（字节/秒）
+    async setTaskRateLimit(taskId, rateLimit) {
+        if (!this._api) await this.init();
+        return await this._api.set_task_rate_limit(taskId, rateLimit);
+    },
+
+    // 将等待中的任务移到队首
+    async moveTaskToTop(taskId) {
+        if (!this._api) await this.init();
+        return await this._api.move_task_to_top(taskId);
+    },
+
+    // 重排等待中的任务
+    async reorderTasks(taskIds) {
+        if (!this._api) await this.init();
+        return await this._api.reorder_tasks(taskIds);
+    },
+
     // 移除任务
     async removeTask(taskId) {
         if (!this._api) await this.init();
@@ -120,6 +164,18 @@ const API = {
         return await this._api.get_all_tasks();
     },
 
+    // 获取指定版本之后变化的任务（epoch 为上次结果中的纪元）
+    async getChangesSince(version = 0, epoch = '') {
+        if (!this._api) await this.init();
+        return await this._api.get_changes_since(version, epoch);
+    },
+
+    // 获取下载队列状态
+    async getQueueStats() {
+        if (!this._api) await this.init();
+        return await this._api.get_queue_stats();
+    },
+
     // 清除已完成任务
     async clearCompleted() {
         if (!this._api) await this.init();
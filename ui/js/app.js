@@ -22,16 +22,30 @@ const App = {
     },
     settings: {},
     appInfo: {},
+    parseBatch: null,
+    playlist: null,
   },
   elements: {},
   historyRefreshAt: 0,
   historyRefreshInFlight: false,
+  // 任务数超过阈值时只渲染可视区域附近的行
+  taskVirtualThreshold: 50,
+  taskOverscan: 8,
+  taskRowPitch: 108,
+  taskView: { tasks: [], start: 0, end: 0 },
+  taskScrollFrame: null,
+  // 增量维护的任务汇总，刷新统计时无需遍历全部任务
+  taskTotals: { active: 0, paused: 0, unfinished: 0, speed: 0 },
 
   init() {
     this.injectSidebars();
     this.cacheElements();
     this.bindEvents();
-    window.onDownloadProgress = (task) => this.onDownloadProgress(task);
+    window.onDownloadProgressBatch = (frame) =>
+      this.onDownloadProgressBatch(frame);
+    window.onParseResult = (payload) => this.onParseResult(payload);
+    window.onParseBatchDone = (payload) => this.onParseBatchDone(payload);
+    window.onPlaylistEntries = (payload) => this.onPlaylistEntries(payload);
     Router.init((route) => this.onRouteChange(route));
     API.init().then(() => this.bootstrap());
   },
@@ -61,6 +75,7 @@ const App = {
       selectionSummary: get("selection-summary"),
       detailsDiskSpace: get("details-disk-space"),
       tasksList: get("tasks-list"),
+      tasksScroll: get("tasks-scroll"),
       tasksSearch: get("tasks-search"),
       statActive: get("stat-active"),
       statPaused: get("stat-paused"),
@@ -88,6 +103,11 @@ const App = {
       aboutVersion: get("about-version"),
       toastContainer: get("toast-container"),
       launchAnalysis: get("launch-analysis"),
+      playlistPanel: get("playlist-panel"),
+      playlistSummary: get("playlist-summary"),
+      playlistEntries: get("playlist-entries"),
+      playlistSelectAll: get("playlist-select-all"),
+      playlistQueueBtn: get("playlist-queue-btn"),
       settingsLanguage: get("settings-language"),
     };
   },
@@ -175,6 +195,26 @@ const App = {
       }
     });
 
+    if (this.elements.playlistPanel) {
+      this.elements.playlistEntries.addEventListener("change", (event) => {
+        const checkbox = event.target.closest("[data-playlist-index]");
+        if (!checkbox || !this.state.playlist) return;
+        const index = Number(checkbox.dataset.playlistIndex);
+        if (checkbox.checked) {
+          this.state.playlist.selected.add(index);
+        } else {
+          this.state.playlist.selected.delete(index);
+        }
+        this.updatePlaylistSummary();
+      });
+      this.elements.playlistSelectAll.addEventListener("click", () =>
+        this.togglePlaylistSelection()
+      );
+      this.elements.playlistQueueBtn.addEventListener("click", () =>
+        this.queuePlaylistSelection()
+      );
+    }
+
     this.elements.detailsRefresh.addEventListener("click", () => {
       if (this.state.currentUrl) {
         this.parseUrl(this.state.currentUrl);
@@ -356,6 +396,20 @@ const App = {
       }
     });
 
+    if (this.elements.tasksScroll) {
+      const scheduleWindow = () => {
+        if (this.taskScrollFrame || this.state.filter === "history") return;
+        this.taskScrollFrame = requestAnimationFrame(() => {
+          this.taskScrollFrame = null;
+          this.renderTaskWindow();
+        });
+      };
+      this.elements.tasksScroll.addEventListener("scroll", scheduleWindow, {
+        passive: true,
+      });
+      window.addEventListener("resize", scheduleWindow);
+    }
+
     this.elements.settingsVideoQuality.addEventListener("change", () =>
       this.saveSettings()
     );
@@ -505,15 +559,38 @@ const App = {
   async loadTasks() {
     const tasks = await API.getAllTasks();
     this.state.tasks.clear();
-    (tasks || []).forEach((task) => {
-      this.state.tasks.set(task.task_id, task);
-    });
+    this.taskTotals = { active: 0, paused: 0, unfinished: 0, speed: 0 };
+    (tasks || []).forEach((task) => this.setTask(task));
+  },
+
+  accumulateTask(task, sign) {
+    if (!task) return;
+    const totals = this.taskTotals;
+    if (["downloading", "pending"].includes(task.status)) {
+      totals.active += sign;
+    }
+    if (task.status === "paused") {
+      totals.paused += sign;
+    }
+    if (task.status !== "completed") {
+      totals.unfinished += sign;
+    }
+    totals.speed += sign * (task.progress?.speed || 0);
+  },
+
+  setTask(task) {
+    this.accumulateTask(this.state.tasks.get(task.task_id), -1);
+    this.state.tasks.set(task.task_id, task);
+    this.accumulateTask(task, 1);
+  },
+
+  deleteTask(taskId) {
+    this.accumulateTask(this.state.tasks.get(taskId), -1);
+    this.state.tasks.delete(taskId);
   },
 
   syncDownloadCount() {
-    const count = Array.from(this.state.tasks.values()).filter(
-      (task) => task.status !== "completed"
-    ).length;
+    const count = this.taskTotals.unfinished;
     if (this.elements.homeDownloadCounts) {
       this.elements.homeDownloadCounts.forEach((node) => {
         node.textContent = count;
@@ -529,9 +606,105 @@ const App = {
     }
     this.showHomeError("");
     this.setLaunchLoading(true);
+    // 一次粘贴多个链接时批量解析，解析完成的视频按默认画质直接加入下载
+    const urls = url.split(/\s+/).filter(Boolean);
+    if (urls.length > 1) {
+      await this.parseBatch(urls);
+      return;
+    }
     await this.parseUrl(url);
   },
 
+  async parseBatch(urls) {
+    const response = await API.parseUrls(urls);
+    this.setLaunchLoading(false);
+    if (!response?.success) {
+      this.showHomeError(response?.error || "");
+      return;
+    }
+    this.state.parseBatch = {
+      id: response.batch_id,
+      queued: 0,
+      failed: 0,
+      chain: Promise.resolve(),
+    };
+    this.elements.homeUrlInput.value = "";
+    this.showToast(
+      STRINGS.info?.parseBatchTitle || "Batch parsing",
+      this.formatString(
+        STRINGS.info?.parseBatchStarted ||
+          "{count} links, {duplicates} duplicates skipped",
+        {
+          count: response.unique,
+          duplicates: response.total - response.unique,
+        }
+      )
+    );
+  },
+
+  onParseResult(payload) {
+    const batch = this.state.parseBatch;
+    if (!batch || payload?.batch_id !== batch.id) return;
+    // 串行创建任务，保证批次结束时所有任务都已加入
+    batch.chain = batch.chain.then(async () => {
+      const info = payload.result;
+      const queued = info && !info.error && (await this.queueParsedVideo(info));
+      if (queued) {
+        batch.queued += 1;
+      } else {
+        batch.failed += 1;
+      }
+    });
+  },
+
+  async onParseBatchDone(payload) {
+    const batch = this.state.parseBatch;
+    if (!batch || payload?.batch_id !== batch.id) return;
+    await batch.chain;
+    this.state.parseBatch = null;
+    this.renderTasks();
+    this.syncDownloadCount();
+    this.showToast(
+      STRINGS.info?.parseBatchTitle || "Batch parsing",
+      this.formatString(
+        STRINGS.info?.parseBatchDone ||
+          "{queued} tasks queued, {failed} failed to parse",
+        { queued: batch.queued, failed: batch.failed }
+      ),
+      batch.failed > 0 && batch.queued === 0
+    );
+    if (batch.queued > 0) Router.navigate("downloads");
+  },
+
+  // 按默认画质为解析结果创建下载任务（视频+音频，输出 mp4）
+  async queueParsedVideo(info) {
+    const formats = info.formats || [];
+    const format =
+      this.pickBestFormat(formats.filter((item) => item.has_video)) ||
+      formats[0];
+    if (!format) return false;
+    const response = await API.startDownload(
+      info.url,
+      format.format_id,
+      "mp4",
+      info.title,
+      info.thumbnail || "",
+      info.platform || "",
+      format.quality_label || "",
+      format.resolution || "",
+      true,
+      !!format.has_audio,
+      !!format.has_video,
+      format.ext || ""
+    );
+    if (!response?.task_id) return false;
+    const task = await API.getTask(response.task_id);
+    if (task && !task.error) {
+      this.setTask(task);
+    }
+    return true;
+  },
+
   async parseUrl(url) {
     this.elements.homeDownloadBtn.disabled = true;
     this.elements.homeDownloadBtn.classList.add("opacity-70");
@@ -545,6 +718,11 @@ const App = {
       return;
     }
 
+    if (result?.collection) {
+      await this.expandPlaylist(url);
+      return;
+    }
+
     this.state.currentUrl = url;
     this.state.videoInfo = result;
     this.state.formats = result.formats || [];
@@ -565,6 +743,113 @@ const App = {
     Router.navigate("video-details");
   },
 
+  // 合集条目分批到达，只有选中并加入下载的条目才会完整解析
+  async expandPlaylist(url) {
+    if (this.state.playlist?.id && !this.state.playlist.done) {
+      API.cancelExpansion(this.state.playlist.id);
+    }
+    this.setLaunchLoading(true);
+    const response = await API.expandUrl(url);
+    if (!response?.success) {
+      this.setLaunchLoading(false);
+      this.showHomeError(response?.error || "");
+      return;
+    }
+    this.state.playlist = {
+      id: response.expansion_id,
+      entries: [],
+      selected: new Set(),
+      done: false,
+    };
+    this.elements.playlistEntries.innerHTML = "";
+    this.elements.playlistPanel.classList.remove("hidden");
+    this.updatePlaylistSummary();
+  },
+
+  onPlaylistEntries(payload) {
+    const playlist = this.state.playlist;
+    if (!playlist || payload?.expansion_id !== playlist.id) return;
+    this.setLaunchLoading(false);
+    const entries = payload.entries || [];
+    entries.forEach((entry) => {
+      playlist.entries.push(entry);
+      playlist.selected.add(entry.index);
+    });
+    if (entries.length) {
+      this.elements.playlistEntries.insertAdjacentHTML(
+        "beforeend",
+        entries.map((entry) => this.renderPlaylistEntry(entry)).join("")
+      );
+    }
+    if (payload.done) {
+      playlist.done = true;
+      if (payload.error) this.showHomeError(payload.error);
+    }
+    this.updatePlaylistSummary();
+  },
+
+  renderPlaylistEntry(entry) {
+    return `
+      <label class="flex items-center gap-3 px-4 py-2 cursor-pointer hover:bg-gray-50 dark:hover:bg-gray-800/50">
+        <input type="checkbox" class="rounded text-primary focus:ring-primary" data-playlist-index="${
+          entry.index
+        }" checked />
+        <span class="text-[11px] text-gray-400 w-8 shrink-0">${entry.index}</span>
+        <span class="flex-1 text-sm text-[#121617] dark:text-white truncate">${this.escapeHtml(
+          entry.title || entry.url
+        )}</span>
+        <span class="text-[11px] text-[#658086] shrink-0">${this.escapeHtml(
+          entry.duration_str || ""
+        )}</span>
+      </label>
+    `;
+  },
+
+  updatePlaylistSummary() {
+    const playlist = this.state.playlist;
+    if (!playlist) return;
+    const strings = STRINGS.ui?.home || {};
+    const template = playlist.done
+      ? strings.playlistSummary || "{count} videos, {selected} selected"
+      : strings.playlistLoading || "{count} videos listed, loading more...";
+    this.elements.playlistSummary.textContent = this.formatString(template, {
+      count: playlist.entries.length,
+      selected: playlist.selected.size,
+    });
+    this.elements.playlistQueueBtn.disabled = playlist.selected.size === 0;
+  },
+
+  togglePlaylistSelection() {
+    const playlist = this.state.playlist;
+    if (!playlist) return;
+    const selectAll = playlist.selected.size < playlist.entries.length;
+    playlist.selected = new Set(
+      selectAll ? playlist.entries.map((entry) => entry.index) : []
+    );
+    this.elements.playlistEntries
+      .querySelectorAll("[data-playlist-index]")
+      .forEach((checkbox) => {
+        checkbox.checked = selectAll;
+      });
+    this.updatePlaylistSummary();
+  },
+
+  async queuePlaylistSelection() {
+    const playlist = this.state.playlist;
+    if (!playlist || !playlist.selected.size) return;
+    if (!playlist.done) {
+      API.cancelExpansion(playlist.id);
+    }
+    const urls = playlist.entries
+      .filter((entry) => playlist.selected.has(entry.index))
+      .map((entry) => entry.url);
+    this.state.playlist = null;
+    this.elements.playlistPanel.classList.add("hidden");
+    this.elements.playlistEntries.innerHTML = "";
+    this.setLaunchLoading(true);
+    await this.parseBatch(urls);
+  },
+
   setLaunchLoading(isLoading) {
     if (!this.elements.launchAnalysis) return;
     if (isLoading) {
@@ -810,7 +1095,7 @@ const App = {
     if (response?.task_id) {
       const task = await API.getTask(response.task_id);
       if (task && !task.error) {
-        this.state.tasks.set(task.task_id, task);
+        this.setTask(task);
         this.renderTasks();
         this.syncDownloadCount();
         this.showToast(
@@ -832,40 +1117,172 @@ const App = {
     return "mp4";
   },
 
-  async onDownloadProgress(task) {
-    if (!task?.task_id) return;
-    this.state.tasks.set(task.task_id, task);
-    this.renderTasks();
-    this.syncDownloadCount();
-    if (task.status === "completed") {
+  // 批量增量帧：{version, tasks: {task_id: 变化字段}, removed: [task_id]}
+  async onDownloadProgressBatch(frame) {
+    if (!frame) return;
+    const completed = [];
+    const missing = [];
+    const patched = [];
+    let relayout = (frame.removed || []).length > 0;
+    Object.entries(frame.tasks || {}).forEach(([taskId, delta]) => {
+      const current = this.state.tasks.get(taskId);
+      if (!current && !delta.url) {
+        // 本地没有该任务的完整状态（如页面刚重新加载），单独拉取
+        missing.push(taskId);
+        return;
+      }
+      if ((current?.version || 0) > (delta.version || 0)) return;
+      const merged = this.mergeTaskDelta(current || {}, delta);
+      if (merged.status === "completed" && current?.status !== "completed") {
+        completed.push(merged);
+      }
+      this.setTask(merged);
+      if (this.isRowDelta(current, delta)) {
+        patched.push(merged);
+      } else {
+        relayout = true;
+      }
+    });
+    (frame.removed || []).forEach((taskId) => this.deleteTask(taskId));
+    for (const taskId of missing) {
+      const task = await API.getTask(taskId);
+      if (task && !task.error) {
+        this.setTask(task);
+        relayout = true;
+      }
+    }
+    if (relayout) {
+      this.renderTasks();
+      this.syncDownloadCount();
+    } else {
+      // 只有进度类字段变化：原地更新对应行，不重建列表
+      patched.forEach((task) => this.patchTaskRow(task));
+      this.updateStats();
+    }
+    completed.forEach((task) => {
       this.showToast(
         STRINGS.info?.downloadCompletedTitle || "Download completed",
         task.title
       );
+    });
+  },
+
+  mergeTaskDelta(task, delta) {
+    const merged = { ...task, ...delta };
+    if (delta.progress) {
+      merged.progress = { ...(task.progress || {}), ...delta.progress };
     }
+    return merged;
+  },
+
+  // 仅包含这些字段的增量可以原地更新行，其余字段变化需要重新排版列表
+  isRowDelta(current, delta) {
+    if (!current) return false;
+    return Object.keys(delta).every((key) =>
+      ["progress", "stage", "version"].includes(key)
+    );
   },
 
   renderTasks() {
-    this.updateStats([]);
+    this.updateStats();
     if (this.state.filter === "history") {
       this.toggleHistoryControls(true);
       this.refreshHistory();
       return;
     }
     this.toggleHistoryControls(false);
-    const tasks = this.getFilteredTasks();
+    this.taskView.tasks = this.getFilteredTasks();
+    this.taskView.start = -1;
+    this.renderTaskWindow();
+  },
+
+  renderTaskWindow() {
+    const list = this.elements.tasksList;
+    const tasks = this.taskView.tasks;
     if (!tasks.length) {
       const emptyTasks =
         STRINGS.labels?.noTasks || "No tasks available.";
-      this.elements.tasksList.innerHTML = `<div class="bg-white dark:bg-[#25282c] p-6 rounded-xl border border-gray-100 dark:border-gray-700/50 text-center text-sm text-gray-500">${this.escapeHtml(
+      list.innerHTML = `<div class="bg-white dark:bg-[#25282c] p-6 rounded-xl border border-gray-100 dark:border-gray-700/50 text-center text-sm text-gray-500">${this.escapeHtml(
         emptyTasks
       )}</div>`;
-    } else {
-      this.elements.tasksList.innerHTML = tasks
-        .map((task) => this.renderTaskRow(task))
-        .join("");
+      this.taskView.start = 0;
+      this.taskView.end = 0;
+      return;
+    }
+
+    const scroller = this.elements.tasksScroll;
+    const virtual = scroller && tasks.length > this.taskVirtualThreshold;
+    let start = 0;
+    let end = tasks.length;
+    if (virtual) {
+      const pitch = this.taskRowPitch;
+      const listTop =
+        list.getBoundingClientRect().top -
+        scroller.getBoundingClientRect().top +
+        scroller.scrollTop;
+      const offset = Math.max(scroller.scrollTop - listTop, 0);
+      start = Math.max(Math.floor(offset / pitch) - this.taskOverscan, 0);
+      end = Math.min(
+        start + Math.ceil(scroller.clientHeight / pitch) + this.taskOverscan * 2,
+        tasks.length
+      );
     }
-    this.updateStats(tasks);
+    if (start === this.taskView.start && end === this.taskView.end) return;
+    this.taskView.start = start;
+    this.taskView.end = end;
+
+    const rows = tasks
+      .slice(start, end)
+      .map((task) => this.renderTaskRow(this.state.tasks.get(task.task_id) || task))
+      .join("");
+    if (!virtual) {
+      list.innerHTML = rows;
+      return;
+    }
+
+    // 上下用占位块撑开滚动高度，占位块与行之间同样有列表间距
+    const gap = parseFloat(getComputedStyle(list).rowGap) || 0;
+    const spacer = (count) => {
+      const height = count * this.taskRowPitch - gap;
+      return height > 0
+        ? `<div aria-hidden="true" style="height: ${height}px"></div>`
+        : "";
+    };
+    list.innerHTML = spacer(start) + rows + spacer(tasks.length - end);
+    const firstRow = list.querySelector(".task-row");
+    if (firstRow && firstRow.offsetHeight > 0) {
+      this.taskRowPitch = firstRow.offsetHeight + gap;
+    }
+  },
+
+  patchTaskRow(task) {
+    const row = this.elements.tasksList.querySelector(
+      `.task-row[data-task-id="${CSS.escape(task.task_id)}"]`
+    );
+    if (!row) return;
+    const fields = this.getTaskRowFields(task);
+    row.querySelectorAll("[data-task-field]").forEach((node) => {
+      const field = node.dataset.taskField;
+      if (field === "percent") {
+        node.style.width = `${fields.percent}%`;
+      } else if (node.textContent !== fields[field]) {
+        node.textContent = fields[field];
+      }
+    });
+  },
+
+  getTaskRowFields(task) {
+    const progress = task.progress || {};
+    return {
+      percent: Math.min(progress.percent || 0, 100),
+      stage: this.getStageLabel(task),
+      speed: progress.speed_str || "0 KB/s",
+      eta: progress.eta_str || "--",
+      size:
+        progress.total_str && progress.downloaded_str
+          ? `${progress.downloaded_str} / ${progress.total_str}`
+          : "--",
+    };
   },
 
   getFilteredTasks() {
@@ -1107,13 +1524,7 @@ const App = {
     const isCompleted = status === "completed";
     const isFailed = status === "failed";
     const progress = task.progress || {};
-    const percent = Math.min(progress.percent || 0, 100);
-    const speedLabel = progress.speed_str || "0 KB/s";
-    const etaLabel = progress.eta_str || "--";
-    const sizeLabel =
-      progress.total_str && progress.downloaded_str
-        ? `${progress.downloaded_str} / ${progress.total_str}`
-        : "--";
+    const fields = this.getTaskRowFields(task);
     const completedSize = progress.total_str || progress.downloaded_str || "--";
     const completedTime = task.completed_at
       ? this.formatDateTime(task.completed_at)
@@ -1129,12 +1540,11 @@ const App = {
     });
     const statusBadge = this.getStatusBadge(status);
     const actionButtons = this.getTaskActions(task, status);
-    const stageLabel = this.getStageLabel(task);
 
     return `
-      <div class="task-row group relative bg-white dark:bg-[#25282c] p-4 rounded-xl border border-gray-100 dark:border-gray-700/50 shadow-sm hover:shadow-md transition-all" data-task-url="${this.escapeHtml(
-        task.url
-      )}">
+      <div class="task-row group relative bg-white dark:bg-[#25282c] p-4 rounded-xl border border-gray-100 dark:border-gray-700/50 shadow-sm hover:shadow-md transition-all" data-task-id="${
+        task.task_id
+      }" data-task-url="${this.escapeHtml(task.url)}">
         <div class="flex items-center gap-4">
           <div class="relative size-16 shrink-0 bg-gray-100 dark:bg-gray-800 rounded-lg overflow-hidden flex items-center justify-center">
             ${
@@ -1170,17 +1580,17 @@ const App = {
                     }
                   </div>`
                 : `<div class="flex items-center gap-4 mb-3">
-                    <span class="text-[11px] text-[#658086] flex items-center gap-1"><span class="material-symbols-outlined text-[14px]">developer_board</span> ${stageLabel}</span>
-                    <span class="text-[11px] text-[#658086] flex items-center gap-1"><span class="material-symbols-outlined text-[14px]">speed</span> ${speedLabel}</span>
+                    <span class="text-[11px] text-[#658086] flex items-center gap-1"><span class="material-symbols-outlined text-[14px]">developer_board</span> <span data-task-field="stage">${fields.stage}</span></span>
+                    <span class="text-[11px] text-[#658086] flex items-center gap-1"><span class="material-symbols-outlined text-[14px]">speed</span> <span data-task-field="speed">${fields.speed}</span></span>
                     ${
                       isDownloading
-                        ? `<span class="text-[11px] text-[#658086] flex items-center gap-1"><span class="material-symbols-outlined text-[14px]">timer</span> ${etaLabel}</span>`
+                        ? `<span class="text-[11px] text-[#658086] flex items-center gap-1"><span class="material-symbols-outlined text-[14px]">timer</span> <span data-task-field="eta">${fields.eta}</span></span>`
                         : ""
                     }
-                    <span class="text-[11px] text-[#658086] flex items-center gap-1"><span class="material-symbols-outlined text-[14px]">data_usage</span> ${sizeLabel}</span>
+                    <span class="text-[11px] text-[#658086] flex items-center gap-1"><span class="material-symbols-outlined text-[14px]">data_usage</span> <span data-task-field="size">${fields.size}</span></span>
                   </div>
                   <div class="w-full bg-gray-100 dark:bg-gray-800 h-1.5 rounded-full overflow-hidden">
-                    <div class="bg-primary h-full" style="width: ${percent}%; transition: width 1s linear;"></div>
+                    <div class="bg-primary h-full" data-task-field="percent" style="width: ${fields.percent}%; transition: width 1s linear;"></div>
                   </div>`
             }
             ${
@@ -1236,6 +1646,8 @@ const App = {
     const stageMap = {
       downloading_video: labels.stageDownloadingVideo || "Downloading video",
       downloading_audio: labels.stageDownloadingAudio || "Downloading audio",
+      downloading_streams:
+        labels.stageDownloadingStreams || "Downloading video + audio",
       downloading: labels.stageDownloading || "Downloading",
       merging: labels.stageMerging || "Assembling",
       extracting_audio: labels.stageExtractingAudio || "Extracting audio",
@@ -1300,14 +1712,9 @@ const App = {
     return "";
   },
 
-  updateStats(filteredTasks) {
-    const allTasks = Array.from(this.state.tasks.values());
-    const activeCount = allTasks.filter((task) =>
-      ["downloading", "pending"].includes(task.status)
-    ).length;
-    const pausedCount = allTasks.filter(
-      (task) => task.status === "paused"
-    ).length;
+  updateStats() {
+    const activeCount = this.taskTotals.active;
+    const pausedCount = this.taskTotals.paused;
     const strings = STRINGS.ui?.dashboard || {};
     const activeText = (strings.activeCount || "{count} Active").replace(
       "{count}",
@@ -1322,13 +1729,16 @@ const App = {
       this.elements.statPaused.textContent = pausedText;
     }
 
-    const totalSpeed = allTasks.reduce(
-      (sum, task) => sum + (task.progress?.speed || 0),
-      0
-    );
-    this.elements.totalSpeed.textContent = this.formatBytes(totalSpeed) + "/s";
+    // 增量累加的浮点速度可能残留极小的负值
+    const totalSpeed = Math.max(this.taskTotals.speed, 0);
+    const globalLimit = Number(this.state.settings.global_rate_limit) || 0;
+    this.elements.totalSpeed.textContent =
+      globalLimit > 0
+        ? `${this.formatBytes(totalSpeed)}/s / ${this.formatBytes(globalLimit)}/s`
+        : this.formatBytes(totalSpeed) + "/s";
     if (this.elements.speedBar) {
-      const speedRatio = Math.min(totalSpeed / (10 * 1024 * 1024), 1);
+      const speedScale = globalLimit > 0 ? globalLimit : 10 * 1024 * 1024;
+      const speedRatio = Math.min(totalSpeed / speedScale, 1);
       this.elements.speedBar.style.width = `${Math.max(speedRatio * 100, 10)}%`;
     }
   },
@@ -18,6 +18,10 @@ window.I18N = {
         inputPlaceholder: "粘贴 YouTube、X 或 Bilibili 链接...",
         launchButton: "Launch",
         analyzing: "正在分析网络流...",
+        playlistSelectAll: "全选",
+        playlistQueue: "下载所选",
+        playlistLoading: "已列出 {count} 个视频，继续加载中...",
+        playlistSummary: "共 {count} 个视频，已选 {selected} 个",
         compatiblePlatforms: "兼容平台",
         youtube: "YouTube",
         xcom: "X.com",
@@ -148,6 +152,9 @@ window.I18N = {
       downloadStartedTitle: "开始下载",
       downloadCompletedTitle: "下载完成",
       openedFolderTitle: "已打开文件夹",
+      parseBatchTitle: "批量解析",
+      parseBatchStarted: "共 {count} 个链接，跳过 {duplicates} 个重复链接",
+      parseBatchDone: "已加入 {queued} 个任务，{failed} 个解析失败",
     },
     labels: {
       noStreams: "当前模式下没有可用流。",
@@ -160,6 +167,7 @@ window.I18N = {
       statusPending: "等待中",
       stageDownloadingVideo: "下载视频",
       stageDownloadingAudio: "下载音频",
+      stageDownloadingStreams: "并行下载音视频",
       stageDownloading: "下载中",
       stageMerging: "组装中",
       stageExtractingAudio: "提取音频",
@@ -190,6 +198,10 @@ window.I18N = {
         inputPlaceholder: "貼上 YouTube、X 或 Bilibili 連結...",
         launchButton: "Launch",
         analyzing: "正在分析網路串流...",
+        playlistSelectAll: "全選",
+        playlistQueue: "下載所選",
+        playlistLoading: "已列出 {count} 部影片，繼續載入中...",
+        playlistSummary: "共 {count} 部影片，已選 {selected} 部",
         compatiblePlatforms: "相容平台",
         youtube: "YouTube",
         xcom: "X.com",
@@ -320,6 +332,9 @@ window.I18N = {
       downloadStartedTitle: "開始下載",
       downloadCompletedTitle: "下載完成",
       openedFolderTitle: "已開啟資料夾",
+      parseBatchTitle: "批次解析",
+      parseBatchStarted: "共 {count} 個連結，略過 {duplicates} 個重複連結",
+      parseBatchDone: "已加入 {queued} 個任務，{failed} 個解析失敗",
     },
     labels: {
       noStreams: "目前模式下沒有可用串流。",
@@ -332,6 +347,7 @@ window.I18N = {
       statusPending: "等待中",
       stageDownloadingVideo: "下載影片",
       stageDownloadingAudio: "下載音訊",
+      stageDownloadingStreams: "並行下載影音",
       stageDownloading: "下載中",
       stageMerging: "組裝中",
       stageExtractingAudio: "擷取音訊",
@@ -362,6 +378,10 @@ window.I18N = {
         inputPlaceholder: "Paste YouTube, X, or Bilibili link here...",
         launchButton: "Launch",
         analyzing: "Analyzing network stream...",
+        playlistSelectAll: "Select all",
+        playlistQueue: "Download selected",
+        playlistLoading: "{count} videos listed, loading more...",
+        playlistSummary: "{count} videos, {selected} selected",
         compatiblePlatforms: "Compatible Platforms",
         youtube: "YouTube",
         xcom: "X.com",
@@ -492,6 +512,9 @@ window.I18N = {
       downloadStartedTitle: "Download started",
       downloadCompletedTitle: "Download completed",
       openedFolderTitle: "Opened folder",
+      parseBatchTitle: "Batch parsing",
+      parseBatchStarted: "{count} links, {duplicates} duplicates skipped",
+      parseBatchDone: "{queued} tasks queued, {failed} failed to parse",
     },
     labels: {
       noStreams: "No streams available for this mode.",
@@ -504,6 +527,7 @@ window.I18N = {
       statusPending: "Pending",
       stageDownloadingVideo: "Downloading video",
       stageDownloadingAudio: "Downloading audio",
+      stageDownloadingStreams: "Downloading video + audio",
       stageDownloading: "Downloading",
       stageMerging: "Assembling",
       stageExtractingAudio: "Extracting audio",